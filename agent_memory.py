@@ -0,0 +1,164 @@
+import os
+import re
+import math
+import time
+import sqlite3
+import threading
+
+from scheduler import task_key, CONTEXT_DIVIDER, speculating
+from compaction import make_digest
+
+# Local agent memory in place of crewai's embedding-backed memory: after a task, a short digest of its
+# output is stored for the agent that wrote it; before that agent's next task, the few notes that share
+# the most words with the task prompt are appended to its context. No embeddings are computed, entries
+# expire after a TTL and each agent keeps at most max_items notes (least recently used go first).
+# Which agents use it is the `memory` flag in agents.AGENT_SPECS. Every lookup is counted per task so
+# the run report shows what memory costs and how often it actually finds something.
+
+DEFAULT_MEMORY_PATH = os.path.join(".llm_cache", "memory.sqlite")
+WORD_RE = re.compile(r"[a-z][a-z0-9_-]{2,}")
+STOPWORDS = {
+    "the", "and", "for", "with", "that", "this", "are", "from", "will", "shall", "should", "must", "each",
+    "all", "any", "not", "use", "can", "its", "into", "based", "their", "your", "you", "document", "section",
+}
+
+
+def _words(text):
+    return {word for word in WORD_RE.findall((text or "").lower()) if word not in STOPWORDS}
+
+
+class LocalMemory:
+    def __init__(self, path=DEFAULT_MEMORY_PATH, max_items=50, ttl_seconds=14 * 24 * 3600,
+                 top_k=3, max_note_chars=1200, min_score=0.08, embedder=None):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self.top_k = top_k
+        self.max_note_chars = max_note_chars
+        self.min_score = min_score
+        self.embedder = embedder  # optional text -> vector; only used to rerank, and every call is counted
+        self.enabled_roles = None  # None = every agent
+        self.stats = {}            # task key -> {"retrievals", "hits", "embeddings", "chars", "ms", "stored"}
+        self._speculative = {}     # task key -> (agent, topic, text) of a speculative run, until settle() decides
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS notes ("
+            " agent TEXT, task TEXT, topic TEXT, note TEXT, created REAL, last_used REAL,"
+            " PRIMARY KEY (agent, task, topic))"
+        )
+        self._db.commit()
+
+    def _stat(self, key):
+        return self.stats.setdefault(key, {"retrievals": 0, "hits": 0, "embeddings": 0, "chars": 0, "ms": 0.0, "stored": 0})
+
+    def _embed(self, key, text):
+        self._stat(key)["embeddings"] += 1
+        return self.embedder(text)
+
+    def recall(self, agent, key, topic, query):
+        """Up to top_k notes for `agent` relevant to `query`, excluding this very task's note for this topic."""
+        start = time.perf_counter()
+        now = time.time()
+        with self._lock:
+            self._db.execute("DELETE FROM notes WHERE created < ?", (now - self.ttl_seconds,))
+            rows = self._db.execute(
+                "SELECT task, topic, note FROM notes WHERE agent = ? AND NOT (task = ? AND topic = ?)",
+                (agent, key, topic),
+            ).fetchall()
+
+        query_words = _words(query)
+        scored = []
+        for task, note_topic, note in rows:
+            note_words = _words(note)
+            if query_words and note_words:
+                score = len(query_words & note_words) / math.sqrt(len(query_words) * len(note_words))
+                if score >= self.min_score:
+                    scored.append((score, task, note_topic, note))
+        scored.sort(reverse=True)
+        hits = scored[:self.top_k]
+
+        if self.embedder and len(scored) > 1:
+            query_vector = self._embed(key, query)
+            reranked = []
+            for score, task, note_topic, note in scored[:self.top_k * 2]:
+                vector = self._embed(key, note)
+                dot = sum(a * b for a, b in zip(query_vector, vector))
+                norm = math.sqrt(sum(a * a for a in query_vector)) * math.sqrt(sum(b * b for b in vector)) or 1.0
+                reranked.append((dot / norm, task, note_topic, note))
+            hits = sorted(reranked, reverse=True)[:self.top_k]
+
+        if hits:
+            with self._lock:
+                self._db.executemany(
+                    "UPDATE notes SET last_used = ? WHERE agent = ? AND task = ? AND topic = ?",
+                    [(now, agent, task, note_topic) for _, task, note_topic, _ in hits],
+                )
+                self._db.commit()
+
+        stat = self._stat(key)
+        stat["retrievals"] += 1
+        stat["hits"] += len(hits)
+        stat["ms"] += (time.perf_counter() - start) * 1000
+        return [(task, note_topic, note) for _, task, note_topic, note in hits]
+
+    def remember(self, agent, key, topic, text):
+        note = make_digest(text, key)[:self.max_note_chars]
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO notes VALUES (?, ?, ?, ?, ?, ?)", (agent, key, topic, note, now, now))
+            # Keep the agent's max_items most recently used notes
+            self._db.execute(
+                "DELETE FROM notes WHERE agent = ? AND rowid NOT IN ("
+                " SELECT rowid FROM notes WHERE agent = ? ORDER BY last_used DESC LIMIT ?)",
+                (agent, agent, self.max_items),
+            )
+            self._db.commit()
+        self._stat(key)["stored"] += 1
+
+    def wrap(self, execute, topic):
+        def remembering_execute(task, context):
+            agent = getattr(task.agent, "role", None)
+            if agent is None or (self.enabled_roles is not None and agent not in self.enabled_roles):
+                return execute(task, context)
+            key = task_key(task)
+            notes = self.recall(agent, key, topic, task.description)
+            if notes:
+                lines = [f"- [{note_task}, topic: {note_topic[:60]}]\n{note}" for note_task, note_topic, note in notes]
+                memory_text = "Notes from your earlier work (may be outdated, use only if relevant):\n" + "\n".join(lines)
+                self._stat(key)["chars"] += len(memory_text)
+                context = CONTEXT_DIVIDER.join(part for part in (context, memory_text) if part)
+            text = execute(task, context)
+            if speculating.get():
+                # The guess may still be thrown away (see speculation.py); settle() stores it if it is kept
+                with self._lock:
+                    self._speculative[key] = (agent, topic, text)
+            else:
+                self.remember(agent, key, topic, text)
+            return text
+
+        return remembering_execute
+
+    def settle(self, key, text):
+        # Called with every finished task (crew.py task_done): a kept speculative result is remembered now
+        with self._lock:
+            pending = self._speculative.pop(key, None)
+        if pending and pending[2] == text:
+            self.remember(pending[0], key, pending[1], text)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def memory_from_env():
+    # SDLC_MEMORY=off disables it; the limits can be tuned without code changes
+    if os.getenv("SDLC_MEMORY", "local").lower() in ("off", "0", "false", "none"):
+        return None
+    return LocalMemory(
+        max_items=int(os.getenv("SDLC_MEMORY_MAX_ITEMS", "50")),
+        ttl_seconds=float(os.getenv("SDLC_MEMORY_TTL_HOURS", str(14 * 24))) * 3600,
+        top_k=int(os.getenv("SDLC_MEMORY_TOP_K", "3")),
+    )
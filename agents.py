@@ -1,196 +1,226 @@
-
-
-
 import os
-from crewai import Agent
-from langchain_google_genai import ChatGoogleGenerativeAI
 from dotenv import load_dotenv
 load_dotenv()
 
-llm = ChatGoogleGenerativeAI(
-    model="gemini-1.5-flash",
-    #model="gemini-2.0-pro",
-    temperature=0.2,
-    verbose=True,
-    memory=True,
-    google_api_key=os.getenv("GOOGLE_API_KEY")
-)
-
-requirement_analyst_Agent = Agent(
-    role="Requirement Intake Agent",
-    goal="Refine vague input for {topic} into detailed, structured requirements",
-    backstory="An AI analyst that communicates with stakeholders to clarify vague or ambiguous requirements.",
-    verbose=True,
-    memory=True,
-    llm=llm,
-    allow_delegation=True
-)
-
-document_reviewer_agent = Agent(
-    role="Technical Reviewer",
-    goal="Technically review documents based on {topic} and suggest improvements",
-    backstory="Reviews technical documents for structure, completeness, and feasibility in the context of {topic}.",
-    llm=llm,
-    verbose=True,
-    memory=True,
-    allow_delegation=True
-)
-
-document_updater_agent = Agent(
-    role="Final Reviewer",
-    goal="Evaluate review quality and apply necessary updates for {topic} if required",
-    backstory="A senior reviewer who ensures correctness and clarity of {topic}-related documents.",
-    llm=llm,
-    verbose=True,
-    memory=True,
-    allow_delegation=True
-)
-
-user_story_agent = Agent(
-    role="Business Analyst",
-    goal="Understand the requirement from {topic} and generate clear, concise user stories for agile environment",
-    backstory="An experienced business analyst who translates business needs into actionable user stories.",
-    verbose=True,
-    memory=True,
-    llm=llm,
-    allow_delegation=True
-)
-
-pdd_agent = Agent(
-    role="PDD Specialist",
-    goal="Create a Project Design Document from the user story and {topic}",
-    backstory="A technical architect responsible for planning and system structure.",
-    verbose=True,
-    memory=True,
-    llm=llm,
-    allow_delegation=True
-)
-
-sdd_agent = Agent(
-    role="SDD Specialist",
-    goal="Generate a detailed System Design Document based on the PDD",
-    backstory="A system designer focused on translating designs into technical documents.",
-    verbose=True,
-    memory=True,
-    llm=llm,
-    allow_delegation=True
-)
-
-component_mapper_agent = Agent(
-    role="Component Mapper",
-    goal="Map suitable technologies to components of {topic}",
-    backstory="Identifies and selects technologies aligned with system modules for {topic}  based on PDD and SDD.",
-    llm=llm,
-    memory=True,
-    verbose=True,
-    allow_delegation=False
-)
-
-risk_analysis_agent = Agent(
-    role="Risk Analyst",
-    goal="Identify technical risks in the system for {topic} and propose mitigations",
-    backstory="Helps ensure project success by anticipating and managing risks in {topic}-related systems.",
-    llm=llm,
-    memory=True,
-    verbose=False
-)
-
-# flowchart_agent = Agent(
-#     role="Flowchart Designer",
-#     goal="Generate system flowcharts in Mermaid format to represent {topic}",
-#     backstory="Creates clean and accurate visual flow representations of the {topic} system.",
-#     llm=llm,
-#     memory=True,
-#     verbose=True,
-#     allow_delegation=False
-# )
-
-
-flowchart_agent = Agent(
-    role="Flowchart Designer",
-    goal="Generate a clean and minimal Mermaid flowchart representing the {topic} system architecture.",
-    backstory=(
-        "Expert in designing clean system flowcharts using Mermaid syntax, focusing only on key modules, "
-        "simple relationships, and high-level interactions. Avoids long labels and overly complex flows."
+# crewai and langchain_google_genai are slow to import, so they are only pulled in by the builders below
+
+DEFAULT_LLM_CONFIG = {
+    "model": "gemini-1.5-flash",
+    #"model": "gemini-2.0-pro",
+    "temperature": 0.2,
+    # Stream tokens so each task's output grows on disk while Gemini is still writing (see streaming.py)
+    "streaming": True,
+    # ratelimit.RateLimiter owns retries/backoff, so the client itself only retries once
+    "max_retries": 1,
+    # None = the provider's defaults; set per model tier in model_routing.json (see routing.py)
+    "max_output_tokens": None,
+    "timeout": None,
+}
+
+
+def llm_callbacks(streaming=True):
+    # Token usage for the run report, plus streamed tokens into <output_file>.partial
+    from tracing import usage_callback_handler
+
+    callbacks = [usage_callback_handler()]
+    if streaming:
+        from streaming import token_callback_handler
+        callbacks.append(token_callback_handler())
+    return callbacks
+
+
+def build_llm(config=None):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    config = {**DEFAULT_LLM_CONFIG, **(config or {})}
+    extra = dict(callbacks=llm_callbacks(config["streaming"]))
+    if config["streaming"]:
+        extra["streaming"] = True
+    for option in ("max_output_tokens", "timeout"):
+        if config.get(option) is not None:
+            extra[option] = config[option]
+
+    return ChatGoogleGenerativeAI(
+        model=config["model"],
+        temperature=config["temperature"],
+        max_retries=config["max_retries"],
+        verbose=True,
+        google_api_key=os.getenv("GOOGLE_API_KEY"),
+        **extra
+    )
+
+
+AGENT_SPECS = {
+    "requirement_analyst_Agent": dict(
+        role="Requirement Intake Agent",
+        goal="Refine vague input for {topic} into detailed, structured requirements",
+        backstory="An AI analyst that communicates with stakeholders to clarify vague or ambiguous requirements.",
+        verbose=True,
+        memory=True,
+        allow_delegation=True
     ),
-    llm=llm,
-    memory=True,
-    verbose=True,
-    allow_delegation=False
-)
-
-final_writer_agent = Agent(
-    role="Final Writer Agent",
-    goal="Combine the User Story, PDD, and SDD into a final comprehensive output document",
-    backstory="An experienced technical writer skilled at compiling and formatting technical documentation into a cohesive format.",
-    verbose=False,
-    memory=True,
-    llm=llm,
-    allow_delegation=False
-)
-
-# researcher_agent = Agent(
-#     role="Researcher",
-#     goal="Research and gather relevant data to enrich the design",
-#     backstory="A researcher collecting technical and domain-specific references.",
-#     verbose=True,
-#     memory=True,
-#     llm=llm
-# )
-
-
-
-
 
+    "document_reviewer_agent": dict(
+        role="Technical Reviewer",
+        goal="Technically review documents based on {topic} and suggest improvements",
+        backstory="Reviews technical documents for structure, completeness, and feasibility in the context of {topic}.",
+        verbose=True,
+        memory=True,
+        allow_delegation=True
+    ),
 
+    "document_updater_agent": dict(
+        role="Final Reviewer",
+        goal="Evaluate review quality and apply necessary updates for {topic} if required",
+        backstory="A senior reviewer who ensures correctness and clarity of {topic}-related documents.",
+        verbose=True,
+        memory=True,
+        allow_delegation=True
+    ),
 
+    "user_story_agent": dict(
+        role="Business Analyst",
+        goal="Understand the requirement from {topic} and generate clear, concise user stories for agile environment",
+        backstory="An experienced business analyst who translates business needs into actionable user stories.",
+        verbose=True,
+        memory=True,
+        allow_delegation=True
+    ),
 
+    "pdd_agent": dict(
+        role="PDD Specialist",
+        goal="Create a Project Design Document from the user story and {topic}",
+        backstory="A technical architect responsible for planning and system structure.",
+        verbose=True,
+        memory=True,
+        allow_delegation=True
+    ),
 
+    "sdd_agent": dict(
+        role="SDD Specialist",
+        goal="Generate a detailed System Design Document based on the PDD",
+        backstory="A system designer focused on translating designs into technical documents.",
+        verbose=True,
+        memory=True,
+        allow_delegation=True
+    ),
 
+    "component_mapper_agent": dict(
+        role="Component Mapper",
+        goal="Map suitable technologies to components of {topic}",
+        backstory="Identifies and selects technologies aligned with system modules for {topic}  based on PDD and SDD.",
+        memory=True,
+        verbose=True,
+        allow_delegation=False
+    ),
 
+    "risk_analysis_agent": dict(
+        role="Risk Analyst",
+        goal="Identify technical risks in the system for {topic} and propose mitigations",
+        backstory="Helps ensure project success by anticipating and managing risks in {topic}-related systems.",
+        memory=True,
+        verbose=False
+    ),
 
+    # "flowchart_agent": dict(
+    #     role="Flowchart Designer",
+    #     goal="Generate system flowcharts in Mermaid format to represent {topic}",
+    #     backstory="Creates clean and accurate visual flow representations of the {topic} system.",
+    #     memory=True,
+    #     verbose=True,
+    #     allow_delegation=False
+    # ),
+
+    "flowchart_agent": dict(
+        role="Flowchart Designer",
+        goal="Generate a clean and minimal Mermaid flowchart representing the {topic} system architecture.",
+        backstory=(
+            "Expert in designing clean system flowcharts using Mermaid syntax, focusing only on key modules, "
+            "simple relationships, and high-level interactions. Avoids long labels and overly complex flows."
+        ),
+        memory=True,
+        verbose=True,
+        allow_delegation=False
+    ),
 
-word_doc_full_agent = Agent(
-    role="Full Word Report Generator",
-    goal="Generate complete, detailed Word report text content from system documents",
-    backstory=(
-        "You're a skilled technical writer responsible for compiling all finalized technical documentation "
-        "into a single, well-structured Word report. Your goal is to preserve depth and clarity using proper sectioning."
+    "final_writer_agent": dict(
+        role="Final Writer Agent",
+        goal="Combine the User Story, PDD, and SDD into a final comprehensive output document",
+        backstory="An experienced technical writer skilled at compiling and formatting technical documentation into a cohesive format.",
+        verbose=False,
+        memory=True,
+        allow_delegation=False
     ),
-    llm=llm,
-    verbose=True,
-    allow_delegation=False
-)
 
+    # "researcher_agent": dict(
+    #     role="Researcher",
+    #     goal="Research and gather relevant data to enrich the design",
+    #     backstory="A researcher collecting technical and domain-specific references.",
+    #     verbose=True,
+    #     memory=True
+    # ),
+
+    "word_doc_full_agent": dict(
+        role="Full Word Report Generator",
+        goal="Generate complete, detailed Word report text content from system documents",
+        backstory=(
+            "You're a skilled technical writer responsible for compiling all finalized technical documentation "
+            "into a single, well-structured Word report. Your goal is to preserve depth and clarity using proper sectioning."
+        ),
+        verbose=True,
+        allow_delegation=False
+    ),
 
+    "word_doc_summary_agent": dict(
+        role="Summary Report Generator",
+        goal="Generate a summary of the system documents for a Word report",
+        backstory=(
+            "You're a communication expert who summarizes technical documentation into readable overviews "
+            "for non-technical persons. Your summary includes key points, system rationale, and high-level insights, "
+            "but avoids implementation-level details."
+        ),
+        verbose=True,
+        allow_delegation=False
+    ),
 
+    "evaluation_agent": dict(
+        role="Evaluation Agent",
+        goal="Evaluate the overall effectiveness of the script and visuals",
+        backstory="A creative director giving feedback on final assets.",
+        verbose=True,
+        memory=True,
+        allow_delegation=True
+    ),
+}
 
 
+def build_agents(llm, config=None):
+    """Build a fresh set of agents sharing `llm`.
 
-word_doc_summary_agent = Agent(
-    role="Summary Report Generator",
-    goal="Generate a summary of the system documents for a Word report",
-    backstory=(
-        "You're a communication expert who summarizes technical documentation into readable overviews "
-        "for non-technical persons. Your summary includes key points, system rationale, and high-level insights, "
-        "but avoids implementation-level details."
-    ),
-    llm=llm,
-    verbose=True,
-    allow_delegation=False
-)
+    config: optional {agent_name: {Agent field: value}} overrides, e.g. {"risk_analysis_agent": {"verbose": True}}.
+    Returns {agent_name: Agent}.
+    """
+    config = config or {}
+    unknown = set(config) - set(AGENT_SPECS)
+    if unknown:
+        raise ValueError(f"Unknown agents in config: {', '.join(sorted(unknown))}")
 
+    return {name: build_agent(name, llm, config) for name in AGENT_SPECS}
 
 
+def build_agent(name, llm, config=None):
+    from crewai import Agent
 
+    # `memory` in the specs selects agents for agent_memory.LocalMemory; crewai's own embedding memory stays off
+    return Agent(**{**AGENT_SPECS[name], "llm": llm, **(config or {}).get(name, {}), "memory": False})
 
 
-evaluation_agent = Agent(
-    role="Evaluation Agent",
-    goal="Evaluate the overall effectiveness of the script and visuals",
-    backstory="A creative director giving feedback on final assets.",
-    llm=llm,
-    verbose=True,
-    memory=True,
-    allow_delegation=True
-)
+def memory_roles(config=None):
+    """Roles of the agents whose `memory` flag is on, after applying build_agents-style overrides."""
+    config = config or {}
+    roles = set()
+    for name, spec in AGENT_SPECS.items():
+        spec = {**spec, **config.get(name, {})}
+        if spec.get("memory"):
+            roles.add(spec["role"])
+    return roles
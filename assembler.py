@@ -0,0 +1,143 @@
+import re
+
+from scheduler import task_key
+from markdown_utils import strip_outer_fence, FENCE_RE, HEADING_RE, BOLD_HEADING_RE
+
+# Deterministic report assembly: the combined document (08) and the full report (docs_full) are
+# stitched together from the finished artifacts instead of being rewritten by an LLM. Every source
+# loses its code-fence wrapper and its own title, its headings are moved under one numbered section
+# and renumbered, "see section N" references follow the new numbers, and a table of contents is built.
+# Only the executive summary is new prose and still comes from the LLM (tasks.executive_summary_task).
+
+# {task key: (report title, [(section title, source task key), ...])}
+REPORTS = {
+    "08_final_combined_output": ("Consolidated Technical Document", [
+        ("User Story", "02b_user_story_updated"),
+        ("Project Design Document (PDD)", "03b_pdd_updated"),
+        ("System Design Document (SDD)", "04b_sdd_updated"),
+    ]),
+    "docs_full": ("Full Technical Report", [
+        ("Executive Summary", "08a_executive_summary"),
+        ("Requirements (Updated Intake)", "01b_requirements_updated"),
+        ("User Story", "02b_user_story_updated"),
+        ("Project Design Document (PDD)", "03b_pdd_updated"),
+        ("Component Mapping", "05_component_mapping"),
+        ("System Design Document (SDD)", "04b_sdd_updated"),
+    ]),
+}
+
+NUMBER_PREFIX_RE = re.compile(r"^(\d+(?:\.\d+)*)\.?\s+(?=\S)")
+SECTION_REF_RE = re.compile(r"\b([Ss]ections?\s+)(\d+(?:\.\d+)*)")
+TOC_DEPTH = 2  # section titles and their direct subsections
+
+
+def _parse_headings(lines):
+    """Yield (index, level, title) for every heading outside code blocks; numbered bold lines count too."""
+    in_code = False
+    for index, line in enumerate(lines):
+        if FENCE_RE.match(line):
+            in_code = not in_code
+            continue
+        if in_code:
+            continue
+        heading = HEADING_RE.match(line)
+        if heading:
+            yield index, len(heading.group(1)), heading.group(2).strip().strip("*").strip()
+            continue
+        bold = BOLD_HEADING_RE.match(line)
+        if bold and NUMBER_PREFIX_RE.match(bold.group(1).strip()):
+            yield index, None, bold.group(1).strip().rstrip(":")
+
+
+def _section_body(text):
+    """Split a source document into (body lines, [(line index, depth, title, old number)]) without its title."""
+    lines = strip_outer_fence(text).splitlines()
+    headings = list(_parse_headings(lines))
+
+    # A leading heading that nothing else outranks is the document's own title
+    first = next((i for i, line in enumerate(lines) if line.strip()), None)
+    if headings and headings[0][0] == first and headings[0][1] is not None:
+        if all(level is None or level > headings[0][1] for _, level, _ in headings[1:]):
+            lines[first] = ""
+            headings = headings[1:]
+
+    levels = [level for _, level, _ in headings if level is not None]
+    base = min(levels) if levels else 1
+    sections = []
+    for index, level, title in headings:
+        number = NUMBER_PREFIX_RE.match(title)
+        old_number = number.group(1) if number else None
+        if number:
+            title = title[number.end():].strip()
+            depth = old_number.count(".") + 1  # trust explicit numbering over the markdown level
+        else:
+            depth = (level or base) - base + 1
+        sections.append((index, max(1, depth), title, old_number))
+    return lines, sections
+
+
+def _renumber(counters, depth):
+    del counters[depth:]
+    while len(counters) < depth:
+        counters.append(0)
+    counters[depth - 1] += 1
+    return ".".join(str(n) for n in counters)
+
+
+def assemble(title, sections, subtitle=None):
+    """Build one markdown report from [(section title, source text)] with a table of contents."""
+    body = []
+    toc = []
+    counters = []
+    for section_title, text in sections:
+        number = _renumber(counters, 1)
+        toc.append((1, f"{number}. {section_title}"))
+        body += ["", f"## {number}. {section_title}", ""]
+
+        lines, headings = _section_body(text)
+        renumbered = {}
+        for index, depth, heading, old_number in headings:
+            new_number = _renumber(counters, depth + 1)
+            if old_number:
+                renumbered.setdefault(old_number, new_number)
+            if depth + 1 <= TOC_DEPTH:
+                toc.append((depth + 1, f"{new_number}. {heading}"))
+            lines[index] = f"{'#' * min(6, depth + 2)} {new_number}. {heading}"
+
+        def fix_reference(match):
+            return match.group(1) + renumbered.get(match.group(2), match.group(2))
+
+        in_code = False
+        for line in lines:
+            if FENCE_RE.match(line):
+                in_code = not in_code
+            body.append(line if in_code else SECTION_REF_RE.sub(fix_reference, line))
+        del counters[1:]
+
+    out = [f"# {title}"]
+    if subtitle:
+        out += ["", f"**Topic:** {subtitle}"]
+    out += ["", "## Table of Contents", ""]
+    out += [f"{'  ' * (depth - 1)}- {entry}" for depth, entry in toc]
+    text = "\n".join(out + body)
+    return re.sub(r"\n{3,}", "\n\n", text).strip() + "\n"
+
+
+class ReportAssembler:
+    """run_dag shortcut that produces the REPORTS tasks locally from their upstream outputs."""
+
+    def __init__(self, topic=None, reports=REPORTS):
+        self.topic = topic
+        self.reports = reports
+
+    def __call__(self, task, upstream):
+        key = task_key(task)
+        if key not in self.reports:
+            return None
+        title, sources = self.reports[key]
+        missing = [source for _, source in sources if source not in upstream]
+        if missing:
+            print(f"⚠️  {key}: {', '.join(missing)} not in context, falling back to the LLM writer")
+            return None
+        print(f"🧩 Assembled {key} locally from {len(sources)} documents")
+        return assemble(title, [(name, upstream[source]) for name, source in sources], subtitle=self.topic)
@@ -0,0 +1,135 @@
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+# Runs crew.py once per topic from a JSONL file, each topic in its own process and output folder.
+# Every line needs a "topic"; "slug" (or "id") is optional and names the output folder.
+
+BASE_OUTPUT_DIR = "outputs"
+
+
+def slugify(text, max_words=6, add_digest=True):
+    words = re.findall(r"[a-z0-9]+", text.lower())[:max_words]
+    if add_digest:
+        # Topics often start the same way ("Design an AI-powered ..."), keep their folders apart
+        words.append(hashlib.sha1(text.encode("utf-8")).hexdigest()[:6])
+    return "-".join(words) or "topic"
+
+
+def load_topics(path):
+    topics = []
+    seen = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"⚠️  Skipping line {line_no}: invalid JSON ({e})")
+                continue
+            topic = entry.get("topic")
+            if not topic:
+                print(f"⚠️  Skipping line {line_no}: no 'topic' field")
+                continue
+            name = entry.get("slug") or entry.get("id")
+            slug = slugify(str(name), max_words=12, add_digest=False) if name else slugify(topic)
+            if slug in seen:
+                print(f"⚠️  Skipping line {line_no}: duplicate slug '{slug}'")
+                continue
+            seen.add(slug)
+            topics.append({"slug": slug, "topic": topic})
+    return topics
+
+
+def run_topic(entry, args):
+    output_dir = os.path.join(args.output_dir, entry["slug"])
+    log_dir = os.path.join(args.output_dir, "_logs")
+    os.makedirs(log_dir, exist_ok=True)
+    log_path = os.path.join(log_dir, f"{entry['slug']}.log")
+
+    env = dict(os.environ)
+    env["SDLC_LLM_SLOTS_DIR"] = os.path.join(args.output_dir, "_llm_slots")
+    env["SDLC_MAX_LLM_CALLS"] = str(args.max_llm_calls)
+    env["PYTHONIOENCODING"] = "utf-8"  # crew.py prints emoji
+
+    command = [sys.executable, "crew.py", "--topic", entry["topic"], "--output-dir", output_dir,
+               "--workers", str(args.workers)]
+    command += args.crew_args
+
+    print(f"🚀 [{entry['slug']}] started")
+    start = time.time()
+    with open(log_path, "w", encoding="utf-8") as log:
+        process = subprocess.run(command, stdout=log, stderr=subprocess.STDOUT, env=env,
+                                 cwd=os.path.dirname(os.path.abspath(__file__)))
+    elapsed = time.time() - start
+    status = "ok" if process.returncode == 0 else "failed"
+    print(f"{'✅' if status == 'ok' else '❌'} [{entry['slug']}] {status} in {elapsed:.1f}s")
+
+    return {
+        "slug": entry["slug"],
+        "topic": entry["topic"],
+        "status": status,
+        "exit_code": process.returncode,
+        "seconds": round(elapsed, 1),
+        "output_dir": output_dir,
+        "log": log_path,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate SDLC documents for every topic in a JSONL file")
+    parser.add_argument("topics_file", nargs="?", default="requests.jsonl")
+    parser.add_argument("--crews", type=int, default=2, help="Topics processed at the same time")
+    parser.add_argument("--max-llm-calls", type=int, default=4, help="Global cap on in-flight LLM calls across all crews")
+    parser.add_argument("--workers", type=int, default=4, help="Max parallel tasks inside one crew")
+    parser.add_argument("--output-dir", default=BASE_OUTPUT_DIR)
+    parser.epilog = "Anything after '--' is passed to every crew.py run, e.g. -- --no-cache"
+
+    # argparse's REMAINDER swallows options placed after a positional, so split on '--' ourselves
+    argv = sys.argv[1:]
+    crew_args = []
+    if "--" in argv:
+        crew_args = argv[argv.index("--") + 1:]
+        argv = argv[:argv.index("--")]
+    args = parser.parse_args(argv)
+    args.crew_args = crew_args
+
+    topics = load_topics(args.topics_file)
+    if not topics:
+        print(f"Nothing to do: no topics in {args.topics_file}")
+        return
+
+    print(f"📘 Batch of {len(topics)} topics, {args.crews} crews, max {args.max_llm_calls} LLM calls in flight")
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=max(1, args.crews)) as pool:
+        results = list(pool.map(lambda entry: run_topic(entry, args), topics))
+
+    summary = {
+        "total_seconds": round(time.time() - start, 1),
+        "ok": sum(1 for r in results if r["status"] == "ok"),
+        "failed": sum(1 for r in results if r["status"] != "ok"),
+        "topics": results,
+    }
+    summary_path = os.path.join(args.output_dir, "batch_summary.json")
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    print("\n=== Batch summary ===")
+    print(f"{'Topic':<50} {'Status':<8} {'Seconds':>8}")
+    for r in results:
+        print(f"{r['slug']:<50} {r['status']:<8} {r['seconds']:>8}")
+    print(f"\n🎉 {summary['ok']} ok, {summary['failed']} failed in {summary['total_seconds']}s → {summary_path}")
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from markdown_blocks import parse_file  # noqa: E402
+from docx_export import markdown_to_docx  # noqa: E402
+
+# Markdown -> DOCX benchmark on inputs made by repeating a real artifact (default: the ~60 KB sample PDD).
+# Time per KB should stay flat as the input grows (linear time), and the parser's peak memory should not
+# grow with the input at all (it only holds one block at a time).
+#
+#   python benchmarks/bench_docx.py
+#   python benchmarks/bench_docx.py --source outputs/04b_sdd_updated.txt --scales 1 2 4 8 16 32
+
+DEFAULT_SOURCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "1.outputs_mental-Health-support", "03_pdd.txt")
+
+
+def make_input(source, scale, folder):
+    with open(source, "r", encoding="utf-8") as f:
+        text = f.read()
+    path = os.path.join(folder, f"input_x{scale}.md")
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(scale):
+            f.write(text)
+            f.write("\n\n")
+    return path
+
+
+def measure_parse(path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    blocks = sum(1 for _ in parse_file(path))
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return blocks, seconds, peak
+
+
+def measure_convert(path, output_path):
+    start = time.perf_counter()
+    markdown_to_docx(path, output_path, "Benchmark")
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming markdown -> DOCX conversion")
+    parser.add_argument("--source", default=DEFAULT_SOURCE, help="Markdown artifact to repeat")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 4, 16], help="Input sizes as multiples of the source")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        markdown_to_docx(make_input(args.source, 1, folder), os.path.join(folder, "warmup.docx"))  # builds the template
+
+        print(f"{'Input KB':>9} {'Blocks':>7} {'Parse s':>8} {'Parse peak KB':>14} {'DOCX s':>8} {'ms/KB':>7}")
+        for scale in args.scales:
+            path = make_input(args.source, scale, folder)
+            size_kb = os.path.getsize(path) / 1024
+            blocks, parse_seconds, peak = measure_parse(path)
+            convert_seconds = measure_convert(path, os.path.join(folder, f"output_x{scale}.docx"))
+            print(f"{size_kb:>9.0f} {blocks:>7} {parse_seconds:>8.3f} {peak / 1024:>14.0f} "
+                  f"{convert_seconds:>8.3f} {1000 * convert_seconds / size_kb:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
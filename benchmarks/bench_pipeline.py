@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_llm import FakeLLMBackend, build_fake_llm  # noqa: E402
+
+# End-to-end pipeline benchmark without an API key: the real crew from crew.py / tasks.py runs against
+# fake_llm, so everything except the model itself (crewai, scheduling, wrappers, file I/O) is measured.
+#
+#   python benchmarks/bench_pipeline.py                          # workers 1 and 4, 20x faster than real time
+#   python benchmarks/bench_pipeline.py --workers 4 --failure-rate 0.1 --json bench.json
+#   python benchmarks/bench_pipeline.py --baseline bench.json    # exit 1 when 20% slower than the baseline
+#
+# Reported per run: wall time, critical path (the longest dependency chain, measured), the sum of fake LLM
+# time, orchestration overhead per task (task wall time minus time inside the fake LLM) and peak memory.
+
+TOPIC = "Build an intelligent chatbot that provides 24/7 mental health support for young adults dealing with anxiety and stress."
+
+
+def peak_memory_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / 1024 / (1024 if sys.platform == "darwin" else 1), 1)  # bytes on macOS, KB on Linux
+
+
+def critical_path(graph, finished, run_started):
+    """Walk back from the last task to finish, always through the dependency that finished last."""
+    if not finished:
+        return 0.0, []
+    key = max(finished, key=finished.get)
+    end = finished[key]
+    chain = [key]
+    while graph.get(key):
+        key = max(graph[key], key=lambda dep: finished.get(dep, run_started))
+        chain.append(key)
+    return round(end - run_started, 3), list(reversed(chain))
+
+
+def run_once(workers, args, folder):
+    from crew import run_pipeline
+    from checkpoint import RunCheckpoint
+    from tracing import Tracer
+    from scheduler import build_graph
+    from tasks import build_tasks
+    from agents import build_agents
+
+    backend = FakeLLMBackend(seed=args.seed, first_token_ms=args.first_token_ms, latency_sigma=args.latency_sigma,
+                             tokens_per_second=args.tokens_per_second, failure_rate=args.failure_rate,
+                             size_scale=args.size_scale, time_scale=args.time_scale)
+    llm, backend = build_fake_llm(backend)
+    output_dir = os.path.join(folder, f"workers_{workers}")
+    finished = {}
+    lock = threading.Lock()
+
+    def on_task_done(key, text):
+        with lock:
+            finished[key] = time.time()
+
+    limiter = None
+    if args.with_limiter:
+        from ratelimit import RateLimiter, TokenBucket, AdaptiveConcurrency
+        limiter = RateLimiter(TokenBucket("bench", 10_000, 100_000_000, state_dir=folder), AdaptiveConcurrency(workers),
+                              base_delay=0.05)
+
+    tracer = Tracer(limiter)
+    checkpoint = RunCheckpoint.create(TOPIC, output_dir, root=os.path.join(folder, "checkpoints"))
+    started = time.time()
+    run_pipeline(TOPIC, output_dir=output_dir, llm=llm, workers=workers, limiter=limiter,
+                 on_task_done=on_task_done, checkpoint=checkpoint, tracer=tracer)
+    wall = time.time() - started
+
+    graph = build_graph(list(build_tasks(build_agents(llm), os.path.join(folder, "graph")).values()))
+    path_seconds, path = critical_path(graph, finished, started)
+    overhead = {}
+    for key, span in tracer.spans.items():
+        llm_seconds = backend.stats.get(key, {}).get("llm_seconds", 0.0)
+        overhead[key] = round((span.finished - span.started) - llm_seconds, 3)
+    llm_seconds = sum(stat["llm_seconds"] for stat in backend.stats.values())
+    return {
+        "workers": workers,
+        "wall_seconds": round(wall, 3),
+        "critical_path_seconds": path_seconds,
+        "critical_path": path,
+        "llm_seconds_total": round(llm_seconds, 3),
+        "llm_calls": sum(stat["calls"] for stat in backend.stats.values()),
+        "llm_failures": sum(stat["failures"] for stat in backend.stats.values()),
+        "tasks": len(finished),
+        "overhead_seconds_total": round(sum(overhead.values()), 3),
+        "overhead_seconds_max": max(overhead.values(), default=0.0),
+        "overhead_per_task": dict(sorted(overhead.items(), key=lambda item: item[1], reverse=True)),
+        "peak_memory_mb": peak_memory_mb(),
+    }
+
+
+def check_baseline(results, baseline_path, tolerance):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {run["workers"]: run for run in json.load(f)["runs"]}
+    failures = []
+    for run in results:
+        before = baseline.get(run["workers"])
+        if not before:
+            continue
+        for metric in ("wall_seconds", "overhead_seconds_total"):
+            if run[metric] > before[metric] * (1 + tolerance):
+                failures.append(f"workers={run['workers']} {metric}: {before[metric]} -> {run[metric]}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the full crew offline against a fake LLM")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--first-token-ms", type=float, default=800, help="Median time to first token")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Log-normal spread of the first-token latency")
+    parser.add_argument("--tokens-per-second", type=float, default=150)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of calls failing with a 429")
+    parser.add_argument("--size-scale", type=float, default=1.0, help="Multiply the sample output sizes")
+    parser.add_argument("--time-scale", type=float, default=0.05, help="1.0 = real-time latencies")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--with-limiter", action="store_true", help="Run through ratelimit.RateLimiter too")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Results file of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown against the baseline")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for workers in args.workers:
+            results.append(run_once(workers, args, folder))
+
+    print(f"\n{'Workers':>7} {'Wall s':>8} {'Crit. path s':>12} {'LLM s':>8} {'Calls':>6} {'Fail':>5} "
+          f"{'Overhead s':>10} {'Max/task s':>10} {'Peak MB':>8}")
+    for run in results:
+        print(f"{run['workers']:>7} {run['wall_seconds']:>8.2f} {run['critical_path_seconds']:>12.2f} "
+              f"{run['llm_seconds_total']:>8.2f} {run['llm_calls']:>6} {run['llm_failures']:>5} "
+              f"{run['overhead_seconds_total']:>10.2f} {run['overhead_seconds_max']:>10.3f} {run['peak_memory_mb'] or 'n/a':>8}")
+    print("Critical path: " + " -> ".join(results[-1]["critical_path"]))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "runs": results}, f, indent=2)
+    if args.baseline:
+        failures = check_baseline(results, args.baseline, args.tolerance)
+        for failure in failures:
+            print(f"❌ Regression: {failure}")
+        if failures:
+            sys.exit(1)
+        print("✅ Within tolerance of the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import os
+import json
+import time
+import uuid
+import threading
+
+# Per-run checkpoints: every finished task is saved atomically to checkpoints/<run_id>/<task key>.json,
+# so `python crew.py --resume <run_id>` can reload them as context and continue from the first unfinished task.
+
+CHECKPOINT_DIR = "checkpoints"
+
+
+def atomic_write_json(path, data):
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class RunCheckpoint:
+    def __init__(self, run_id, folder, meta):
+        self.run_id = run_id
+        self.folder = folder
+        self.meta = meta
+
+    @classmethod
+    def create(cls, topic, output_dir, root=CHECKPOINT_DIR):
+        run_id = time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        folder = os.path.join(root, run_id)
+        os.makedirs(folder, exist_ok=True)
+        meta = {"run_id": run_id, "topic": topic, "output_dir": output_dir,
+                "created": time.time(), "status": "running"}
+        atomic_write_json(os.path.join(folder, "meta.json"), meta)
+        return cls(run_id, folder, meta)
+
+    @classmethod
+    def load(cls, run_id, root=CHECKPOINT_DIR):
+        folder = os.path.join(root, run_id)
+        meta_path = os.path.join(folder, "meta.json")
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"No checkpoint found for run '{run_id}' in {root}/")
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(run_id, folder, meta)
+
+    def completed(self):
+        outputs = {}
+        for name in sorted(os.listdir(self.folder)):
+            if not name.endswith(".json") or name == "meta.json":
+                continue
+            with open(os.path.join(self.folder, name), "r", encoding="utf-8") as f:
+                record = json.load(f)
+            outputs[record["task"]] = record["output"]
+        return outputs
+
+    def save_task(self, key, text):
+        record = {"task": key, "output": text, "finished": time.time(), "chars": len(text)}
+        atomic_write_json(os.path.join(self.folder, f"{key}.json"), record)
+
+    def set_status(self, status):
+        self.save_meta(status=status)
+
+    def save_meta(self, **fields):
+        # Extra run facts (refinement rounds, ...) kept next to topic and status in meta.json
+        self.meta.update(fields)
+        self.meta["updated"] = time.time()
+        atomic_write_json(os.path.join(self.folder, "meta.json"), self.meta)
@@ -0,0 +1,151 @@
+import os
+import re
+import hashlib
+import threading
+
+from scheduler import task_key, CONTEXT_DIVIDER
+from ratelimit import estimate_tokens
+from markdown_utils import strip_outer_fence, FENCE_RE, HEADING_RE, BOLD_HEADING_RE
+
+# Context compaction: instead of pasting whole upstream documents into a task's prompt, a task can
+# ask for a structured digest (section outline, requirement IDs, APIs, tables) of some of them,
+# and have its total context held under a token budget. Digests are pure text processing and are
+# cached on disk by content hash. Which task gets what is declared in tasks.CONTEXT_POLICY.
+
+DIGEST_DIR = os.path.join(".llm_cache", "digests")
+
+REQ_ID_RE = re.compile(r"\b((?:FR|NFR|US|AC|REQ|BR|UC)[-.]?\d+(?:\.\d+)*)\b")
+API_RE = re.compile(r"\b(GET|POST|PUT|PATCH|DELETE)\s+`?(/[\w\-/{}:.]*)")
+TABLE_SEPARATOR_RE = re.compile(r"^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$")
+
+TRUNCATION_NOTE = "\n[... truncated to fit the context budget ...]"
+
+
+def _clean_heading(text):
+    return text.strip().strip("*").strip()
+
+
+def _first_sentence(lines, limit=160):
+    for line in lines:
+        text = line.strip().lstrip("-*> ").strip()
+        if not text or text.startswith("|") or FENCE_RE.match(line):
+            continue
+        text = re.sub(r"\*\*|__|`", "", text)
+        sentence = re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0]
+        return sentence if len(sentence) <= limit else sentence[:limit - 1] + "…"
+    return ""
+
+
+def make_digest(text, name="document"):
+    lines = strip_outer_fence(text).splitlines()
+    outline = []      # (level, title, first sentence)
+    tables = []       # (nearest heading, columns)
+    section_title, section_level, section_lines = None, 0, []
+    in_code = False
+
+    def close_section():
+        if section_title:
+            outline.append((section_level, section_title, _first_sentence(section_lines)))
+
+    for index, line in enumerate(lines):
+        if FENCE_RE.match(line):
+            in_code = not in_code
+            continue
+        if in_code:
+            continue
+        heading = HEADING_RE.match(line)
+        bold = None if heading else BOLD_HEADING_RE.match(line)
+        if heading or bold:
+            close_section()
+            section_title = _clean_heading(heading.group(2) if heading else bold.group(1))
+            section_level = len(heading.group(1)) if heading else 4
+            section_lines = []
+            continue
+        section_lines.append(line)
+        if TABLE_SEPARATOR_RE.match(line) and index > 0 and "|" in lines[index - 1]:
+            columns = [_clean_heading(cell) for cell in lines[index - 1].strip().strip("|").split("|")]
+            tables.append((section_title or name, [c for c in columns if c]))
+    close_section()
+
+    req_ids = list(dict.fromkeys(REQ_ID_RE.findall(text)))
+    apis = list(dict.fromkeys(f"{method} {path}" for method, path in API_RE.findall(text)))
+
+    out = [f"[Digest of {name}: full text is {len(text):,} characters]", "", "Outline:"]
+    base_level = min((level for level, _, _ in outline), default=1)
+    for level, title, sentence in outline:
+        indent = "  " * (level - base_level)
+        out.append(f"{indent}- {title}" + (f": {sentence}" if sentence else ""))
+    if req_ids:
+        out += ["", "Requirement IDs: " + ", ".join(req_ids)]
+    if apis:
+        out += ["", "APIs:"] + [f"- {api}" for api in apis]
+    if tables:
+        out += ["", "Tables:"] + [f"- {title}: {', '.join(columns)}" for title, columns in tables]
+    return "\n".join(out)
+
+
+def _truncate(text, max_tokens):
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    return text[:max(0, max_chars - len(TRUNCATION_NOTE))] + TRUNCATION_NOTE
+
+
+class Compactor:
+    """scheduler.run_dag context_builder that applies a per-task policy.
+
+    policy: {task key: {"digest": [upstream keys], "budget": max context tokens}}; tasks not listed get full text.
+    """
+
+    def __init__(self, policy, cache_dir=DIGEST_DIR):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.policy = policy
+        self.cache_dir = cache_dir
+        self.savings = {}  # task key -> (full context tokens, compacted context tokens)
+        self._lock = threading.Lock()
+
+    def digest(self, key, text):
+        digest_hash = hashlib.sha256(f"{key}\n{text}".encode("utf-8")).hexdigest()
+        path = os.path.join(self.cache_dir, f"{digest_hash}.md")
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+        digest = make_digest(text, key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(digest)
+        os.replace(tmp_path, path)
+        return digest
+
+    def build_context(self, task, upstream):
+        key = task_key(task)
+        rule = self.policy.get(key)
+        full_context = CONTEXT_DIVIDER.join(upstream.values())
+        if not rule:
+            return full_context
+
+        parts = {dep: self.digest(dep, text) if dep in rule.get("digest", ()) else text
+                 for dep, text in upstream.items()}
+        budget = rule.get("budget")
+
+        def size():
+            return sum(estimate_tokens(part) for part in parts.values())
+
+        if budget:
+            # Over budget: digest the biggest full-text inputs first, then cut what is left proportionally
+            for dep in sorted(parts, key=lambda d: len(parts[d]), reverse=True):
+                if size() <= budget:
+                    break
+                if parts[dep] is upstream[dep]:
+                    parts[dep] = self.digest(dep, upstream[dep])
+            total = size()
+            if total > budget:
+                parts = {dep: _truncate(part, budget * estimate_tokens(part) // total) for dep, part in parts.items()}
+
+        context = CONTEXT_DIVIDER.join(parts.values())
+        before, after = estimate_tokens(full_context), estimate_tokens(context)
+        with self._lock:
+            self.savings[key] = (before, after)
+        if after < before:
+            print(f"🗜️  {key}: context compacted from ~{before:,} to ~{after:,} tokens")
+        return context
@@ -1,180 +1,386 @@
-
-
-
 import os
-from crewai import Crew, Process
+import argparse
 from dotenv import load_dotenv
 
-from agents import (
-    requirement_analyst_Agent,
-    user_story_agent,
-    pdd_agent,
-    sdd_agent,
-    component_mapper_agent,
-    risk_analysis_agent,
-    flowchart_agent,
-    document_reviewer_agent,
-    document_updater_agent,
-    final_writer_agent,
-    word_doc_summary_agent,
-    evaluation_agent,
-    word_doc_full_agent
-)
-
-from tasks import (
-    requirement_analyst_task,
-    requirement_analyst_review_task,
-    requirement_update_task,
-    user_story_task,
-    user_story_review_task,
-    user_story_update_task,
-    pdd_task,
-    pdd_review_task,
-    pdd_update_task,
-    sdd_task,
-    sdd_review_task,
-    sdd_update_task,
-    component_map_task,
-    risk_analysis_task,
-    flowchart_task,
-    final_writer_task,
-    word_doc_summary_task,    # ✅ Uses only final_writer output
-    word_doc_full_task,
-    evaluation_task        # ✅ Uses full updated context
-)
-
-
-import re
-from docx import Document
+from agents import build_llm, build_agents, memory_roles
+from tasks import (build_tasks, CONTEXT_POLICY, REVIEW_CYCLES, PATCHABLE_UPDATES, EVALUATED_DOCUMENTS,
+                   SPECULATIVE_TASKS, SEEDED_TASKS)
+from scheduler import run_dag, execute_task, interpolate, task_key, write_output, first_shortcut, build_context
+from llm_cache import ResponseCache
+from incremental import Manifest
+from llm_slots import slots_from_env
+from ratelimit import limiter_from_env
+from checkpoint import RunCheckpoint
+from tracing import Tracer
+from compaction import Compactor
+from review import ApprovalShortcut
+from assembler import ReportAssembler, REPORTS
+from patching import PatchUpdater
+from refinement import Refiner
+from routing import ModelRouter, DEFAULT_ROUTING_PATH
+from speculation import Speculator
+from validation import StructuralReview
+from diagrams import DiagramRepair
+from agent_memory import memory_from_env
+from retrieval import Retriever, index_from_env
+from transcripts import TranscriptRecorder, TranscriptReplayer, MISS_POLICIES, DEFAULT_TRANSCRIPT_NAME
+from docx_export import markdown_to_docx
+from export import export_outputs
+import streaming
 
 load_dotenv()
 
-print("📘 Welcome to the Agentic AI Requirement Understanding System!")
+DEFAULT_TOPIC = (
+    "Design an AI-powered Document Verification System for a financial institution that automates "
+    "the verification of KYC documents (such as Aadhar, PAN, Passport, Driving License) using OCR and computer"
+    " vision techniques. The system should extract information from uploaded documents, validate them against "
+    "the user’s entered data, detect potential forgeries, and provide a confidence score. It should integrate "
+    "with the bank’s onboarding workflow and support a secure API for external integration."
+)
+
 
 # === Step 1: Clean output directory ===
-output_folder = "outputs"
-os.makedirs(output_folder, exist_ok=True)
-for file in os.listdir(output_folder):
-    file_path = os.path.join(output_folder, file)
-    if os.path.isfile(file_path):
-        os.remove(file_path)
+
+def clean_output_dir(output_folder):
+    os.makedirs(output_folder, exist_ok=True)
+    for file in os.listdir(output_folder):
+        file_path = os.path.join(output_folder, file)
+        if os.path.isfile(file_path):
+            os.remove(file_path)
 
 
 # # === Step 2: Define helper functions for DOCX and PDF ===
 
 def generate_word_doc(input_path, output_path, title):
-    with open(input_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-
-    doc = Document()
-    doc.add_heading(title, 0)
-
-    for line in lines:
-        stripped = line.strip()
-
-        if not stripped:
-            continue
-
-        if stripped.startswith("# "):
-            doc.add_heading(stripped[2:].strip(), level=1)
-        elif stripped.startswith("## "):
-            doc.add_heading(stripped[3:].strip(), level=2)
-        elif stripped.startswith("* ") or stripped.startswith("- "):
-            doc.add_paragraph(stripped[2:], style='List Bullet')
-        elif stripped.startswith("**") and stripped.endswith("**:"):
-            doc.add_heading(stripped.strip("*:"), level=3)
-        else:
-            doc.add_paragraph(stripped)
-
-    doc.save(output_path)
+    # Streaming markdown -> DOCX: headings 1-6, nested and numbered lists, tables and code blocks
+    markdown_to_docx(input_path, output_path, title)
     print(f"✅ DOCX generated: {output_path}")
 
 
-
-
 # === Step 3: Initialize Crew ===
 
-crew = Crew(
-    agents=[
-        requirement_analyst_Agent,
-        user_story_agent,
-        pdd_agent,
-        component_mapper_agent,
-        sdd_agent,
-        risk_analysis_agent,
-        flowchart_agent,
-        document_reviewer_agent,
-        document_updater_agent,
-        final_writer_agent,
-        evaluation_agent,
-        word_doc_summary_agent,
-        
-        word_doc_full_agent
-    ],
-
-    tasks=[
-        requirement_analyst_task,
-        requirement_analyst_review_task,
-        requirement_update_task,
-        user_story_task,
-        user_story_review_task,
-        user_story_update_task,
-        pdd_task,
-        pdd_review_task,
-        pdd_update_task,
-        component_map_task,
-        sdd_task,
-        sdd_review_task,
-        sdd_update_task,
-        risk_analysis_task,
-        flowchart_task,
-        final_writer_task,
-        evaluation_task,     # ✅ Uses full updated context
-        word_doc_summary_task,    # ✅ Uses only final_writer output
-        word_doc_full_task        # ✅ Uses full updated context
-    ],
-    process=Process.sequential,
-    verbose=True
-)
-
-
-# === Step 4: Run Crew and Generate Output Files ===
-
-print("\n🚀 [STEP 1] Executing all tasks...")
-
-try:
-    result = crew.kickoff(inputs={
-        'topic': "Design an AI-powered Document Verification System for a financial institution that automates "
-        "the verification of KYC documents (such as Aadhar, PAN, Passport, Driving License) using OCR and computer"
-        " vision techniques. The system should extract information from uploaded documents, validate them against "
-        "the user’s entered data, detect potential forgeries, and provide a confidence score. It should integrate "
-        "with the bank’s onboarding workflow and support a secure API for external integration."
-
-    })
-
-    print("\n✅ [STEP 2] All tasks completed.")
-
-
-
-
-
-
-
-    # === Step 6: Generate documents from .txt ===
-
-    generate_word_doc("outputs/docs_full.txt", "outputs/09a_final_full.docx", " Full Technical Report")
-    generate_word_doc("outputs/docs_summary.txt", "outputs/09b_summary.docx", " Summarized Report")
-
-
-    print("\n🎉 All documents successfully created!")
-
-except Exception as e:
-    print(f"❌ Error during execution: {e}")
-    exit(1)
-
-
-
+def build_crew(agents, tasks):
+    from crewai import Crew, Process
 
+    return Crew(
+        agents=list(agents.values()),
+        tasks=list(tasks.values()),
+        process=Process.sequential,
+        verbose=True
+    )
 
 
+# === Step 4: Run Crew and Generate Output Files ===
 
+def run_pipeline(topic, output_dir="outputs", llm=None, agent_config=None, workers=4,
+                 cache=None, limiter=None, refresh=(), incremental=False, on_task_done=None, on_token=None,
+                 checkpoint=None, tracer=None, compact_context=False, skip_approved_updates=True,
+                 llm_writer=False, patch_updates=False, memory=None, recorder=None, replayer=None, refiner=None,
+                 router=None, speculate=None, validate=None, repair_diagrams=True,
+                 retriever=None):
+    """Build a fresh crew for `topic` and run it into `output_dir`.
+
+    llm, cache and limiter can be shared between calls (e.g. by a long-lived server).
+    on_token(task_key, token) receives streamed chunks while a task is still running.
+    checkpoint: a RunCheckpoint to save into (and resume from); a new one is created if omitted.
+    tracer: a tracing.Tracer; run_report.json / run_report.txt are written to output_dir either way.
+    compact_context: pass digests instead of full upstream documents where tasks.CONTEXT_POLICY allows it.
+    skip_approved_updates: promote a draft as its updated version when its review says VERDICT: APPROVED.
+    llm_writer: let the LLM write 08_final_combined_output and docs_full instead of assembling them locally.
+    patch_updates: have tasks.PATCHABLE_UPDATES return section patches that are merged into the draft.
+    memory: an agent_memory.LocalMemory for the agents flagged with `memory` in agents.AGENT_SPECS.
+    recorder / replayer: transcripts.TranscriptRecorder / TranscriptReplayer to save or reuse LLM responses.
+    refiner: a refinement.Refiner that re-runs the review cycle of documents the evaluation scored too low.
+    router: a routing.ModelRouter that picks model, temperature and limits per agent / task (llm is then unused).
+    speculate: similarity threshold (0..1) to start tasks.SPECULATIVE_TASKS on drafts under review; None = off.
+    validate: "hints" to give reviewers the local structural checks of their draft, "strict" to also write the
+    review locally when a draft fails one (see validation.py); None = off.
+    repair_diagrams: ask the flowchart task once more, with the parser error, when its Mermaid does not parse.
+    retriever: a retrieval.Retriever; finished tasks are added to its index, and tasks.SEEDED_TASKS are seeded
+    with (or answered by) their output for similar earlier topics.
+    Returns {task key: raw output}.
+    """
+    if checkpoint is None:
+        checkpoint = RunCheckpoint.create(topic, output_dir)
+    restored = checkpoint.completed()
+
+    if not incremental and not restored:
+        clean_output_dir(output_dir)
+
+    if router is not None:
+        agents = router.build_agents(agent_config)
+    else:
+        agents = build_agents(llm or build_llm(), agent_config)
+    tasks = build_tasks(agents, output_dir, llm_writer=llm_writer)
+    if router is not None:
+        router.assign(tasks.values(), agents)
+        print(f"🔀 Model routing: {router.summary()}")
+    crew = build_crew(agents, tasks)
+
+    # Innermost, so cache hits never create a .partial file; a resumed run continues from the ones left behind
+    execute = streaming.wrap(execute_task, on_token=on_token, resume_partials=bool(incremental or restored))
+
+    slots = slots_from_env()
+    if slots:
+        # Wrapped inside the cache so cache hits never wait for a slot
+        execute = slots.wrap(execute)
+
+    if limiter is not None:
+        # Outside the slots so a task backing off after a 429 does not hold a global slot
+        execute = limiter.wrap(execute)
+
+    if memory is not None:
+        # Inside the cache so cache keys never depend on what memory happened to recall
+        memory.enabled_roles = memory_roles(agent_config)
+        execute = memory.wrap(execute, topic)
+
+    if retriever is not None:
+        # Inside the cache like memory: a cached answer needs no seeds, and a reused one is cached like any other
+        execute = retriever.wrap(execute, topic)
+
+    if cache is not None:
+        # Same prompt + same upstream documents = same answer, only changed tasks pay for an LLM call
+        execute = cache.wrap(execute, refresh=refresh)
+
+    if replayer is not None:
+        # Replayed answers never reach the cache, the rate limiter or the LLM
+        execute = replayer.wrap(execute)
+
+    if recorder is not None:
+        # Every response of the run, whether it came from the LLM, the cache or a replay
+        execute = recorder.wrap(execute)
+
+    patcher = PatchUpdater(REVIEW_CYCLES, PATCHABLE_UPDATES) if patch_updates else None
+    if patcher:
+        # Outside the cache, so the patch answer and a full-rewrite fallback are cached separately
+        execute = patcher.wrap(execute)
+
+    repair = DiagramRepair() if repair_diagrams else None
+    if repair:
+        # Outside the cache too: the broken answer and its correction are cached as two separate calls
+        execute = repair.wrap(execute)
+
+    # Outermost, so cache hits and rate-limit waits show up in the run report too
+    tracer = tracer or Tracer(limiter, memory)
+    execute = tracer.wrap(execute)
+
+    if router is not None:
+        # Around the tracer, so a fallback attempt is traced (and cached) under the model that answered
+        execute = router.wrap(execute)
+
+    interpolate(crew.tasks, {'topic': topic})
+    if patcher:
+        patcher.prepare(crew.tasks)
+
+    # The manifest is always written, so the next incremental run knows what each artifact was built from
+    manifest = Manifest(output_dir)
+    completed = {}
+    if incremental:
+        completed, dirty = manifest.plan(crew.tasks)
+        print(f"🔁 Incremental run: rebuilding {len(dirty)} of {len(crew.tasks)} tasks")
+
+    if restored:
+        by_key = {task_key(task): task for task in crew.tasks}
+        restored = {key: text for key, text in restored.items() if key in by_key}
+        for key, text in restored.items():
+            write_output(by_key[key], text)
+        completed.update(restored)
+        print(f"♻️  Resuming run {checkpoint.run_id}: {len(restored)} of {len(crew.tasks)} tasks already done")
+
+    record = manifest.recorder(crew.tasks, completed)
+
+    validator = StructuralReview(REVIEW_CYCLES, mode=validate) if validate else None
+
+    def task_done(key, text):
+        checkpoint.save_task(key, text)
+        record(key, text)
+        if validator:
+            validator.record(key, text)
+        if memory is not None:
+            memory.settle(key, text)
+        if retriever is not None:
+            retriever.record(topic, key, text)
+        if on_task_done:
+            on_task_done(key, text)
+
+    dag_options = {}
+    if compact_context:
+        dag_options["context_builder"] = Compactor(CONTEXT_POLICY).build_context
+    shortcuts = []
+    if validator:
+        dag_options["context_builder"] = validator.context_builder(dag_options.get("context_builder", build_context))
+        shortcuts.append(validator.shortcut)
+    if skip_approved_updates:
+        shortcuts.append(ApprovalShortcut(REVIEW_CYCLES))
+    if not llm_writer:
+        shortcuts.append(ReportAssembler(topic))
+    if shortcuts:
+        dag_options["shortcut"] = first_shortcut(*shortcuts)
+    speculator = Speculator(REVIEW_CYCLES, SPECULATIVE_TASKS, threshold=speculate) if speculate is not None else None
+    if speculator:
+        dag_options["speculation"] = speculator
+
+    try:
+        # Tasks only wait for their own context=[...] tasks, independent branches run side by side
+        outputs = run_dag(crew.tasks, max_workers=workers, execute=execute, on_task_done=task_done,
+                          completed=completed, **dag_options)
+        if refiner is not None:
+            # Locally assembled reports contain the updated documents, so they are rebuilt with them
+            refiner.rebuilt_keys = set() if llm_writer else set(REPORTS)
+            refiner.refine(crew.tasks, outputs, execute, tracer=tracer, patcher=patcher, max_workers=workers,
+                           on_task_done=task_done, **dag_options)
+            checkpoint.save_meta(refinement=refiner.summary())
+    except BaseException:
+        checkpoint.set_status("failed")
+        raise
+    finally:
+        if router is not None:
+            checkpoint.save_meta(routing=router.decisions)
+        if speculator:
+            print(f"🔮 Speculation: {speculator.summary()}")
+            checkpoint.save_meta(speculation=speculator.results)
+        if retriever is not None and retriever.stats:
+            print(f"📚 Retrieval: {retriever.summary()}")
+            checkpoint.save_meta(retrieval=retriever.stats)
+        if repair and repair.repairs:
+            checkpoint.save_meta(diagram_repairs=repair.repairs)
+        if validator:
+            print(f"🧪 Structural checks: {validator.summary()}")
+            checkpoint.save_meta(validation=validator.results)
+        print("\n📊 Run report\n" + tracer.write_report(output_dir))
+    checkpoint.set_status("done")
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate SDLC documents with CrewAI agents")
+    parser.add_argument("--topic", default=DEFAULT_TOPIC, help="Problem statement to generate the SDLC documents for")
+    parser.add_argument("--output-dir", default=os.getenv("SDLC_OUTPUT_DIR", "outputs"))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("SDLC_MAX_WORKERS", "4")),
+                        help="Max tasks running at once (1 = one task after another)")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the LLM, ignore cached responses")
+    parser.add_argument("--refresh", action="append", default=[], metavar="TASK",
+                        help="Re-run TASK (output file stem, e.g. 07_flowchart) even if cached; can be repeated")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Keep outputs/ and only re-run tasks whose prompt or upstream documents changed")
+    parser.add_argument("--resume", metavar="RUN_ID",
+                        help="Continue a crashed or interrupted run; finished tasks are reloaded from its checkpoint")
+    parser.add_argument("--compact-context", action="store_true",
+                        help="Send digests of large upstream documents to tasks that do not need the full text")
+    parser.add_argument("--llm-writer", action="store_true",
+                        help="Have the LLM write the combined document and full report instead of assembling them locally")
+    parser.add_argument("--patch-updates", action="store_true",
+                        help="Updaters return only the changed sections, merged locally (full rewrite if that fails)")
+    parser.add_argument("--always-update", action="store_true",
+                        help="Run every *_update task even when its review approved the draft")
+    parser.add_argument("--formats", default="docx,pdf,html",
+                        help="Comma-separated export formats for every artifact (docx, pdf, html)")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Disable the local agent memory (also SDLC_MEMORY=off)")
+    parser.add_argument("--record", nargs="?", const="", metavar="PATH",
+                        help=f"Save every LLM response to a gzip transcript (default <output-dir>/{DEFAULT_TRANSCRIPT_NAME})")
+    parser.add_argument("--replay", metavar="PATH", help="Answer tasks from a recorded transcript instead of the LLM")
+    parser.add_argument("--replay-miss", choices=MISS_POLICIES, default="fail",
+                        help="What to do when a request is not in the transcript")
+    parser.add_argument("--refine", action="store_true",
+                        help="Re-run the review cycle of documents the evaluation scores below --refine-threshold")
+    parser.add_argument("--refine-threshold", type=float, default=7.5, help="Overall score (out of 10) to reach")
+    parser.add_argument("--refine-max-iterations", type=int, default=2, help="Refinement rounds at most")
+    parser.add_argument("--refine-max-tokens", type=int, help="Stop refining once the run used this many tokens")
+    parser.add_argument("--refine-max-seconds", type=float, help="Stop refining after this much wall time")
+    parser.add_argument("--routing", nargs="?", const=DEFAULT_ROUTING_PATH, default=os.getenv("SDLC_ROUTING"),
+                        metavar="PATH", help=f"Per-agent / per-task model tiers from a JSON file (default {DEFAULT_ROUTING_PATH})")
+    parser.add_argument("--speculate", nargs="?", type=float, const=0.9, metavar="SIMILARITY",
+                        help="Start downstream tasks on drafts while their review runs; keep the result when the "
+                             "updated document is at least this similar (default 0.9)")
+    parser.add_argument("--validate", nargs="?", const="hints", choices=StructuralReview.MODES,
+                        help="Run local structural checks on the PDD, SDD and flowchart and give them to the reviewers; "
+                             "'strict' also skips the LLM review of drafts that fail a check")
+    parser.add_argument("--seed", nargs="?", type=int, const=2, default=0, metavar="TOP_K",
+                        help="Give the component map, risk analysis and flowchart tasks their output for the TOP_K "
+                             "most similar earlier topics (default 2); every run is indexed either way unless SDLC_INDEX=off")
+    parser.add_argument("--reuse-above", type=float, metavar="SIMILARITY",
+                        help="Reuse those outputs as-is, without an LLM call, when an earlier topic is at least this similar (0..1)")
+    parser.add_argument("--no-diagram-repair", action="store_true",
+                        help="Keep the flowchart as written even when its Mermaid does not parse")
+    parser.add_argument("--echo-tokens", action="store_true",
+                        help="Print LLM output to the console as it streams in")
+    args = parser.parse_args()
+
+    print("📘 Welcome to the Agentic AI Requirement Understanding System!")
+
+    if args.resume:
+        try:
+            checkpoint = RunCheckpoint.load(args.resume)
+            topic, output_folder = checkpoint.meta["topic"], checkpoint.meta["output_dir"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"❌ Cannot resume run '{args.resume}': {e}")
+            exit(1)
+        # Topic and output folder come from the original run; its other options are the defaults again,
+        # so flags given now still win
+        parser.set_defaults(**{name: value for name, value in checkpoint.meta.get("options", {}).items()
+                               if name != "resume"})
+        args = parser.parse_args()
+    else:
+        topic, output_folder = args.topic, args.output_dir
+        checkpoint = RunCheckpoint.create(topic, output_folder)
+    checkpoint.save_meta(options={name: value for name, value in vars(args).items()
+                                  if name not in ("resume", "topic", "output_dir")})
+    print(f"💾 Run id: {checkpoint.run_id}")
+
+    print("\n🚀 [STEP 1] Executing all tasks...")
+
+    replayer = TranscriptReplayer(args.replay, on_miss=args.replay_miss) if args.replay else None
+    recorder = None
+    if args.record is not None:
+        recorder = TranscriptRecorder(args.record or os.path.join(output_folder, DEFAULT_TRANSCRIPT_NAME))
+
+    index = index_from_env()
+    retriever = Retriever(index, SEEDED_TASKS, top_k=args.seed, reuse_above=args.reuse_above) if index else None
+
+    try:
+        run_pipeline(
+            topic,
+            output_dir=output_folder,
+            workers=args.workers,
+            cache=None if args.no_cache else ResponseCache(),
+            limiter=limiter_from_env(),
+            refresh=args.refresh,
+            incremental=args.incremental,
+            on_token=streaming.console_echo if args.echo_tokens else None,
+            checkpoint=checkpoint,
+            compact_context=args.compact_context,
+            skip_approved_updates=not args.always_update,
+            llm_writer=args.llm_writer,
+            patch_updates=args.patch_updates,
+            memory=None if args.no_memory else memory_from_env(),
+            recorder=recorder,
+            replayer=replayer,
+            refiner=Refiner(REVIEW_CYCLES, EVALUATED_DOCUMENTS, threshold=args.refine_threshold,
+                            max_iterations=args.refine_max_iterations, max_tokens=args.refine_max_tokens,
+                            max_seconds=args.refine_max_seconds) if args.refine else None,
+            router=ModelRouter.from_file(args.routing) if args.routing else None,
+            speculate=args.speculate,
+            validate=args.validate,
+            repair_diagrams=not args.no_diagram_repair,
+            retriever=retriever,
+        )
+
+        print("\n✅ [STEP 2] All tasks completed.")
+
+        # === Step 6: Generate documents from .txt ===
+
+        # Every artifact is parsed once and rendered to each format in parallel; docs_full and docs_summary
+        # also keep their 09a_final_full / 09b_summary names
+        export_outputs(output_folder, formats=[fmt.strip() for fmt in args.formats.split(",") if fmt.strip()])
+
+        print("\n🎉 All documents successfully created!")
+
+    except Exception as e:
+        print(f"❌ Error during execution: {e}")
+        print(f"💾 Finished tasks are saved, continue with: python crew.py --resume {checkpoint.run_id}")
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,593 @@
+import os
+import math
+import hashlib
+import textwrap
+import threading
+
+from scheduler import task_key, CONTEXT_DIVIDER
+from mermaid import parse_flowchart, extract_mermaid, MermaidError
+
+# Offline rendering of the Mermaid flowcharts (no kroki / mermaid-cli round trip). A parsed chart is laid
+# out as a layered graph: cycles are broken by reversing back edges, nodes get the layer of their longest
+# path from a source, long edges run through dummy nodes, and a few barycenter sweeps reduce crossings.
+# The layout becomes a short list of drawing ops that are written out as SVG, or painted to PNG with
+# Pillow (already installed with reportlab). Results are cached under .llm_cache/diagrams by the hash of
+# the diagram source, so each export process and each re-run renders a diagram only once.
+#
+# DiagramRepair re-prompts the flowchart task once with the parser's error when its answer is not valid
+# Mermaid, which is much cheaper than shipping a broken diagram to the reports.
+
+DIAGRAM_DIR = os.path.join(".llm_cache", "diagrams")
+RENDER_VERSION = "3"  # bump when the output or the parser changes, so cached renders and errors are not reused
+DIAGRAM_FORMATS = ("svg", "png")
+
+FONT_SIZE = 13
+CHAR_WIDTH = 7.8       # average glyph width at FONT_SIZE (a little generous, labels must not overflow)
+LINE_HEIGHT = 17
+WRAP_CHARS = 24
+NODE_PADDING = (16, 10)
+LAYER_GAP = 56
+NODE_GAP = 28
+MARGIN = 20
+SUBGRAPH_PADDING = 14
+SWEEPS = 4
+PNG_SCALE = 2
+
+NODE_FILL = "#ECECFF"
+NODE_STROKE = "#9370DB"
+SUBGRAPH_FILL = "#FFFFDE"
+SUBGRAPH_STROKE = "#AAAA33"
+EDGE_COLOR = "#333333"
+TEXT_COLOR = "#222222"
+
+
+# === Layout ===
+
+def _wrap(label):
+    return textwrap.wrap(label, WRAP_CHARS, break_long_words=True) or [""]
+
+
+def _node_size(node):
+    lines = _wrap(node["label"])
+    width = max(len(line) for line in lines) * CHAR_WIDTH + 2 * NODE_PADDING[0]
+    height = len(lines) * LINE_HEIGHT + 2 * NODE_PADDING[1]
+    shape = node["shape"]
+    if shape == "diamond":
+        width, height = width * 1.4, height * 1.5
+    elif shape == "circle":
+        width = height = max(width, height)
+    elif shape in ("hexagon", "parallelogram", "flag"):
+        width += 20
+    return max(width, 60), height, lines
+
+
+def _break_cycles(order, edges):
+    # DFS in declaration order; an edge into a node still on the stack closes a cycle and is reversed
+    successors = {node: [] for node in order}
+    for source, target in edges:
+        successors[source].append(target)
+    state, back = {}, set()
+    for root in order:
+        if root in state:
+            continue
+        stack = [(root, iter(successors[root]))]
+        state[root] = "open"
+        while stack:
+            node, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                state[node] = "done"
+                stack.pop()
+            elif state.get(child) == "open":
+                back.add((node, child))
+            elif child not in state:
+                state[child] = "open"
+                stack.append((child, iter(successors[child])))
+    return [(target, source) if (source, target) in back else (source, target) for source, target in edges]
+
+
+def _assign_layers(order, edges):
+    incoming = {node: 0 for node in order}
+    successors = {node: [] for node in order}
+    for source, target in edges:
+        incoming[target] += 1
+        successors[source].append(target)
+    layer = {node: 0 for node in order}
+    ready = [node for node in order if incoming[node] == 0]
+    while ready:
+        node = ready.pop(0)
+        for child in successors[node]:
+            layer[child] = max(layer[child], layer[node] + 1)
+            incoming[child] -= 1
+            if incoming[child] == 0:
+                ready.append(child)
+    return layer
+
+
+def _subgraph_anchors(chart):
+    # An edge to or from a subgraph is laid out against its first member node (or the first member of a
+    # nested subgraph), then drawn to the subgraph's box
+    members = {}
+    for node_id, node in chart["nodes"].items():
+        if node["subgraph"]:
+            members.setdefault(node["subgraph"], node_id)
+    anchors = {}
+    for sub in chart["subgraphs"]:
+        group = sub["id"]
+        pending = [group]
+        while pending and group not in anchors:
+            current = pending.pop(0)
+            if current in members:
+                anchors[group] = members[current]
+            pending += [child["id"] for child in chart["subgraphs"] if child["parent"] == current]
+    return anchors
+
+
+def layout(chart):
+    """{"width", "height", "nodes": {id: (cx, cy, w, h, lines)}, "edges": [(edge, points)], "subgraphs": [...]}."""
+    order = list(chart["nodes"])
+    anchors = _subgraph_anchors(chart)
+    endpoint = lambda node: anchors.get(node, node)
+    # Edges to an empty subgraph have nothing to attach to
+    chart_edges = [edge for edge in chart["edges"] if endpoint(edge["source"]) in chart["nodes"]
+                   and endpoint(edge["target"]) in chart["nodes"]]
+    raw_edges = [(endpoint(edge["source"]), endpoint(edge["target"])) for edge in chart_edges]
+    dag = _break_cycles(order, [edge for edge in raw_edges if edge[0] != edge[1]])
+    layer = _assign_layers(order, dag)
+
+    # Long edges get one dummy node per layer they cross, so they bend around the nodes in between
+    layers = {}
+    subgraph_rank = {sub["id"]: index for index, sub in enumerate(chart["subgraphs"])}
+    for node in sorted(order, key=lambda n: (subgraph_rank.get(chart["nodes"][n]["subgraph"], -1), order.index(n))):
+        layers.setdefault(layer[node], []).append(node)
+    chains = {}
+    links = []  # (upper, lower) pairs between adjacent layers
+    for index, (source, target) in enumerate(dag):
+        chain = [source]
+        for depth in range(layer[source] + 1, layer[target]):
+            dummy = f"__dummy_{index}_{depth}"
+            layer[dummy] = depth
+            layers.setdefault(depth, []).append(dummy)
+            chain.append(dummy)
+        chain.append(target)
+        chains[(source, target)] = chains.get((source, target)) or chain
+        links += list(zip(chain, chain[1:]))
+
+    # Barycenter ordering, alternating downward and upward sweeps
+    depth_count = max(layers) + 1 if layers else 0
+    dummy_group = {}
+    for chain in chains.values():
+        for dummy in chain[1:-1]:
+            dummy_group[dummy] = chart["nodes"][chain[0]]["subgraph"]
+    group_rank = lambda node: subgraph_rank.get(
+        chart["nodes"][node]["subgraph"] if node in chart["nodes"] else dummy_group.get(node), -1)
+    ups, downs = {}, {}
+    for upper, lower in links:
+        ups.setdefault(lower, []).append(upper)
+        downs.setdefault(upper, []).append(lower)
+    position = {node: index for nodes in layers.values() for index, node in enumerate(nodes)}
+    for sweep in range(SWEEPS):
+        downward = sweep % 2 == 0
+        for depth in (range(1, depth_count) if downward else range(depth_count - 2, -1, -1)):
+            neighbours = ups if downward else downs
+            nodes = layers.get(depth, [])
+            center = {node: (sum(position[n] for n in neighbours[node]) / len(neighbours[node])
+                             if neighbours.get(node) else position[node]) for node in nodes}
+            # Members of a subgraph stay side by side, so its box does not swallow other nodes
+            nodes.sort(key=lambda node: (group_rank(node), center[node]))
+            for index, node in enumerate(nodes):
+                position[node] = index
+
+    # Coordinates in a top-to-bottom frame ("main" runs along the layers), turned for LR / RL / BT at the end
+    horizontal = chart["direction"] in ("LR", "RL")
+    sizes = {}
+    for node in order:
+        width, height, lines = _node_size(chart["nodes"][node])
+        sizes[node] = (width, height, lines)
+    main_size = lambda node: (sizes[node][0] if horizontal else sizes[node][1]) if node in sizes else 0
+    cross_size = lambda node: (sizes[node][1] if horizontal else sizes[node][0]) if node in sizes else 12
+
+    layer_extent = [max([main_size(node) for node in layers.get(depth, [])] or [0]) for depth in range(depth_count)]
+    # Edge labels sit between the layers, so the gap grows to fit the widest (LR) or tallest (TB) one
+    labels = [_wrap(edge["label"]) for edge in chart_edges if edge["label"]]
+    label_extent = max([(max(len(line) for line in lines) * CHAR_WIDTH if horizontal else len(lines) * LINE_HEIGHT)
+                        for lines in labels] or [0])
+    layer_gap = max(LAYER_GAP, label_extent + 24)
+    main_pos, offset = {}, MARGIN
+    for depth in range(depth_count):
+        for node in layers.get(depth, []):
+            main_pos[node] = offset + layer_extent[depth] / 2
+        offset += layer_extent[depth] + layer_gap
+    total_main = offset - layer_gap + MARGIN
+
+    widths = [sum(cross_size(node) for node in layers.get(depth, [])) + NODE_GAP * (len(layers.get(depth, [])) - 1)
+              for depth in range(depth_count)]
+    total_cross = max(widths or [0]) + 2 * MARGIN
+    cross_pos = {}
+    for depth in range(depth_count):
+        cursor = (total_cross - widths[depth]) / 2
+        for node in layers.get(depth, []):
+            cross_pos[node] = cursor + cross_size(node) / 2
+            cursor += cross_size(node) + NODE_GAP
+
+    def point(node):
+        main = main_pos[node]
+        if chart["direction"] in ("BT", "RL"):
+            main = total_main - main
+        return (main, cross_pos[node]) if horizontal else (cross_pos[node], main)
+
+    placed = {node: (*point(node), *sizes[node]) for node in order}
+    edges = []
+    for edge in chart_edges:
+        source, target = endpoint(edge["source"]), endpoint(edge["target"])
+        if source == target:
+            edges.append((edge, None))
+            continue
+        chain = chains.get((source, target))
+        if chain is None:  # drawn against a reversed (cycle-breaking) edge
+            chain = list(reversed(chains[(target, source)]))
+        edges.append((edge, [point(node) for node in chain]))
+
+    width, height = (total_main, total_cross) if horizontal else (total_cross, total_main)
+    result = {"width": width, "height": height, "nodes": placed, "edges": edges, "subgraphs": []}
+    result["subgraphs"] = _subgraph_boxes(chart, placed)
+    for box in result["subgraphs"]:
+        result["width"] = max(result["width"], box["x"] + box["w"] + MARGIN / 2)
+        result["height"] = max(result["height"], box["y"] + box["h"] + MARGIN / 2)
+    return result
+
+
+def _subgraph_boxes(chart, placed):
+    # Innermost subgraphs first, so every box wraps its own nodes and the boxes of its children
+    parents = {sub["id"]: sub["parent"] for sub in chart["subgraphs"]}
+    depth = {}
+    for sub_id in parents:
+        level, group = 0, parents[sub_id]
+        while group:
+            level, group = level + 1, parents.get(group)
+        depth[sub_id] = level
+    bounds = {sub_id: [] for sub_id in parents}
+    for node_id, (x, y, w, h, _) in placed.items():
+        group = chart["nodes"][node_id]["subgraph"]
+        if group:
+            bounds[group].append((x - w / 2, y - h / 2, x + w / 2, y + h / 2))
+    boxes = []
+    for sub in sorted(chart["subgraphs"], key=lambda sub: -depth[sub["id"]]):
+        members = bounds[sub["id"]]
+        if not members:
+            continue
+        left = min(box[0] for box in members) - SUBGRAPH_PADDING
+        top = min(box[1] for box in members) - SUBGRAPH_PADDING - LINE_HEIGHT
+        right = max(box[2] for box in members) + SUBGRAPH_PADDING
+        bottom = max(box[3] for box in members) + SUBGRAPH_PADDING
+        left, top = max(left, 2), max(top, 2)
+        if sub["parent"]:
+            bounds[sub["parent"]].append((left, top, right, bottom))
+        boxes.append({"id": sub["id"], "title": sub["title"], "x": left, "y": top, "w": right - left, "h": bottom - top,
+                      "depth": depth[sub["id"]]})
+    return sorted(boxes, key=lambda box: box["depth"])
+
+
+# === Drawing ops ===
+
+def _clip(center, size, toward):
+    # Where the line from the node center toward `toward` leaves the node's box
+    (cx, cy), (w, h) = center, size
+    dx, dy = toward[0] - cx, toward[1] - cy
+    if dx == 0 and dy == 0:
+        return center
+    scale = min((w / 2) / abs(dx) if dx else math.inf, (h / 2) / abs(dy) if dy else math.inf)
+    return cx + dx * scale, cy + dy * scale
+
+
+def _shape_ops(node, x, y, w, h):
+    style = {"fill": NODE_FILL, "stroke": NODE_STROKE}
+    left, top, right, bottom = x - w / 2, y - h / 2, x + w / 2, y + h / 2
+    shape = node["shape"]
+    if shape == "diamond":
+        return [{"op": "polygon", "points": [(x, top), (right, y), (x, bottom), (left, y)], **style}]
+    if shape == "hexagon":
+        inset = min(16, w / 4)
+        return [{"op": "polygon", "points": [(left + inset, top), (right - inset, top), (right, y),
+                                             (right - inset, bottom), (left + inset, bottom), (left, y)], **style}]
+    if shape == "parallelogram":
+        return [{"op": "polygon", "points": [(left + 12, top), (right, top), (right - 12, bottom), (left, bottom)], **style}]
+    if shape == "flag":
+        return [{"op": "polygon", "points": [(left, top), (right, top), (right, bottom), (left, bottom), (left + 12, y)], **style}]
+    if shape == "circle":
+        return [{"op": "ellipse", "cx": x, "cy": y, "rx": w / 2, "ry": h / 2, **style}]
+    if shape == "cylinder":
+        return [{"op": "rect", "x": left, "y": top + 5, "w": w, "h": h - 10, "rx": 0, **style},
+                {"op": "ellipse", "cx": x, "cy": bottom - 5, "rx": w / 2, "ry": 5, **style},
+                {"op": "ellipse", "cx": x, "cy": top + 5, "rx": w / 2, "ry": 5, **style}]
+    radius = {"round": 8, "stadium": h / 2}.get(shape, 0)
+    ops = [{"op": "rect", "x": left, "y": top, "w": w, "h": h, "rx": radius, **style}]
+    if shape == "subroutine":
+        ops += [{"op": "line", "points": [(left + 6, top), (left + 6, bottom)], "stroke": NODE_STROKE, "width": 1},
+                {"op": "line", "points": [(right - 6, top), (right - 6, bottom)], "stroke": NODE_STROKE, "width": 1}]
+    return ops
+
+
+def draw_ops(chart, placed):
+    ops = [{"op": "canvas", "w": math.ceil(placed["width"]), "h": math.ceil(placed["height"])}]
+    for box in placed["subgraphs"]:
+        ops.append({"op": "rect", "x": box["x"], "y": box["y"], "w": box["w"], "h": box["h"], "rx": 0,
+                    "fill": SUBGRAPH_FILL, "stroke": SUBGRAPH_STROKE})
+        ops.append({"op": "text", "x": box["x"] + box["w"] / 2, "y": box["y"] + LINE_HEIGHT - 3,
+                    "lines": [box["title"]], "size": FONT_SIZE - 1, "bold": True})
+
+    boxes = {box["id"]: (box["x"] + box["w"] / 2, box["y"] + box["h"] / 2, box["w"], box["h"])
+             for box in placed["subgraphs"]}
+    frame = lambda end: boxes[end] if end in boxes else placed["nodes"][end][:4]
+
+    labels = []
+    for edge, points in placed["edges"]:
+        if edge["arrow"].startswith("~"):
+            continue  # invisible link: it only shapes the layout
+        source, target = frame(edge["source"]), frame(edge["target"])
+        if points is None:  # self loop: a small arc on the right of the node
+            x, y, w, h = source
+            points = [(x + w / 2, y - 6), (x + w / 2 + 18, y - 6), (x + w / 2 + 18, y + 6), (x + w / 2, y + 6)]
+        else:
+            points = list(points)
+            if edge["source"] in boxes:
+                points[0] = source[:2]
+            if edge["target"] in boxes:
+                points[-1] = target[:2]
+            points[0] = _clip(points[0], source[2:4], points[1])
+            points[-1] = _clip(points[-1], target[2:4], points[-2])
+        arrow = edge["arrow"]
+        ops.append({
+            "op": "line", "points": points, "stroke": EDGE_COLOR, "width": 3 if "=" in arrow else 1.5,
+            "dash": "." in arrow, "head": arrow[-1] if arrow[-1] in ">ox" else None,
+            "tail": arrow[-1] if arrow.startswith("<") else None,
+        })
+        if edge["label"]:
+            middle = len(points) // 2
+            (x1, y1), (x2, y2) = points[middle - 1], points[middle]
+            labels.append({"op": "text", "x": (x1 + x2) / 2, "y": (y1 + y2) / 2, "lines": _wrap(edge["label"]),
+                           "size": FONT_SIZE - 2, "background": "#FFFFFF"})
+
+    for node_id, (x, y, w, h, lines) in placed["nodes"].items():
+        ops += _shape_ops(chart["nodes"][node_id], x, y, w, h)
+        ops.append({"op": "text", "x": x, "y": y, "lines": lines, "size": FONT_SIZE})
+    return ops + labels
+
+
+def _arrow_head(tip, before, kind, size=9):
+    angle = math.atan2(tip[1] - before[1], tip[0] - before[0])
+    if kind == "o":
+        return {"op": "ellipse", "cx": tip[0] - 4 * math.cos(angle), "cy": tip[1] - 4 * math.sin(angle), "rx": 4, "ry": 4,
+                "fill": "#FFFFFF", "stroke": EDGE_COLOR}
+    if kind == "x":
+        return {"op": "cross", "x": tip[0] - 5 * math.cos(angle), "y": tip[1] - 5 * math.sin(angle), "size": 5,
+                "stroke": EDGE_COLOR}
+    left = (tip[0] - size * math.cos(angle - 0.4), tip[1] - size * math.sin(angle - 0.4))
+    right = (tip[0] - size * math.cos(angle + 0.4), tip[1] - size * math.sin(angle + 0.4))
+    return {"op": "polygon", "points": [tip, left, right], "fill": EDGE_COLOR, "stroke": EDGE_COLOR}
+
+
+def _heads(op):
+    points = op["points"]
+    heads = []
+    if op.get("head"):
+        heads.append(_arrow_head(points[-1], points[-2], op["head"]))
+    if op.get("tail"):
+        heads.append(_arrow_head(points[0], points[1], op["tail"]))
+    return heads
+
+
+def _text_box(op):
+    width = max(len(line) for line in op["lines"]) * CHAR_WIDTH * op["size"] / FONT_SIZE + 6
+    height = len(op["lines"]) * LINE_HEIGHT * op["size"] / FONT_SIZE + 2
+    return op["x"] - width / 2, op["y"] - height / 2, width, height
+
+
+# === SVG / PNG ===
+
+def _escape(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+
+def to_svg(ops):
+    canvas = ops[0]
+    out = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{canvas["w"]}" height="{canvas["h"]}" '
+           f'viewBox="0 0 {canvas["w"]} {canvas["h"]}" font-family="Helvetica, Arial, sans-serif">',
+           f'<rect width="100%" height="100%" fill="#FFFFFF"/>']
+    for op in ops[1:]:
+        kind = op["op"]
+        paint = f'fill="{op.get("fill", "none")}" stroke="{op.get("stroke", "none")}"'
+        if kind == "rect":
+            out.append(f'<rect x="{op["x"]:.1f}" y="{op["y"]:.1f}" width="{op["w"]:.1f}" height="{op["h"]:.1f}" '
+                       f'rx="{op["rx"]:.1f}" {paint}/>')
+        elif kind == "polygon":
+            points = " ".join(f"{x:.1f},{y:.1f}" for x, y in op["points"])
+            out.append(f'<polygon points="{points}" {paint}/>')
+        elif kind == "ellipse":
+            out.append(f'<ellipse cx="{op["cx"]:.1f}" cy="{op["cy"]:.1f}" rx="{op["rx"]:.1f}" ry="{op["ry"]:.1f}" {paint}/>')
+        elif kind == "cross":
+            x, y, s = op["x"], op["y"], op["size"]
+            out.append(f'<path d="M{x - s:.1f},{y - s:.1f}L{x + s:.1f},{y + s:.1f}M{x - s:.1f},{y + s:.1f}L{x + s:.1f},{y - s:.1f}" '
+                       f'stroke="{op["stroke"]}" stroke-width="1.5"/>')
+        elif kind == "line":
+            points = " ".join(f"{x:.1f},{y:.1f}" for x, y in op["points"])
+            dash = ' stroke-dasharray="5,4"' if op.get("dash") else ""
+            out.append(f'<polyline points="{points}" fill="none" stroke="{op["stroke"]}" stroke-width="{op["width"]}"{dash}/>')
+            out += [to_svg([ops[0], head]).split("\n")[2] for head in _heads(op)]
+        elif kind == "text":
+            if op.get("background"):
+                x, y, w, h = _text_box(op)
+                out.append(f'<rect x="{x:.1f}" y="{y:.1f}" width="{w:.1f}" height="{h:.1f}" fill="{op["background"]}"/>')
+            line_height = LINE_HEIGHT * op["size"] / FONT_SIZE
+            first = op["y"] - line_height * (len(op["lines"]) - 1) / 2
+            weight = ' font-weight="bold"' if op.get("bold") else ""
+            for index, line in enumerate(op["lines"]):
+                out.append(f'<text x="{op["x"]:.1f}" y="{first + index * line_height:.1f}" font-size="{op["size"]}" '
+                           f'text-anchor="middle" dominant-baseline="central" fill="{TEXT_COLOR}"{weight}>{_escape(line)}</text>')
+    out.append("</svg>")
+    return "\n".join(out)
+
+
+def _dashed(draw, points, fill, width, dash=5, gap=4):
+    for (x1, y1), (x2, y2) in zip(points, points[1:]):
+        length = math.hypot(x2 - x1, y2 - y1)
+        step = 0.0
+        while step < length:
+            end = min(step + dash, length)
+            draw.line([(x1 + (x2 - x1) * step / length, y1 + (y2 - y1) * step / length),
+                       (x1 + (x2 - x1) * end / length, y1 + (y2 - y1) * end / length)], fill=fill, width=width)
+            step += dash + gap
+
+
+def to_png(ops, output_path, scale=PNG_SCALE):
+    from PIL import Image, ImageDraw, ImageFont
+
+    canvas = ops[0]
+    image = Image.new("RGB", (int(canvas["w"] * scale), int(canvas["h"] * scale)), "#FFFFFF")
+    draw = ImageDraw.Draw(image)
+    fonts = {}
+
+    def font(size, bold=False):
+        if (size, bold) not in fonts:
+            try:
+                fonts[(size, bold)] = ImageFont.load_default(size=size * scale)
+            except TypeError:  # Pillow < 10.1 has a single bitmap font
+                fonts[(size, bold)] = ImageFont.load_default()
+        return fonts[(size, bold)]
+
+    scaled = lambda points: [(x * scale, y * scale) for x, y in points]
+    for op in ops[1:] + [head for op in ops if op["op"] == "line" for head in _heads(op)]:
+        kind = op["op"]
+        fill, outline = op.get("fill"), op.get("stroke")
+        if kind == "rect":
+            box = [op["x"] * scale, op["y"] * scale, (op["x"] + op["w"]) * scale, (op["y"] + op["h"]) * scale]
+            draw.rounded_rectangle(box, radius=op["rx"] * scale, fill=fill, outline=outline, width=scale)
+        elif kind == "polygon":
+            draw.polygon(scaled(op["points"]), fill=fill, outline=outline)
+        elif kind == "ellipse":
+            draw.ellipse([(op["cx"] - op["rx"]) * scale, (op["cy"] - op["ry"]) * scale,
+                          (op["cx"] + op["rx"]) * scale, (op["cy"] + op["ry"]) * scale], fill=fill, outline=outline, width=scale)
+        elif kind == "cross":
+            x, y, s = op["x"] * scale, op["y"] * scale, op["size"] * scale
+            draw.line([(x - s, y - s), (x + s, y + s)], fill=outline, width=scale)
+            draw.line([(x - s, y + s), (x + s, y - s)], fill=outline, width=scale)
+        elif kind == "line":
+            width = max(1, int(op["width"] * scale))
+            if op.get("dash"):
+                _dashed(draw, scaled(op["points"]), op["stroke"], width, 5 * scale, 4 * scale)
+            else:
+                draw.line(scaled(op["points"]), fill=op["stroke"], width=width, joint="curve")
+        elif kind == "text":
+            if op.get("background"):
+                x, y, w, h = _text_box(op)
+                draw.rectangle([x * scale, y * scale, (x + w) * scale, (y + h) * scale], fill=op["background"])
+            line_height = LINE_HEIGHT * op["size"] / FONT_SIZE
+            first = op["y"] - line_height * (len(op["lines"]) - 1) / 2
+            for index, line in enumerate(op["lines"]):
+                draw.text((op["x"] * scale, (first + index * line_height) * scale), line, fill=TEXT_COLOR,
+                          font=font(op["size"], op.get("bold")), anchor="mm")
+    image.save(output_path, "PNG", optimize=True)
+
+
+# === Cached rendering ===
+
+def render_mermaid(text, fmt="svg", cache_dir=DIAGRAM_DIR):
+    """Path of the rendered diagram for `text` (a Mermaid source or a markdown answer containing one).
+
+    Raises MermaidError for invalid or unsupported diagrams (cached too, so a known-bad diagram is not
+    parsed again) and ImportError when PNG is asked for without Pillow.
+    """
+    if fmt not in DIAGRAM_FORMATS:
+        raise ValueError(f"Unknown diagram format '{fmt}' (choose from {', '.join(DIAGRAM_FORMATS)})")
+    source = extract_mermaid(text)
+    digest = hashlib.sha256(f"{RENDER_VERSION}\n{source}".encode("utf-8")).hexdigest()
+    path = os.path.join(cache_dir, f"{digest}.{fmt}")
+    if os.path.exists(path):
+        return path
+    error_path = os.path.join(cache_dir, f"{digest}.error")
+    if os.path.exists(error_path):
+        with open(error_path, "r", encoding="utf-8") as f:
+            line, message = f.read().split("\n", 1)
+        raise MermaidError(int(line), message)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        chart = parse_flowchart(source)
+    except MermaidError as e:
+        # Same diagram, same error: later exports skip the parse
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(f"{e.line}\n{e.message}")
+        os.replace(tmp_path, error_path)
+        raise
+    ops = draw_ops(chart, layout(chart))
+    if fmt == "svg":
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(to_svg(ops))
+    else:
+        to_png(ops, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+_missing_modules = set()  # reported once per process
+_reported_diagrams = set()  # sources of the broken diagrams already reported by this process
+
+
+def block_diagram(block, fmt):
+    """Rendered path for a markdown_blocks ```mermaid code block; None (keep the code) when it cannot be drawn."""
+    if block.get("language") != "mermaid":
+        return None
+    source = "\n".join(block["lines"])
+    try:
+        return render_mermaid(source, fmt)
+    except MermaidError as e:
+        # Reported on every export (export workers are fresh processes), also when the error comes from the
+        # cache; only its repeats within one process are quiet
+        if source not in _reported_diagrams:
+            _reported_diagrams.add(source)
+            print(f"⚠️ Diagram left as code: {e}")
+        return None
+    except ImportError as e:
+        if e.name not in _missing_modules:
+            _missing_modules.add(e.name)
+            print(f"⚠️ Diagrams left as code: {e}")
+        return None
+
+
+def diagram_size(path):
+    """(width, height) in pixels of a rendered PNG at its nominal (unscaled) size."""
+    from PIL import Image
+
+    with Image.open(path) as image:
+        return image.width / PNG_SCALE, image.height / PNG_SCALE
+
+
+# === Repair ===
+
+class DiagramRepair:
+    """Execute wrapper: when a diagram task's answer does not parse, ask once more with the parser error."""
+
+    def __init__(self, keys=("07_flowchart",), attempts=1):
+        self.keys = set(keys)
+        self.attempts = attempts
+        self.repairs = {}  # task key -> [parser errors]
+
+    def wrap(self, execute):
+        def repairing_execute(task, context):
+            text = execute(task, context)
+            key = task_key(task)
+            if key not in self.keys:
+                return text
+            for _ in range(self.attempts):
+                try:
+                    parse_flowchart(extract_mermaid(text))
+                    return text
+                except MermaidError as e:
+                    self.repairs.setdefault(key, []).append(str(e))
+                    print(f"🛠️  {key}: diagram does not parse ({e}), asking for a corrected version")
+                    note = (f"Your previous answer was not valid Mermaid ({e}). Previous answer:\n{text}\n\n"
+                            "Return the corrected flowchart only, in a ```mermaid block.")
+                    text = execute(task, CONTEXT_DIVIDER.join(part for part in (context, note) if part))
+            return text
+
+        return repairing_execute
@@ -0,0 +1,159 @@
+import io
+import threading
+
+from markdown_blocks import parse_file, inline_runs, plain_text
+
+# Streams markdown_blocks into a python-docx Document. Styles are set up once per process in a template
+# that every conversion starts from, and paragraphs are appended straight before the body's sectPr with
+# style ids resolved once, so each block costs the same no matter how long the document already is
+# (python-docx's add_paragraph scans the body for sectPr on every call).
+
+CODE_STYLE = "Code Block"
+CODE_FONT = "Consolas"
+MAX_LIST_DEPTH = 3  # the default template has List Bullet, List Bullet 2 and List Bullet 3
+
+_template = None
+_template_lock = threading.Lock()
+
+
+def _build_template():
+    from docx import Document
+    from docx.enum.style import WD_STYLE_TYPE
+    from docx.shared import Pt
+
+    doc = Document()
+    code = doc.styles.add_style(CODE_STYLE, WD_STYLE_TYPE.PARAGRAPH)
+    code.base_style = doc.styles["Normal"]
+    code.font.name = CODE_FONT
+    code.font.size = Pt(8.5)
+    code.paragraph_format.space_before = Pt(4)
+    code.paragraph_format.space_after = Pt(4)
+    code.paragraph_format.left_indent = Pt(12)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def template_document():
+    """A fresh Document with the export styles; the template itself is only built once per process."""
+    global _template
+    from docx import Document
+
+    with _template_lock:
+        if _template is None:
+            _template = _build_template()
+    return Document(io.BytesIO(_template))
+
+
+class DocxWriter:
+    def __init__(self, doc=None):
+        from docx.oxml import OxmlElement
+        from docx.text.paragraph import Paragraph
+
+        self.doc = doc or template_document()
+        self._OxmlElement = OxmlElement
+        self._Paragraph = Paragraph
+        self._body = self.doc.element.body
+        self._sect_pr = self._body.sectPr
+        self._style_ids = {}
+
+    def _style_id(self, name):
+        if name not in self._style_ids:
+            self._style_ids[name] = self.doc.styles[name].style_id
+        return self._style_ids[name]
+
+    def paragraph(self, style=None):
+        p = self._OxmlElement("w:p")
+        if self._sect_pr is not None:
+            self._sect_pr.addprevious(p)
+        else:
+            self._body.append(p)
+        if style:
+            p.get_or_add_pPr().style = self._style_id(style)
+        return self._Paragraph(p, self.doc._body)
+
+    def add_runs(self, paragraph, text):
+        for line_number, line in enumerate(text.split("\n")):
+            if line_number:
+                paragraph.add_run().add_break()
+            for run_text, style in inline_runs(line):
+                run = paragraph.add_run(run_text)
+                if style == "bold":
+                    run.bold = True
+                elif style == "italic":
+                    run.italic = True
+                elif style == "code":
+                    run.font.name = CODE_FONT
+
+    def write(self, block):
+        kind = block["type"]
+        if kind == "heading":
+            self.paragraph(f"Heading {min(block['level'], 6)}").add_run(plain_text(block["text"]))
+        elif kind == "paragraph":
+            self.add_runs(self.paragraph(), block["text"])
+        elif kind == "list_item":
+            self.list_item(block)
+        elif kind == "table":
+            self.table(block["rows"])
+        elif kind == "code":
+            from diagrams import block_diagram
+
+            path = block_diagram(block, "png")
+            if path:
+                self.picture(path)
+            else:
+                self.code(block["lines"])
+        elif kind == "rule":
+            self.paragraph()
+
+    def list_item(self, block):
+        depth = min(block["depth"], MAX_LIST_DEPTH)
+        if block["ordered"]:
+            # Keep the agent's own numbers: Word's List Number style would continue counting across lists
+            from docx.shared import Pt
+
+            paragraph = self.paragraph()
+            paragraph.paragraph_format.left_indent = Pt(18 * depth)
+            paragraph.paragraph_format.first_line_indent = Pt(-18)
+            paragraph.add_run(f"{block['number']}.\t")
+        else:
+            paragraph = self.paragraph("List Bullet" if depth == 1 else f"List Bullet {depth}")
+        self.add_runs(paragraph, block["text"])
+
+    def table(self, rows):
+        width = max(len(row) for row in rows)
+        table = self.doc.add_table(rows=0, cols=width)
+        table.style = self.doc.styles["Table Grid"]
+        for row_number, row in enumerate(rows):
+            cells = table.add_row().cells
+            for cell, text in zip(cells, row + [""] * (width - len(row))):
+                paragraph = cell.paragraphs[0]
+                if row_number == 0:
+                    paragraph.add_run(plain_text(text)).bold = True
+                else:
+                    self.add_runs(paragraph, text.replace("<br>", "\n").replace("<br/>", "\n"))
+
+    def picture(self, path):
+        from docx.shared import Inches
+        from diagrams import diagram_size
+
+        width = diagram_size(path)[0]
+        # Fit the page width (6.5in between default margins), and never blow a small diagram up
+        self.paragraph().add_run().add_picture(path, width=Inches(min(6.5, width / 96)))
+
+    def code(self, lines):
+        paragraph = self.paragraph(CODE_STYLE)
+        for line_number, line in enumerate(lines):
+            if line_number:
+                paragraph.add_run().add_break()
+            paragraph.add_run(line)
+
+
+def markdown_to_docx(input_path, output_path, title=None):
+    writer = DocxWriter()
+    if title:
+        writer.paragraph("Title").add_run(title.strip())
+    for block in parse_file(input_path):
+        writer.write(block)
+    writer.doc.save(output_path)
+    return output_path
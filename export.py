@@ -0,0 +1,280 @@
+import os
+import json
+import html
+import time
+import shutil
+import hashlib
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from markdown_blocks import parse_file, inline_runs, plain_text
+from diagrams import block_diagram
+
+# Export stage: every artifact is parsed once into the markdown_blocks document model (cached on disk by
+# content hash), then DOCX, PDF and HTML are rendered from that model in a process pool, one job per
+# (artifact, format). The renderers only take plain dicts, so jobs pickle cheaply and never re-parse.
+
+MODEL_DIR = os.path.join(".llm_cache", "models")
+FORMATS = ("docx", "pdf", "html")
+EXPORT_SUBDIR = "exports"
+SKIP_ARTIFACTS = {"run_report.txt"}
+
+# Artifacts that also keep their historical names and titles
+NAMED_EXPORTS = {
+    "docs_full": ("09a_final_full", "Full Technical Report"),
+    "docs_summary": ("09b_summary", "Summarized Report"),
+}
+
+
+def load_model(path, cache_dir=MODEL_DIR):
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    cache_path = os.path.join(cache_dir, f"{digest}.json")
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    blocks = list(parse_file(path))
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(blocks, f, ensure_ascii=False)
+    os.replace(tmp_path, cache_path)
+    return blocks
+
+
+# === Renderers (run inside worker processes) ===
+
+def render_docx(blocks, output_path, title=None):
+    from docx_export import DocxWriter
+
+    writer = DocxWriter()
+    if title:
+        writer.paragraph("Title").add_run(title)
+    for block in blocks:
+        writer.write(block)
+    writer.doc.save(output_path)
+
+
+def _pdf_markup(text):
+    # reportlab Paragraphs take a small HTML-like markup
+    parts = []
+    for run, style in inline_runs(text):
+        run = html.escape(run, quote=False)
+        if style == "bold":
+            run = f"<b>{run}</b>"
+        elif style == "italic":
+            run = f"<i>{run}</i>"
+        elif style == "code":
+            run = f'<font face="Courier">{run}</font>'
+        parts.append(run)
+    return "".join(parts).replace("\n", "<br/>")
+
+
+def render_pdf(blocks, output_path, title=None):
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import LETTER
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Preformatted, Spacer, Table, TableStyle, Image
+    from diagrams import diagram_size
+
+    styles = getSampleStyleSheet()
+    code_style = ParagraphStyle("CodeBlock", parent=styles["Code"], fontSize=7.5, leading=9)
+    cell_style = ParagraphStyle("Cell", parent=styles["BodyText"], fontSize=8, leading=10)
+    page = SimpleDocTemplate(output_path, pagesize=LETTER, title=title or "",
+                             leftMargin=0.8 * inch, rightMargin=0.8 * inch)
+    story = [Paragraph(html.escape(title), styles["Title"])] if title else []
+
+    for block in blocks:
+        kind = block["type"]
+        if kind == "heading":
+            story.append(Paragraph(html.escape(plain_text(block["text"])), styles[f"Heading{min(block['level'], 6)}"]))
+        elif kind == "paragraph":
+            story.append(Paragraph(_pdf_markup(block["text"]), styles["BodyText"]))
+        elif kind == "list_item":
+            bullet = f"{block['number']}." if block["ordered"] else "•"
+            style = ParagraphStyle(f"List{block['depth']}", parent=styles["BodyText"],
+                                   leftIndent=18 * block["depth"], bulletIndent=18 * block["depth"] - 12)
+            story.append(Paragraph(_pdf_markup(block["text"]), style, bulletText=bullet))
+        elif kind == "table":
+            width = max(len(row) for row in block["rows"])
+            rows = [[Paragraph(_pdf_markup(cell), cell_style) for cell in row + [""] * (width - len(row))]
+                    for row in block["rows"]]
+            table = Table(rows, colWidths=[page.width / width] * width, repeatRows=1)
+            table.setStyle(TableStyle([
+                ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+                ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+            ]))
+            story += [table, Spacer(1, 6)]
+        elif kind == "code":
+            path = block_diagram(block, "png")
+            if path:
+                width, height = diagram_size(path)
+                scale = min(1.0, page.width / width, (page.height - 24) / height)
+                story += [Image(path, width=width * scale, height=height * scale), Spacer(1, 6)]
+            else:
+                story.append(Preformatted("\n".join(block["lines"]), code_style))
+        elif kind == "rule":
+            story.append(Spacer(1, 12))
+    page.build(story)
+
+
+def _html_inline(text):
+    parts = []
+    for run, style in inline_runs(text):
+        run = html.escape(run)
+        if style == "bold":
+            run = f"<strong>{run}</strong>"
+        elif style == "italic":
+            run = f"<em>{run}</em>"
+        elif style == "code":
+            run = f"<code>{run}</code>"
+        parts.append(run)
+    return "".join(parts).replace("\n", "<br>\n")
+
+
+HTML_STYLE = """body{font-family:Segoe UI,Helvetica,Arial,sans-serif;max-width:60rem;margin:2rem auto;padding:0 1rem;line-height:1.5;color:#222}
+table{border-collapse:collapse;margin:1rem 0}th,td{border:1px solid #bbb;padding:.3rem .5rem;vertical-align:top}th{background:#f3f3f3}
+pre{background:#f6f8fa;padding:.8rem;overflow-x:auto;font-size:.85rem}code{font-family:Consolas,monospace}
+figure.diagram{margin:1rem 0;overflow-x:auto}figure.diagram svg{max-width:100%;height:auto}"""
+
+
+def render_html(blocks, output_path, title=None):
+    out = ["<!DOCTYPE html>", '<html><head><meta charset="utf-8">',
+           f"<title>{html.escape(title or '')}</title>", f"<style>{HTML_STYLE}</style>", "</head><body>"]
+    if title:
+        out.append(f"<h1>{html.escape(title)}</h1>")
+    open_lists = []  # "ul" / "ol" per open nesting level
+
+    def close_lists(depth=0):
+        while len(open_lists) > depth:
+            out.append(f"</li></{open_lists.pop()}>")
+
+    for block in blocks:
+        kind = block["type"]
+        if kind == "list_item":
+            tag = "ol" if block["ordered"] else "ul"
+            close_lists(block["depth"])
+            if len(open_lists) == block["depth"] and open_lists[-1] != tag:
+                close_lists(block["depth"] - 1)
+            if len(open_lists) == block["depth"]:
+                out.append("</li>")
+            while len(open_lists) < block["depth"]:
+                start = f' start="{block["number"]}"' if tag == "ol" and block["number"] != "1" else ""
+                out.append(f"<{tag}{start}>")
+                open_lists.append(tag)
+            out.append(f"<li>{_html_inline(block['text'])}")
+            continue
+        close_lists()
+        if kind == "heading":
+            level = min(block["level"], 6)
+            out.append(f"<h{level}>{_html_inline(block['text'])}</h{level}>")
+        elif kind == "paragraph":
+            out.append(f"<p>{_html_inline(block['text'])}</p>")
+        elif kind == "table":
+            header, *rows = block["rows"]
+            out.append("<table><thead><tr>" + "".join(f"<th>{_html_inline(c)}</th>" for c in header) + "</tr></thead><tbody>")
+            out += ["<tr>" + "".join(f"<td>{_html_inline(c)}</td>" for c in row) + "</tr>" for row in rows]
+            out.append("</tbody></table>")
+        elif kind == "code":
+            path = block_diagram(block, "svg")
+            if path:
+                with open(path, "r", encoding="utf-8") as f:
+                    out.append(f'<figure class="diagram">{f.read()}</figure>')
+            else:
+                language = f' class="language-{html.escape(block["language"])}"' if block["language"] else ""
+                out.append(f"<pre><code{language}>{html.escape(chr(10).join(block['lines']))}</code></pre>")
+        elif kind == "rule":
+            out.append("<hr>")
+    close_lists()
+    out.append("</body></html>")
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(out))
+
+
+RENDERERS = {"docx": render_docx, "pdf": render_pdf, "html": render_html}
+
+
+def _render_job(fmt, blocks, output_paths, title):
+    # Rendered once to the first path, then copied to the others
+    start = time.perf_counter()
+    tmp_path = f"{output_paths[0]}.{os.getpid()}.tmp.{fmt}"
+    try:
+        RENDERERS[fmt](blocks, tmp_path, title)
+        for copy_path in output_paths[1:]:
+            shutil.copyfile(tmp_path, tmp_path + ".copy")
+            os.replace(tmp_path + ".copy", copy_path)
+        os.replace(tmp_path, output_paths[0])
+    except ImportError as e:
+        return output_paths, None, f"missing dependency ({e.name})"
+    except Exception as e:
+        return output_paths, None, f"{type(e).__name__}: {e}"
+    finally:
+        for leftover in (tmp_path, tmp_path + ".copy"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    return output_paths, time.perf_counter() - start, None
+
+
+# === Export stage ===
+
+def export_jobs(output_dir):
+    """One (artifact path, output paths without extension, title) per artifact.
+
+    NAMED_EXPORTS artifacts get a second output path (their historical name) that receives a copy of the
+    same render.
+    """
+    jobs = []
+    export_dir = os.path.join(output_dir, EXPORT_SUBDIR)
+    for name in sorted(os.listdir(output_dir)):
+        if not name.endswith(".txt") or name in SKIP_ARTIFACTS:
+            continue
+        stem = name[:-len(".txt")]
+        bases, title = [os.path.join(export_dir, stem)], None
+        if stem in NAMED_EXPORTS:
+            named, title = NAMED_EXPORTS[stem]
+            bases.append(os.path.join(output_dir, named))
+        jobs.append((os.path.join(output_dir, name), bases, title))
+    return jobs
+
+
+def export_all(jobs, formats=FORMATS, max_workers=None):
+    """Render every job in every format in parallel. Returns {output path: seconds or error message}."""
+    unknown = [fmt for fmt in formats if fmt not in RENDERERS]
+    if unknown:
+        raise ValueError(f"Unknown export format(s): {', '.join(unknown)} (choose from {', '.join(RENDERERS)})")
+    if not jobs:
+        return {}
+    models = {}
+    for path, _, _ in jobs:
+        if path not in models:
+            models[path] = load_model(path)
+    for _, bases, _ in jobs:
+        for base in bases:
+            os.makedirs(os.path.dirname(base) or ".", exist_ok=True)
+
+    renders = [(fmt, models[path], [f"{base}.{fmt}" for base in bases], title)
+               for path, bases, title in jobs for fmt in formats]
+    files = sum(len(render[2]) for render in renders)
+    max_workers = max_workers or min(len(renders), os.cpu_count() or 1)
+    results = {}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(_render_job, *render) for render in renders]
+        for future in as_completed(futures):
+            output_paths, seconds, error = future.result()
+            for output_path in output_paths:
+                results[output_path] = seconds if error is None else error
+            if error:
+                print(f"⚠️  Export failed for {', '.join(output_paths)}: {error}")
+    rendered = [value for value in results.values() if not isinstance(value, str)]
+    print(f"📦 Exported {len(rendered)} of {files} files in {time.perf_counter() - start:.1f}s "
+          f"(slowest single render {max(rendered, default=0):.1f}s, {max_workers} processes)")
+    return results
+
+
+def export_outputs(output_dir, formats=FORMATS, max_workers=None):
+    return export_all(export_jobs(output_dir), formats, max_workers)
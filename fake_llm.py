@@ -0,0 +1,167 @@
+import os
+import re
+import time
+import random
+import statistics
+import threading
+
+from ratelimit import estimate_tokens
+from streaming import current_task_key
+from markdown_utils import strip_outer_fence
+
+# Offline stand-in for the Gemini chat model, so the whole crew can run (and be timed) without an API key.
+# Answers come from the sample run in 1.outputs_mental-Health-support when one exists for the task, or are
+# stitched together from its lines to a realistic size. Time to first token is log-normal, tokens then
+# stream at a fixed rate, and a share of calls can fail with a retryable error. Everything is seeded.
+# FakeLLMBackend has no dependencies; build_fake_llm() wraps it as a langchain chat model for crewai.
+
+SAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "1.outputs_mental-Health-support")
+# Older crewai parses ReAct-style answers; this is what Gemini sends back when it answers directly
+CREWAI_FINAL_ANSWER = "Thought: I now can give a great answer\nFinal Answer: "
+CHUNK_TOKENS = 4
+
+
+class FakeLLMError(Exception):
+    def __init__(self, status_code, message):
+        super().__init__(f"{status_code} {message}")
+        self.status_code = status_code
+
+
+FAILURES = {
+    429: "Resource has been exhausted (e.g. check quota). [fake]",
+    500: "Internal error encountered. [fake]",
+    503: "The model is overloaded. Please try again later. [fake]",
+}
+
+
+class FakeLLMBackend:
+    def __init__(self, samples_dir=SAMPLES_DIR, seed=0, first_token_ms=800, latency_sigma=0.5,
+                 tokens_per_second=150, failure_rate=0.0, failure_status=429, size_scale=1.0,
+                 time_scale=1.0, answer_prefix=CREWAI_FINAL_ANSWER):
+        self.seed = seed
+        self.first_token_ms = first_token_ms
+        self.latency_sigma = latency_sigma
+        self.tokens_per_second = tokens_per_second
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.size_scale = size_scale
+        self.time_scale = time_scale  # e.g. 0.05 runs 20x faster than real time with the same shape
+        self.answer_prefix = answer_prefix
+        self.samples = {}
+        if samples_dir and os.path.isdir(samples_dir):
+            for name in sorted(os.listdir(samples_dir)):
+                if name.endswith(".txt"):
+                    with open(os.path.join(samples_dir, name), "r", encoding="utf-8") as f:
+                        self.samples[name[:-len(".txt")]] = f.read()
+        self.corpus = [line for text in self.samples.values() for line in strip_outer_fence(text).splitlines()
+                       if line.strip() and not line.lstrip().startswith("```")] or ["Lorem ipsum dolor sit amet."]
+        self.typical_chars = int(statistics.median(len(text) for text in self.samples.values())) if self.samples else 4000
+        self.stats = {}  # task key -> {"calls", "failures", "llm_seconds", "prompt_tokens", "completion_tokens"}
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _rng(self, key):
+        # One stream per (task, call number), so results do not depend on thread interleaving
+        with self._lock:
+            number = self._calls.get(key, 0)
+            self._calls[key] = number + 1
+        return random.Random(f"{self.seed}:{key}:{number}")
+
+    def _stat(self, key):
+        return self.stats.setdefault(key, {"calls": 0, "failures": 0, "llm_seconds": 0.0,
+                                           "prompt_tokens": 0, "completion_tokens": 0})
+
+    def output_for(self, key, rng):
+        if key in self.samples and self.size_scale == 1.0:
+            return self.samples[key]
+        target = int((len(self.samples[key]) if key in self.samples else self.typical_chars) * self.size_scale)
+        lines = []
+        size = 0
+        while size < target:
+            start = rng.randrange(len(self.corpus))
+            for line in self.corpus[start:start + rng.randint(3, 12)]:
+                lines.append(line)
+                size += len(line) + 1
+        return "\n".join(lines)
+
+    def stream(self, prompt, key=None):
+        """Yield the answer in small chunks at the configured pace; raises FakeLLMError for injected failures."""
+        key = key or current_task_key() or "unknown"
+        rng = self._rng(key)
+        started = time.perf_counter()
+        with self._lock:
+            stat = self._stat(key)
+            stat["calls"] += 1
+            stat["prompt_tokens"] += estimate_tokens(prompt)
+
+        first_token = rng.lognormvariate(0, self.latency_sigma) * self.first_token_ms / 1000
+        if rng.random() < self.failure_rate:
+            time.sleep(first_token * self.time_scale / 2)
+            with self._lock:
+                stat["failures"] += 1
+                stat["llm_seconds"] += time.perf_counter() - started
+            raise FakeLLMError(self.failure_status, FAILURES.get(self.failure_status, "Fake failure"))
+        time.sleep(first_token * self.time_scale)
+
+        text = self.answer_prefix + self.output_for(key, rng)
+        words = re.findall(r"\S+\s*", text)
+        step = CHUNK_TOKENS * 3  # ~3 words per 4 tokens
+        chunk_delay = CHUNK_TOKENS / self.tokens_per_second * self.time_scale if self.tokens_per_second else 0
+        for index in range(0, len(words), step):
+            if chunk_delay:
+                time.sleep(chunk_delay)
+            yield "".join(words[index:index + step])
+
+        with self._lock:
+            stat["completion_tokens"] += estimate_tokens(text)
+            stat["llm_seconds"] += time.perf_counter() - started
+
+    def complete(self, prompt, key=None):
+        return "".join(self.stream(prompt, key))
+
+
+def build_fake_llm(backend=None, streaming=True, **options):
+    """(chat model, backend): a langchain chat model backed by FakeLLMBackend, with agents.build_llm's callbacks."""
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage, AIMessageChunk
+    from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+    from agents import llm_callbacks
+
+    backend = backend or FakeLLMBackend(**options)
+
+    def prompt_of(messages):
+        return "\n\n".join(str(message.content) for message in messages)
+
+    def usage(prompt, text):
+        prompt_tokens, completion_tokens = estimate_tokens(prompt), estimate_tokens(text)
+        return {"input_tokens": prompt_tokens, "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens}
+
+    class FakeChatModel(BaseChatModel):
+        model: str = "fake-gemini"
+        temperature: float = 0.0
+        streaming: bool = True
+
+        @property
+        def _llm_type(self):
+            return "fake-gemini"
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+            prompt = prompt_of(messages)
+            text = backend.complete(prompt)
+            message = AIMessage(content=text, usage_metadata=usage(prompt, text))
+            return ChatResult(generations=[ChatGeneration(message=message)])
+
+        def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+            prompt = prompt_of(messages)
+            pieces = []
+            for piece in backend.stream(prompt):
+                pieces.append(piece)
+                chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+                if run_manager:
+                    run_manager.on_llm_new_token(piece, chunk=chunk)
+                yield chunk
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage(prompt, "".join(pieces))))
+
+    return FakeChatModel(streaming=streaming, callbacks=llm_callbacks(streaming)), backend
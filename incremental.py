@@ -0,0 +1,97 @@
+import os
+import json
+import hashlib
+import threading
+
+from scheduler import task_key, task_dependencies, build_graph, topological_order
+from llm_cache import llm_settings
+
+MANIFEST_NAME = ".manifest.json"
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def task_fingerprint(task):
+    # Everything that shapes the prompt of this task, except the upstream documents
+    agent = task.agent
+    model, temperature = llm_settings(getattr(agent, "llm", None))
+    payload = {
+        "description": task.description,
+        "expected_output": task.expected_output,
+        "role": getattr(agent, "role", None),
+        "goal": getattr(agent, "goal", None),
+        "backstory": getattr(agent, "backstory", None),
+        "model": model,
+        "temperature": temperature,
+    }
+    return text_hash(json.dumps(payload, sort_keys=True, ensure_ascii=False))
+
+
+def read_artifact(task):
+    try:
+        with open(task.output_file, "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+class Manifest:
+    """Records, per task, the prompt fingerprint and the hashes of the artifacts it was built from."""
+
+    def __init__(self, output_dir):
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+
+    def plan(self, tasks):
+        """Return (completed outputs to reuse, keys that must be rebuilt). Tasks must already be interpolated."""
+        graph = build_graph(tasks)
+        by_key = {task_key(task): task for task in tasks}
+        current = {key: read_artifact(task) for key, task in by_key.items()}
+        dirty = set()
+
+        for key in topological_order(graph):
+            deps = graph[key]
+            entry = self.entries.get(key)
+            if (
+                entry is None
+                or current[key] is None
+                or entry["fingerprint"] != task_fingerprint(by_key[key])
+                or any(dep in dirty for dep in deps)
+                or any(current[dep] is None or entry["inputs"].get(dep) != text_hash(current[dep]) for dep in deps)
+            ):
+                dirty.add(key)
+
+        completed = {key: text for key, text in current.items() if key not in dirty}
+        return completed, dirty
+
+    def record(self, task, outputs):
+        deps = [task_key(dep) for dep in task_dependencies(task)]
+        entry = {
+            "fingerprint": task_fingerprint(task),
+            "inputs": {dep: text_hash(outputs[dep]) for dep in deps},
+        }
+        with self._lock:
+            self.entries[task_key(task)] = entry
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+    def recorder(self, tasks, completed=None):
+        # on_task_done callback for run_dag that records each task as soon as it finishes
+        by_key = {task_key(task): task for task in tasks}
+        outputs = dict(completed or {})
+
+        def on_task_done(key, text):
+            outputs[key] = text
+            self.record(by_key[key], outputs)
+
+        return on_task_done
+
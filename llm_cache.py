@@ -0,0 +1,114 @@
+import os
+import time
+import json
+import sqlite3
+import hashlib
+import threading
+import contextvars
+
+from scheduler import task_key
+
+DEFAULT_CACHE_PATH = os.path.join(".llm_cache", "responses.sqlite")
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+# Set when the current task was answered from the cache (read by tracing.Tracer)
+cache_hit = contextvars.ContextVar("sdlc_cache_hit", default=False)
+
+
+def llm_settings(llm):
+    # Works for langchain chat models and crewai's own LLM wrapper
+    model = getattr(llm, "model", None) or getattr(llm, "model_name", None) or type(llm).__name__
+    return str(model), getattr(llm, "temperature", None)
+
+
+def cache_key(task, context):
+    agent = task.agent
+    model, temperature = llm_settings(getattr(agent, "llm", None))
+    payload = {
+        "model": model,
+        "temperature": temperature,
+        "role": getattr(agent, "role", None),
+        "goal": getattr(agent, "goal", None),
+        "backstory": getattr(agent, "backstory", None),
+        "description": task.description,
+        "expected_output": task.expected_output,
+        "context": hashlib.sha256((context or "").encode("utf-8")).hexdigest(),
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """On-disk cache of task responses, evicted least-recently-used once over max_bytes."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)  # shared by batch crews
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, task TEXT, response TEXT, size INTEGER,"
+            " created REAL, last_used REAL)"
+        )
+        self._db.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            return row[0]
+
+    def put(self, key, task, response):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, task, response, len(response.encode("utf-8")), now, now),
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute("SELECT key, size FROM responses ORDER BY last_used ASC").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+
+    def wrap(self, execute, refresh=()):
+        # refresh: task keys (e.g. "07_flowchart") that must skip the lookup but still store the new answer
+        refresh = set(refresh)
+
+        def cached_execute(task, context):
+            key = cache_key(task, context)
+            name = task_key(task)
+            if name not in refresh:
+                cached = self.get(key)
+                if cached is not None:
+                    print(f"♻️  Cache hit for {name}")
+                    cache_hit.set(True)
+                    return cached
+            response = execute(task, context)
+            self.put(key, name, response)
+            return response
+
+        return cached_execute
+
+    def close(self):
+        with self._lock:
+            self._db.close()
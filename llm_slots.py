@@ -0,0 +1,99 @@
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+# === Cross-process slot limiter ===
+# A folder with one lock file per slot. Locks are released by the OS when a
+# process dies, so a crashed crew never leaks a slot.
+
+def _try_lock(handle):
+    try:
+        if fcntl:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _lock(handle):
+    if fcntl:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+    else:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _unlock(handle):
+    if fcntl:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+    else:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def locked_file(path):
+    # Blocking exclusive lock on `path` (created if missing), shared by threads and processes
+    handle = open(path, "a+")
+    try:
+        _lock(handle)
+        try:
+            yield handle
+        finally:
+            _unlock(handle)
+    finally:
+        handle.close()
+
+
+class LLMSlots:
+    """Caps how many LLM calls are in flight across every thread and process sharing `folder`."""
+
+    def __init__(self, folder, limit, poll_interval=0.2):
+        os.makedirs(folder, exist_ok=True)
+        self.folder = folder
+        self.limit = max(1, int(limit))
+        self.poll_interval = poll_interval
+
+    @contextmanager
+    def slot(self):
+        handle = self._acquire()
+        try:
+            yield
+        finally:
+            _unlock(handle)
+            handle.close()
+
+    def _acquire(self):
+        while True:
+            for index in range(self.limit):
+                handle = open(os.path.join(self.folder, f"slot_{index}.lock"), "a+")
+                if _try_lock(handle):
+                    return handle
+                handle.close()
+            time.sleep(self.poll_interval)
+
+    def wrap(self, execute):
+        def limited_execute(task, context):
+            with self.slot():
+                return execute(task, context)
+
+        return limited_execute
+
+
+def slots_from_env():
+    # Set by batch.py so every crew it starts shares one global cap
+    folder = os.getenv("SDLC_LLM_SLOTS_DIR")
+    limit = os.getenv("SDLC_MAX_LLM_CALLS")
+    if folder and limit:
+        return LLMSlots(folder, int(limit))
+    return None
@@ -0,0 +1,201 @@
+import re
+
+from markdown_utils import WRAPPER_FENCE_RE, FENCE_RE, HEADING_RE
+
+# Single-pass markdown parser for the agents' output. iter_blocks() reads lines one at a time and yields
+# plain dict blocks as soon as each one is complete, so exporters can write a document while it is still
+# being read. Only a table or a code block is ever held in memory, never the whole file.
+#
+#   {"type": "heading", "level": 1-6, "text": str}
+#   {"type": "paragraph", "text": str}                    source line breaks are kept as "\n"
+#   {"type": "list_item", "ordered": bool, "number": str | None, "depth": 1.., "text": str}
+#   {"type": "table", "rows": [[cell, ...], ...]}        first row is the header
+#   {"type": "code", "language": str, "lines": [str, ...]}
+#   {"type": "rule"}
+#
+# Text fields keep their inline markdown; inline_runs() splits it into bold/italic/code runs.
+
+BULLET_RE = re.compile(r"^(\s*)[-*+]\s+(.*)$")
+ORDERED_RE = re.compile(r"^(\s*)(\d+)[.)]\s+(.*)$")
+RULE_RE = re.compile(r"^\s{0,3}([-*_])(\s*\1){2,}\s*$")
+TABLE_SEPARATOR_RE = re.compile(r"^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$")
+CHECKBOX_RE = re.compile(r"^\[([ xX])\]\s+")
+INLINE_RE = re.compile(r"\*\*(.+?)\*\*|`([^`]+)`|\[([^\]]+)\]\(([^)\s]+)\)|(?<![\w*])\*(?!\s)([^*]+?)(?<!\s)\*(?![\w*])")
+
+
+def _is_table_row(line):
+    return line.strip().startswith("|")
+
+
+def _split_row(line):
+    cells = line.strip()
+    if cells.startswith("|"):
+        cells = cells[1:]
+    if cells.endswith("|") and not cells.endswith("\\|"):
+        cells = cells[:-1]
+    return [cell.strip().replace("\\|", "|") for cell in re.split(r"(?<!\\)\|", cells)]
+
+
+def _item_text(text):
+    checkbox = CHECKBOX_RE.match(text)
+    if checkbox:
+        text = ("☑ " if checkbox.group(1) in "xX" else "☐ ") + text[checkbox.end():]
+    return text.strip()
+
+
+def iter_blocks(lines):
+    """Yield blocks from an iterable of lines (a file object works and is read lazily)."""
+    paragraph = []        # lines of the paragraph or list item being collected
+    item = None           # the open list item, continuation lines are appended to it
+    list_indents = []     # indent of each open list level
+    table = None          # rows of the table being collected
+    candidate_row = None  # a "| a | b |" line that becomes a table header if a separator follows
+    code = None           # open code block
+    code_indent = 0
+    wrapped = False       # inside a ```markdown ... ``` wrapper, whose content is rendered as markdown
+
+    def flush():
+        nonlocal paragraph, item
+        blocks = []
+        if item is not None:
+            item["text"] = _item_text(" ".join(item["text"]))
+            blocks.append(item)
+        elif paragraph:
+            blocks.append({"type": "paragraph", "text": "\n".join(paragraph)})
+        paragraph, item = [], None
+        return blocks
+
+    def end_table():
+        nonlocal table, candidate_row
+        blocks = []
+        if table:
+            blocks.append({"type": "table", "rows": table})
+        elif candidate_row is not None:
+            blocks.append({"type": "paragraph", "text": candidate_row.strip()})
+        table, candidate_row = None, None
+        return blocks
+
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+
+        if code is not None:
+            if FENCE_RE.match(line) and line.strip().strip("`~") == "":
+                yield code
+                code = None
+            else:
+                code["lines"].append(line[code_indent:] if line[:code_indent].isspace() else line)
+            continue
+
+
+        # Tables: a row only becomes a table once the separator line under it shows up
+        if table is not None:
+            if _is_table_row(line):
+                table.append(_split_row(line))
+                continue
+            yield from end_table()
+        elif candidate_row is not None:
+            if TABLE_SEPARATOR_RE.match(line):
+                table = [_split_row(candidate_row)]
+                candidate_row = None
+                continue
+            yield from end_table()
+        if _is_table_row(line) and not TABLE_SEPARATOR_RE.match(line):
+            yield from flush()
+            list_indents = []
+            candidate_row = line
+            continue
+
+        if FENCE_RE.match(line):
+            fence = line.strip()
+            if fence != "```" and WRAPPER_FENCE_RE.match(line):
+                # Agents wrap (part of) their answer in ```markdown, render it instead of showing it as code
+                yield from flush()
+                wrapped = True
+                continue
+            if wrapped and fence == "```":
+                wrapped = False
+                continue
+            yield from flush()
+            code_indent = len(line) - len(line.lstrip())
+            code = {"type": "code", "language": fence.strip("`~").strip().lower(), "lines": []}
+            continue
+
+        if not line.strip():
+            yield from flush()
+            continue
+
+        heading = HEADING_RE.match(line)
+        if heading:
+            yield from flush()
+            list_indents = []
+            yield {"type": "heading", "level": len(heading.group(1)), "text": heading.group(2).strip()}
+            continue
+
+        if RULE_RE.match(line):
+            yield from flush()
+            list_indents = []
+            yield {"type": "rule"}
+            continue
+
+        bullet = BULLET_RE.match(line)
+        ordered = None if bullet else ORDERED_RE.match(line)
+        if bullet or ordered:
+            yield from flush()
+            indent = len((bullet or ordered).group(1).expandtabs(4))
+            while list_indents and list_indents[-1] > indent:
+                list_indents.pop()
+            if not list_indents or list_indents[-1] < indent:
+                list_indents.append(indent)
+            item = {
+                "type": "list_item",
+                "ordered": ordered is not None,
+                "number": ordered.group(2) if ordered else None,
+                "depth": len(list_indents),
+                "text": [bullet.group(2) if bullet else ordered.group(3)],
+            }
+            continue
+
+        if item is not None:
+            item["text"].append(line.strip())
+        else:
+            if not line[:1].isspace():
+                list_indents = []
+            paragraph.append(line.strip())
+
+    if code is not None:
+        yield code
+    yield from end_table()
+    yield from flush()
+
+
+def parse_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        yield from iter_blocks(f)
+
+
+def inline_runs(text):
+    """Split inline markdown into (text, style) runs; style is None, "bold", "italic" or "code"."""
+    runs = []
+    position = 0
+    for match in INLINE_RE.finditer(text):
+        if match.start() > position:
+            runs.append((text[position:match.start()], None))
+        bold, code, link_text, link_url, italic = match.groups()
+        if bold is not None:
+            runs.append((bold, "bold"))
+        elif code is not None:
+            runs.append((code, "code"))
+        elif link_text is not None:
+            runs.append((link_text, None))
+            if link_url != link_text:
+                runs.append((f" ({link_url})", None))
+        else:
+            runs.append((italic, "italic"))
+        position = match.end()
+    if position < len(text):
+        runs.append((text[position:], None))
+    return runs
+
+
+def plain_text(text):
+    return "".join(run for run, _ in inline_runs(text))
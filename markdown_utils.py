@@ -0,0 +1,19 @@
+import re
+
+# Small helpers shared by everything that reads the agents' markdown output
+
+# Agents usually wrap the whole answer in ```markdown ... ``` (sometimes ```text, sometimes never closed)
+WRAPPER_FENCE_RE = re.compile(r"^\s*```\s*(markdown|md|text|txt)?\s*$", re.IGNORECASE)
+FENCE_RE = re.compile(r"^\s*(```|~~~)")
+HEADING_RE = re.compile(r"^\s{0,3}(#{1,6})\s+(.+?)\s*#*\s*$")
+# A line that is nothing but bold text, e.g. "**1. Frontend Component:**" - often used as a heading
+BOLD_HEADING_RE = re.compile(r"^\s*[-*]?\s*\*\*([^*]{2,80}?)\*\*:?\s*$")
+
+
+def strip_outer_fence(text):
+    lines = text.strip("\n").splitlines()
+    if lines and WRAPPER_FENCE_RE.match(lines[0]) and lines[0].strip() != "```":
+        lines = lines[1:]
+        if lines and lines[-1].strip() == "```":
+            lines = lines[:-1]
+    return "\n".join(lines)
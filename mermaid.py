@@ -0,0 +1,261 @@
+import re
+
+# Parser for the Mermaid flowcharts flowchart_task writes into 07_flowchart.txt (`graph` / `flowchart`
+# diagrams only). It knows node shapes, quoted labels, edge chains with `&`, the arrow variants and both
+# label styles (`-->|text|` and `-- text -->`), subgraphs and comments; styling statements are accepted and
+# ignored. Newer syntax is accepted too: invisible links (`A ~~~ B`), node metadata
+# (`A@{ shape: diamond, label: "Ok?" }`), edge ids (`A e1@--> B`, `e1@{ animate: true }`), and subgraph ids
+# as edge endpoints (the edge then points at the subgraph, no node is created for it). Anything else is a
+# MermaidError with the line number, which is the syntax check used by validation.py.
+#
+#   {"direction": "TB", "nodes": {id: {"label", "shape", "subgraph"}},
+#    "edges": [{"source", "target", "label", "line", "arrow"}], "subgraphs": [{"id", "title", "parent"}]}
+
+MERMAID_BLOCK_RE = re.compile(r"^\s*```\s*mermaid\s*$(.*?)^\s*```\s*$", re.IGNORECASE | re.MULTILINE | re.DOTALL)
+# `graph TD;A-->B;B-->C;` keeps statements on the header line after the `;`
+HEADER_RE = re.compile(r"^(graph|flowchart)(?:\s+(TB|TD|BT|RL|LR))?\s*(?:;(.*))?$", re.IGNORECASE)
+ID_RE = re.compile(r"[A-Za-z0-9_][\w]*")
+# Longest opening token first; shape name, closing token
+SHAPES = [
+    ("([", "stadium", "])"), ("[[", "subroutine", "]]"), ("[(", "cylinder", ")]"), ("((", "circle", "))"),
+    ("{{", "hexagon", "}}"), ("[/", "parallelogram", "/]"), ("[\\", "parallelogram", "\\]"),
+    ("(", "round", ")"), ("[", "rect", "]"), ("{", "diamond", "}"), (">", "flag", "]"),
+]
+ALT_CLOSES = {"[/": ("\\]",), "[\\": ("/]",)}  # trapezoids
+# `-- text -->`, `== text ==>`, `-. text .->`; must be tried before the plain arrows
+TEXT_LINK_RE = re.compile(r"\s*(<?)(--|==|-\.)(?![-=.>])\s*(\"[^\"]*\"|[^\"]+?)\s*(-{2,}|={2,}|\.+-)([>ox]?)(?=\s|[A-Za-z0-9_\"]|$)")
+TEXT_LINK_ARROWS = {"--": "--", "==": "==", "-.": "-.-"}
+LINK_RE = re.compile(r"\s*(<?)(-{2,}|={2,}|-\.+-|~{3,})([>ox]?)(?:\s*\|([^|]*)\|)?")
+EDGE_ID_RE = re.compile(r"\s*[A-Za-z_]\w*@(?=[-=.<~])")
+METADATA_RE = re.compile(r"@\{(.*?)\}", re.DOTALL)
+METADATA_FIELD_RE = re.compile(r"(\w+)\s*:\s*(\"[^\"]*\"|[^,]+)")
+EDGE_METADATA_RE = re.compile(r"^([A-Za-z_]\w*)@\{.*\}$")
+# `@{ shape: ... }` names -> the shapes of the bracket syntax
+METADATA_SHAPES = {
+    "rect": "rect", "rounded": "round", "stadium": "stadium", "pill": "stadium", "terminal": "stadium",
+    "subproc": "subroutine", "subroutine": "subroutine", "cyl": "cylinder", "db": "cylinder",
+    "database": "cylinder", "circle": "circle", "circ": "circle", "diam": "diamond", "diamond": "diamond",
+    "decision": "diamond", "hex": "hexagon", "hexagon": "hexagon", "lean-r": "parallelogram",
+    "lean-l": "parallelogram", "flag": "flag",
+}
+IGNORED_RE = re.compile(r"^(classDef|class|style|linkStyle|click|direction)\b")
+SUBGRAPH_RE = re.compile(r"^subgraph\s+(.*?)\s*$")
+
+
+class MermaidError(ValueError):
+    def __init__(self, line, message):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+        self.message = message
+
+
+def extract_mermaid(text):
+    """The diagram source: the first ```mermaid block, else the whole text without its outer fence."""
+    block = MERMAID_BLOCK_RE.search(text or "")
+    if block:
+        return block.group(1).strip("\n")
+    lines = (text or "").strip().splitlines()
+    if lines and lines[0].strip().startswith("```"):
+        lines = lines[1:]
+        if lines and lines[-1].strip() == "```":
+            lines = lines[:-1]
+    return "\n".join(lines)
+
+
+def _label(text):
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] == '"':
+        text = text[1:-1]
+    return text.replace("<br>", " ").replace("<br/>", " ").strip()
+
+
+def _split_statements(line):
+    # `;` separates statements, except inside quotes and shape brackets
+    parts, current, quoted, depth = [], [], False, 0
+    for char in line:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char in "[({":
+            depth += 1
+        elif not quoted and char in "])}":
+            depth = max(0, depth - 1)
+        if char == ";" and not quoted and depth == 0:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+
+class _Statement:
+    def __init__(self, text, number):
+        self.text = text
+        self.pos = 0
+        self.number = number
+        self.edge_ids = []
+
+    def rest(self):
+        return self.text[self.pos:]
+
+    def skip_space(self):
+        while self.pos < len(self.text) and self.text[self.pos].isspace():
+            self.pos += 1
+
+    def node(self):
+        """(id, label or None, shape or None) at the current position."""
+        self.skip_space()
+        match = ID_RE.match(self.text, self.pos)
+        if not match:
+            raise MermaidError(self.number, f"expected a node id at '{self.rest()[:30]}'")
+        node_id = match.group(0)
+        self.pos = match.end()
+        label = shape = None
+        for opening, name, closing in SHAPES:
+            if self.text.startswith(opening, self.pos):
+                label = self._shape_text(opening, (closing,) + ALT_CLOSES.get(opening, ()))
+                shape = name
+                break
+        if self.text.startswith("@{", self.pos):
+            metadata = METADATA_RE.match(self.text, self.pos)
+            if not metadata:
+                raise MermaidError(self.number, f"unclosed '@{{' after '{node_id}'")
+            self.pos = metadata.end()
+            fields = {name: value.strip() for name, value in METADATA_FIELD_RE.findall(metadata.group(1))}
+            if "label" in fields or "shape" in fields:
+                label = _label(fields.get("label", node_id))
+                shape = METADATA_SHAPES.get(fields.get("shape", "rect").lower(), "rect")
+        if self.text.startswith(":::", self.pos):
+            match = ID_RE.match(self.text, self.pos + 3)
+            self.pos = match.end() if match else self.pos + 3
+        return node_id, label, shape
+
+    def _shape_text(self, opening, closings):
+        start = self.pos + len(opening)
+        if self.text[start:start + 1] == '"':
+            end_quote = self.text.find('"', start + 1)
+            if end_quote < 0:
+                raise MermaidError(self.number, "unterminated quoted label")
+            for closing in closings:
+                if self.text.startswith(closing, end_quote + 1):
+                    self.pos = end_quote + 1 + len(closing)
+                    return _label(self.text[start:end_quote + 1])
+            raise MermaidError(self.number, f"expected '{closings[0]}' after the label")
+        ends = [(self.text.find(closing, start), closing) for closing in closings]
+        ends = [(index, closing) for index, closing in ends if index >= 0]
+        if not ends:
+            raise MermaidError(self.number, f"unclosed '{opening}' in '{self.text[self.pos:self.pos + 30]}'")
+        index, closing = min(ends)
+        text = self.text[start:index]
+        if any(char in text for char in "[]{}") or (closing != ")" and "(" in text and ")" not in text):
+            raise MermaidError(self.number, f"unbalanced brackets in label '{text[:30]}'")
+        self.pos = index + len(closing)
+        return _label(text)
+
+    def link(self):
+        """(arrow, label) of the link at the current position, or None at the end of the statement."""
+        edge_id = EDGE_ID_RE.match(self.text, self.pos)
+        if edge_id:
+            self.edge_ids.append(edge_id.group(0).strip().rstrip("@"))
+            self.pos = edge_id.end()
+        for pattern in (TEXT_LINK_RE, LINK_RE):
+            match = pattern.match(self.text, self.pos)
+            if not match:
+                continue
+            self.pos = match.end()
+            if pattern is TEXT_LINK_RE:
+                start, opening, label, body, head = match.groups()
+                return start + TEXT_LINK_ARROWS[opening] + (head or opening[-1].replace(".", "-")), _label(label)
+            start, body, head, label = match.groups()
+            return f"{start}{body}{head}", _label(label or "")
+        return None
+
+
+def parse_flowchart(source):
+    """Parse a flowchart (the diagram text, see extract_mermaid). Raises MermaidError on invalid syntax."""
+    chart = {"direction": "TB", "nodes": {}, "edges": [], "subgraphs": []}
+    stack = []  # open subgraph ids
+    header_seen = False
+    labelled = set()  # nodes given a label or shape somewhere (the others may turn out to be subgraph ids)
+    edge_ids = set()
+
+    def add_node(node_id, label, shape):
+        node = chart["nodes"].get(node_id)
+        if node is None:
+            node = chart["nodes"][node_id] = {"label": node_id, "shape": "rect", "subgraph": stack[-1] if stack else None}
+        if label is not None:
+            node["label"], node["shape"] = label or node_id, shape
+            labelled.add(node_id)
+
+    for number, raw in enumerate(source.splitlines(), start=1):
+        line = raw.split("%%", 1)[0].strip() if not raw.strip().startswith("%%") else ""
+        if not line:
+            continue
+        if not header_seen:
+            header = HEADER_RE.match(line)
+            if not header:
+                raise MermaidError(number, f"expected 'graph' or 'flowchart' with a direction, got '{line[:40]}'")
+            chart["direction"] = (header.group(2) or "TB").upper().replace("TD", "TB")
+            header_seen = True
+            line = (header.group(3) or "").strip()
+            if not line:
+                continue
+
+        for text in _split_statements(line):
+            subgraph = SUBGRAPH_RE.match(text)
+            if subgraph:
+                spec = subgraph.group(1)
+                titled = re.match(r"^([\w-]+)\s*\[(.*)\]$", spec)
+                sub_id, title = (titled.group(1), _label(titled.group(2))) if titled else (spec.replace(" ", "_"), _label(spec))
+                chart["subgraphs"].append({"id": sub_id, "title": title, "parent": stack[-1] if stack else None})
+                stack.append(sub_id)
+                continue
+            if text == "end":
+                if not stack:
+                    raise MermaidError(number, "'end' without an open subgraph")
+                stack.pop()
+                continue
+            if IGNORED_RE.match(text):
+                continue
+            edge_metadata = EDGE_METADATA_RE.match(text)
+            if edge_metadata and edge_metadata.group(1) in edge_ids:
+                continue  # `e1@{ animate: true }` styles an edge declared earlier
+
+            statement = _Statement(text, number)
+            sources = [statement.node()]
+            statement.skip_space()
+            while statement.rest().startswith("&"):
+                statement.pos += 1
+                sources.append(statement.node())
+                statement.skip_space()
+            for node in sources:
+                add_node(*node)
+            while statement.rest():
+                link = statement.link()
+                if link is None:
+                    raise MermaidError(number, f"cannot parse '{statement.rest()[:40]}'")
+                arrow, label = link
+                targets = [statement.node()]
+                statement.skip_space()
+                while statement.rest().startswith("&"):
+                    statement.pos += 1
+                    targets.append(statement.node())
+                    statement.skip_space()
+                for node in targets:
+                    add_node(*node)
+                for source_node in sources:
+                    for target in targets:
+                        chart["edges"].append({"source": source_node[0], "target": target[0], "label": label,
+                                               "line": number, "arrow": arrow})
+                sources = targets
+            edge_ids.update(statement.edge_ids)
+
+    if not header_seen:
+        raise MermaidError(1, "empty diagram")
+    if stack:
+        raise MermaidError(len(source.splitlines()), f"subgraph '{stack[-1]}' is never closed with 'end'")
+    # An edge to a bare subgraph id points at the subgraph; drop the node that was created for it on the way
+    for sub in chart["subgraphs"]:
+        if sub["id"] in chart["nodes"] and sub["id"] not in labelled:
+            del chart["nodes"][sub["id"]]
+    return chart
@@ -0,0 +1,182 @@
+import re
+
+from scheduler import task_key
+from incremental import read_artifact
+from markdown_utils import strip_outer_fence, FENCE_RE, HEADING_RE
+
+# Patch mode for update tasks: instead of regenerating the whole document, the updater returns only the
+# sections the review asked to change, keyed by their heading in the draft. The patches are merged into
+# the draft locally and the result is checked (every untouched section still there, code fences balanced);
+# when the answer cannot be applied the task is run again as a normal full rewrite.
+
+PATCH_INSTRUCTIONS = (
+    "\n\nPATCH MODE: do not rewrite the whole document. Return only the sections that must change, each one as:\n"
+    "<<<SECTION: exact heading text of the section in the draft>>>\n"
+    "the complete new content of that section, starting with its heading line\n"
+    "<<<END>>>\n"
+    "A section includes its subsections. To insert a new section, use <<<AFTER: heading of the section it "
+    "follows>>> instead of <<<SECTION: ...>>>. Output nothing outside these blocks. "
+    "If nothing needs to change, output only: NO_CHANGES"
+)
+PATCH_EXPECTED_OUTPUT = "Only the changed sections, as <<<SECTION: ...>>> / <<<AFTER: ...>>> blocks, or NO_CHANGES."
+
+PATCH_BLOCK_RE = re.compile(r"^<<<\s*(SECTION|AFTER)\s*:\s*(.+?)\s*>>>\s*$(.*?)^<<<\s*END\s*>>>\s*$",
+                            re.MULTILINE | re.DOTALL)
+NO_CHANGES_RE = re.compile(r"^\W*NO_CHANGES\W*$")
+
+
+class PatchError(ValueError):
+    pass
+
+
+def _normalize(title):
+    title = re.sub(r"[*_`]", "", title).strip().rstrip(":").strip()
+    return re.sub(r"\s+", " ", title).lower()
+
+
+def split_sections(lines):
+    """[(title, level, start, end)] for every heading outside code blocks; a section runs until the next
+    heading of the same or a higher level, so it contains its subsections."""
+    headings = []
+    in_code = False
+    for index, line in enumerate(lines):
+        if FENCE_RE.match(line):
+            in_code = not in_code
+            continue
+        heading = None if in_code else HEADING_RE.match(line)
+        if heading:
+            headings.append((heading.group(2), len(heading.group(1)), index))
+    sections = []
+    for position, (title, level, start) in enumerate(headings):
+        end = next((other for _, other_level, other in headings[position + 1:] if other_level <= level), len(lines))
+        sections.append((title, level, start, end))
+    return sections
+
+
+def parse_patches(text):
+    """[(op, heading, body)] from the updater's answer; [] for NO_CHANGES. Raises PatchError otherwise."""
+    text = strip_outer_fence(text)
+    if NO_CHANGES_RE.match(text.strip()):
+        return []
+    patches = [(op.upper(), heading, body.strip("\n")) for op, heading, body in PATCH_BLOCK_RE.findall(text)]
+    if not patches:
+        raise PatchError("no <<<SECTION>>> blocks in the answer")
+    leftover = PATCH_BLOCK_RE.sub("", text).strip()
+    if leftover.strip("`").strip():
+        raise PatchError("text outside the patch blocks (the updater probably rewrote the document)")
+    return patches
+
+
+def apply_patches(draft, patches):
+    fenced = draft.lstrip().startswith("```")
+    lines = strip_outer_fence(draft).splitlines()
+    sections = split_sections(lines)
+    if not sections:
+        raise PatchError("the draft has no headings to patch")
+    by_title = {}
+    for title, level, start, end in sections:
+        by_title.setdefault(_normalize(title), []).append((title, level, start, end))
+
+    edits = []  # (start, end, new lines); replacements keep the original span, insertions are empty spans
+    for op, heading, body in patches:
+        matches = by_title.get(_normalize(heading.lstrip("#").strip()))
+        if not matches:
+            raise PatchError(f"no section titled '{heading}' in the draft")
+        if len(matches) > 1:
+            raise PatchError(f"{len(matches)} sections are titled '{heading}', the patch is ambiguous")
+        title, level, start, end = matches[0]
+        new_lines = body.splitlines()
+        if op == "SECTION" and not (new_lines and HEADING_RE.match(new_lines[0])):
+            new_lines = [lines[start]] + new_lines  # keep the original heading when only the body came back
+        if op == "AFTER":
+            start = end
+        else:
+            # Nested sections never count as "lost" below, so a replaced span must bring its subsections back
+            nested = [other for other, _, other_start, _ in sections if start < other_start < end]
+            if nested and len(nested) == len(sections) - 1:
+                raise PatchError(f"'{heading}' is the document title section, patching it rewrites the whole document")
+            returned = {_normalize(other) for other, _, _, _ in split_sections(new_lines)}
+            dropped = [other for other in nested if _normalize(other) not in returned]
+            if dropped:
+                raise PatchError(f"patch for '{heading}' drops its subsections: {', '.join(dropped[:3])}")
+        edits.append((start, end, new_lines + [""]))
+
+    edits.sort(key=lambda edit: (edit[0], edit[1]))
+    for (_, previous_end, _), (start, _, _) in zip(edits, edits[1:]):
+        if start < previous_end:
+            raise PatchError("patches overlap (a section and one of its subsections were both replaced)")
+
+    merged = lines
+    for start, end, new_lines in reversed(edits):
+        merged = merged[:start] + new_lines + merged[end:]
+
+    # Structure check: every section outside the replaced spans must survive (the ones inside were checked
+    # against the patch bodies above), and fences must be balanced
+    replaced = [(start, end) for start, end, _ in edits if start != end]
+    remaining = {_normalize(title) for title, _, _, _ in split_sections(merged)}
+    lost = [title for title, _, start, _ in sections
+            if _normalize(title) not in remaining and not any(s <= start < e for s, e in replaced)]
+    if lost:
+        raise PatchError(f"sections lost while merging: {', '.join(lost[:3])}")
+    if sum(1 for line in merged if FENCE_RE.match(line)) % 2:
+        raise PatchError("unbalanced code fences after merging")
+
+    text = "\n".join(merged).strip("\n")
+    return f"```markdown\n{text}\n```" if fenced else text
+
+
+class PatchUpdater:
+    """Execute wrapper that runs the listed update tasks in patch mode with a full-rewrite fallback."""
+
+    def __init__(self, cycles, keys):
+        self.drafts = {update: draft for draft, _, update in cycles if update in keys}
+        self.originals = {}  # task key -> (description, expected_output) for the full rewrite
+        self.results = {}    # task key -> "patched: N sections" / "fallback: reason"
+        self.overrides = {}  # draft key -> text to patch instead of the file (refinement rounds)
+
+    def prepare(self, tasks):
+        # Call after interpolation: the instructions contain braces that must not be formatted
+        for task in tasks:
+            key = task_key(task)
+            if key in self.drafts:
+                self.originals[key] = (task.description, task.expected_output)
+                task.description += PATCH_INSTRUCTIONS
+                task.expected_output = PATCH_EXPECTED_OUTPUT
+
+    def _draft(self, task):
+        if self.drafts[task_key(task)] in self.overrides:
+            return self.overrides[self.drafts[task_key(task)]]
+        for dep in task.context or []:
+            if task_key(dep) == self.drafts[task_key(task)]:
+                return read_artifact(dep)
+        return None
+
+    def wrap(self, execute):
+        def patched_execute(task, context):
+            key = task_key(task)
+            if key not in self.originals:
+                return execute(task, context)
+            draft = self._draft(task)
+            reason = "draft not found"
+            if draft is not None:
+                answer = execute(task, context)
+                try:
+                    patches = parse_patches(answer)
+                    merged = apply_patches(draft, patches) if patches else draft
+                except PatchError as e:
+                    reason = str(e)
+                else:
+                    self.results[key] = f"patched: {len(patches)} sections"
+                    print(f"🩹 {key}: merged {len(patches)} section patch(es) into the draft")
+                    return merged
+
+            self.results[key] = f"fallback: {reason}"
+            print(f"↩️  {key}: patch failed ({reason}), running a full rewrite")
+            patch_prompt = (task.description, task.expected_output)
+            task.description, task.expected_output = self.originals[key]
+            try:
+                return execute(task, context)
+            finally:
+                task.description, task.expected_output = patch_prompt
+
+        return patched_execute
@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import random
+import threading
+
+from scheduler import task_key
+from llm_slots import locked_file
+
+# Requests/min and tokens/min limits shared by every thread and process on this machine
+# (state lives in a small JSON file guarded by a file lock), plus an AIMD concurrency
+# controller that halves the number of in-flight calls on 429/5xx and creeps back up on success.
+
+STATE_DIR = ".llm_cache"
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+RETRYABLE_MARKERS = ("429", "resource exhausted", "resourceexhausted", "quota", "rate limit",
+                     "503", "unavailable", "overloaded", "500 internal", "deadline exceeded")
+
+
+def estimate_tokens(text):
+    # ~4 characters per token is close enough for budgeting Gemini calls
+    return max(1, len(text or "") // 4)
+
+
+def status_code(error):
+    for candidate in (error, getattr(error, "response", None)):
+        for attr in ("status_code", "code", "http_status"):
+            value = getattr(candidate, attr, None)
+            if isinstance(value, int):
+                return value
+    return None
+
+
+def is_retryable(error):
+    code = status_code(error)
+    if code is not None:
+        return code in RETRYABLE_STATUS
+    message = f"{type(error).__name__} {error}".lower()
+    return any(marker in message for marker in RETRYABLE_MARKERS)
+
+
+class TokenBucket:
+    """Two buckets (requests and tokens) refilled continuously, persisted in `<name>.json`."""
+
+    def __init__(self, name="gemini", requests_per_minute=15, tokens_per_minute=1_000_000, state_dir=STATE_DIR):
+        os.makedirs(state_dir, exist_ok=True)
+        self.state_path = os.path.join(state_dir, f"ratelimit_{name}.json")
+        self.lock_path = self.state_path + ".lock"
+        self.rpm = requests_per_minute
+        self.tpm = tokens_per_minute
+
+    def _load(self, now):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            state = {"requests": self.rpm, "tokens": self.tpm, "updated": now}
+        elapsed = max(0.0, now - state["updated"])
+        state["requests"] = min(self.rpm, state["requests"] + elapsed * self.rpm / 60)
+        state["tokens"] = min(self.tpm, state["tokens"] + elapsed * self.tpm / 60)
+        state["updated"] = now
+        return state
+
+    def _save(self, state):
+        tmp_path = f"{self.state_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def acquire(self, tokens):
+        """Block until one request and `tokens` tokens are available, then take them. Returns seconds waited."""
+        tokens = min(tokens, self.tpm)  # a single huge prompt must still be able to go through
+        start = time.time()
+        while True:
+            with locked_file(self.lock_path):
+                now = time.time()
+                state = self._load(now)
+                if state["requests"] >= 1 and state["tokens"] >= tokens:
+                    state["requests"] -= 1
+                    state["tokens"] -= tokens
+                    self._save(state)
+                    return now - start
+                wait_requests = (1 - state["requests"]) * 60 / self.rpm if state["requests"] < 1 else 0
+                wait_tokens = (tokens - state["tokens"]) * 60 / self.tpm if state["tokens"] < tokens else 0
+                self._save(state)
+            time.sleep(min(max(wait_requests, wait_tokens, 0.05), 5))
+
+    def debit(self, tokens):
+        # Charge tokens only known after the call (the completion); the balance may go negative
+        with locked_file(self.lock_path):
+            state = self._load(time.time())
+            state["tokens"] -= tokens
+            self._save(state)
+
+
+class AdaptiveConcurrency:
+    """AIMD limit on in-flight calls: +1/limit per success, halved on throttling."""
+
+    def __init__(self, initial=4, minimum=1, maximum=16):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def __enter__(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+        return self
+
+    def __exit__(self, *exc):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self):
+        with self._cond:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def on_throttle(self):
+        with self._cond:
+            self.limit = max(self.minimum, self.limit / 2)
+            print(f"🐢 LLM throttled, concurrency limit now {int(self.limit)}")
+
+
+class RateLimiter:
+    def __init__(self, bucket, concurrency, max_retries=5, base_delay=2.0, max_delay=60.0):
+        self.bucket = bucket
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = {}     # task key -> retries used over the run (all attempts), read by the run report
+        self.wait_time = {}   # task key -> seconds spent waiting on the token bucket
+
+    def wrap(self, execute):
+        def limited_execute(task, context):
+            key = task_key(task)
+            prompt_tokens = estimate_tokens(task.description) + estimate_tokens(task.expected_output) + estimate_tokens(context)
+            for attempt in range(self.max_retries + 1):
+                with self.concurrency:
+                    waited = self.bucket.acquire(prompt_tokens)
+                    self.wait_time[key] = self.wait_time.get(key, 0.0) + waited
+                    try:
+                        text = execute(task, context)
+                    except Exception as e:
+                        if attempt == self.max_retries or not is_retryable(e):
+                            raise
+                        self.concurrency.on_throttle()
+                        self.retries[key] = self.retries.get(key, 0) + 1
+                        delay = min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+                        print(f"🔁 {key}: {type(e).__name__}, retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})")
+                    else:
+                        self.concurrency.on_success()
+                        self.bucket.debit(estimate_tokens(text))
+                        return text
+                # Back off outside the concurrency slot so other tasks are not blocked
+                time.sleep(delay)
+
+        return limited_execute
+
+
+def limiter_from_env():
+    # Defaults match the Gemini 1.5 Flash free tier; raise them for paid quotas
+    bucket = TokenBucket(
+        requests_per_minute=int(os.getenv("GEMINI_RPM", "15")),
+        tokens_per_minute=int(os.getenv("GEMINI_TPM", "1000000")),
+    )
+    concurrency = AdaptiveConcurrency(
+        initial=int(os.getenv("GEMINI_MAX_CONCURRENCY", "4")),
+        maximum=int(os.getenv("GEMINI_MAX_CONCURRENCY_CEILING", "16")),
+    )
+    return RateLimiter(bucket, concurrency)
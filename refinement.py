@@ -0,0 +1,198 @@
+import re
+import time
+
+from scheduler import run_dag, build_graph, downstream, task_key, build_context, CONTEXT_DIVIDER
+from markdown_utils import strip_outer_fence
+
+# Score-gated refinement: after the main run the evaluation report is parsed, and every document whose
+# overall score is below the threshold goes through its review -> update cycle again, with the evaluator's
+# feedback added to the review context. The evaluation then runs again on the new versions. The loop stops
+# when every document passes, after max_iterations rounds, when a round improved no weak document by at
+# least min_gain, or when the token / wall-time budget is spent. Only the refined documents, the evaluation
+# and locally assembled reports that contain them are rebuilt; other downstream documents keep the version
+# they were built from (run again with --incremental to propagate the changes).
+
+SCORES_BLOCK_RE = re.compile(r"^\W*SCORES\W*$", re.IGNORECASE | re.MULTILINE)
+SCORE_LINE_RE = re.compile(r"^[\s>*_-]*([A-Za-z][A-Za-z ()]*?)[*_\s]*:\s*(.*\d.*)$")
+PAIR_RE = re.compile(r"([a-z]+)\s*=\s*(\d+(?:\.\d+)?)", re.IGNORECASE)
+# Free-text fallback, for models that ignore the SCORES block
+FREE_SCORE_RE = re.compile(
+    r"(structural completeness|clarity|technical accuracy|relevance|overall quality)[^\d\n]{0,40}?(\d+(?:\.\d+)?)\s*(?:/\s*10)?",
+    re.IGNORECASE,
+)
+FREE_SCORE_NAMES = {"structural completeness": "structure", "clarity": "clarity", "technical accuracy": "accuracy",
+                    "relevance": "relevance", "overall quality": "overall"}
+# Checked in this order, so "System Design Document" is not taken for the requirements
+DOCUMENT_ALIASES = [
+    ("SDD", re.compile(r"\bsdd\b|system design document", re.IGNORECASE)),
+    ("PDD", re.compile(r"\bpdd\b|project design document", re.IGNORECASE)),
+    ("User Story", re.compile(r"user stor(?:y|ies)", re.IGNORECASE)),
+    ("Requirements", re.compile(r"requirements?\b", re.IGNORECASE)),
+]
+HEADING_LIKE_RE = re.compile(r"^\s*(#+|\*\*|\d+[.)]|[-*]\s+\*\*)")
+
+
+def _document_name(text):
+    for name, alias in DOCUMENT_ALIASES:
+        if alias.search(text):
+            return name
+    return None
+
+
+def _document_heading(line):
+    # A heading, bold or numbered line naming one document starts that document's part of the report
+    if len(line.strip()) > 80 or not HEADING_LIKE_RE.match(line):
+        return None
+    return _document_name(line)
+
+
+def _overall(scores):
+    if "overall" in scores:
+        return scores["overall"]
+    return sum(scores.values()) / len(scores) if scores else None
+
+
+def parse_scores(text):
+    """{document name: {"scores", "overall", "feedback"}} from the evaluation report.
+
+    Scores come from the trailing SCORES block when there is one, otherwise from the "Overall Quality: 8/10"
+    style lines under each document's heading. feedback is the report text written about that document.
+    """
+    text = strip_outer_fence(text or "")
+    blocks = list(SCORES_BLOCK_RE.finditer(text))
+    body, block = (text[:blocks[-1].start()], text[blocks[-1].end():]) if blocks else (text, "")
+
+    results = {}
+    current = None
+    feedback = {}
+    for line in body.splitlines():
+        name = _document_heading(line)
+        if name:
+            current = name
+        if current is None:
+            continue
+        if not name:
+            feedback.setdefault(current, []).append(line)
+        for label, value in FREE_SCORE_RE.findall(line):
+            scores = results.setdefault(current, {})
+            scores.setdefault(FREE_SCORE_NAMES[label.lower()], float(value))
+
+    for line in block.splitlines():
+        match = SCORE_LINE_RE.match(line)
+        name = _document_name(match.group(1)) if match else None
+        pairs = PAIR_RE.findall(match.group(2)) if name else []
+        if pairs:
+            results[name] = {label.lower(): float(value) for label, value in pairs}
+
+    return {
+        name: {"scores": scores, "overall": _overall(scores), "feedback": "\n".join(feedback.get(name, [])).strip()}
+        for name, scores in results.items() if scores
+    }
+
+
+class Refiner:
+    def __init__(self, cycles, documents, threshold=7.5, max_iterations=2, max_tokens=None, max_seconds=None,
+                 min_gain=0.25, evaluation_key="evaluation_report", rebuilt_keys=()):
+        self.cycles = {update: (draft, review) for draft, review, update in cycles}
+        self.documents = documents        # document name in the report -> updated output stem
+        self.threshold = threshold
+        self.max_iterations = max_iterations
+        self.max_tokens = max_tokens      # prompt + completion tokens of the whole run, main pass included
+        self.max_seconds = max_seconds    # wall time since the refiner was created
+        self.min_gain = min_gain
+        self.evaluation_key = evaluation_key
+        self.rebuilt_keys = set(rebuilt_keys)  # locally assembled tasks, rebuilt when they contain a refined document
+        self.started = time.time()
+        self.rounds = []                  # one entry per evaluation: scores, refined documents, stop reason
+        self.stop_reason = None
+
+    def _tokens(self, tracer):
+        if tracer is None:
+            return 0
+        report = tracer.report()
+        return report["prompt_tokens"] + report["completion_tokens"]
+
+    def _over_budget(self, tracer):
+        if self.max_tokens is not None and self._tokens(tracer) >= self.max_tokens:
+            return f"token budget spent ({self._tokens(tracer)} of {self.max_tokens})"
+        if self.max_seconds is not None and time.time() - self.started >= self.max_seconds:
+            return f"time budget spent ({time.time() - self.started:.0f}s of {self.max_seconds:.0f}s)"
+        return None
+
+    def _stop_reason(self, weak, previous, tracer):
+        if not weak:
+            return f"every document scores at least {self.threshold}"
+        if len(self.rounds) > self.max_iterations:
+            return f"{self.max_iterations} refinement round(s) done"
+        if previous is not None:
+            gains = [weak[name]["overall"] - previous[name]["overall"] for name in weak if name in previous]
+            if gains and max(gains) < self.min_gain:
+                return f"no document improved by {self.min_gain} or more in the last round"
+        return self._over_budget(tracer)
+
+    def refine(self, tasks, outputs, execute, tracer=None, patcher=None, **dag_options):
+        """Run refinement rounds on top of `outputs` (updated in place) and return it.
+
+        execute / dag_options are the ones the main run_dag call used; tracer is needed for the token budget.
+        """
+        graph = build_graph(tasks)
+        base_builder = dag_options.pop("context_builder", build_context)
+        drafts = {}       # draft key -> its original text, restored after the rounds
+        previous = None
+        while True:
+            scores = parse_scores(outputs.get(self.evaluation_key, ""))
+            weak = {name: result for name, result in scores.items()
+                    if name in self.documents and result["overall"] < self.threshold}
+            self.rounds.append({"scores": {name: result["scores"] for name, result in scores.items()},
+                                "refined": sorted(weak)})
+            if not scores:
+                self.stop_reason = "no scores found in the evaluation report"
+            else:
+                self.stop_reason = self._stop_reason(weak, previous, tracer)
+            summary = ", ".join(f"{name} {result['overall']:.1f}" for name, result in scores.items())
+            print(f"🎯 Evaluation round {len(self.rounds)}: {summary or 'no scores'}")
+            if self.stop_reason:
+                self.rounds[-1]["refined"] = []
+                print(f"🏁 Refinement stopped: {self.stop_reason}")
+                break
+
+            updated = [self.documents[name] for name in weak]
+            reviews = {}
+            rerun = {self.evaluation_key}
+            for name, result in weak.items():
+                update = self.documents[name]
+                draft, review = self.cycles[update]
+                # The current version is the draft of this cycle
+                drafts.setdefault(draft, outputs[draft])
+                outputs[draft] = outputs[update]
+                reviews[review] = (
+                    f"Independent evaluation of the current version (overall {result['overall']:.1f}/10, "
+                    f"target {self.threshold}/10). Address these weaknesses first:\n{result['feedback'] or '(no details)'}"
+                )
+                rerun.update((review, update))
+            rerun.update(self.rebuilt_keys & downstream(graph, updated))
+            if patcher is not None:
+                patcher.overrides = {draft: outputs[draft] for draft in drafts}
+            print(f"🔧 Refinement round {len(self.rounds)}: re-running {', '.join(sorted(rerun))}")
+
+            def context_builder(task, upstream):
+                context = base_builder(task, upstream)
+                note = reviews.get(task_key(task))
+                return CONTEXT_DIVIDER.join(part for part in (context, note) if part)
+
+            if tracer is not None:
+                tracer.round = len(self.rounds)
+            completed = {key: text for key, text in outputs.items() if key not in rerun}
+            outputs.update(run_dag(tasks, execute=execute, completed=completed, context_builder=context_builder,
+                                   **dag_options))
+            previous = weak
+
+        if tracer is not None:
+            tracer.round = None
+        if patcher is not None:
+            patcher.overrides = {}
+        outputs.update(drafts)
+        return outputs
+
+    def summary(self):
+        return {"threshold": self.threshold, "rounds": self.rounds, "stop_reason": self.stop_reason}
@@ -0,0 +1,303 @@
+import os
+import re
+import math
+import time
+import sqlite3
+import argparse
+import threading
+
+from scheduler import task_key, CONTEXT_DIVIDER
+from markdown_utils import strip_outer_fence, FENCE_RE, HEADING_RE, BOLD_HEADING_RE
+from llm_cache import cache_hit
+
+# Cross-topic artifact index: every finished task output is stored per (topic, task) in a local SQLite
+# file and split into its sections. Sections are searched with BM25, and topics are compared with TF-IDF
+# cosine similarity (0..1), so a threshold means the same thing no matter how big the index grows. Nothing
+# leaves the machine and there is no embedding model to download.
+#
+# Retriever uses the index the way agent_memory.LocalMemory uses its notes. Before a task in
+# tasks.SEEDED_TASKS runs, the outputs of the same task for the top_k most similar earlier topics are
+# appended to its context, trimmed to the sections that best match the new topic and upstream documents.
+# When an earlier topic is at least `reuse_above` similar, its output is served as-is and no LLM call is
+# made. Recurring domains (KYC, onboarding, support chat) then start from a component map or risk table
+# that already exists instead of writing it from scratch.
+#
+#   python retrieval.py add 1.outputs_mental-Health-support --topic "Mental health support chatbot"
+#   python retrieval.py search "encryption of user data" --task 06_risk_analysis
+
+DEFAULT_INDEX_PATH = os.path.join(".llm_cache", "artifacts.sqlite")
+WORD_RE = re.compile(r"[a-z][a-z0-9_-]{1,}")
+STOPWORDS = {
+    "the", "and", "for", "with", "that", "this", "are", "from", "will", "shall", "should", "must", "each",
+    "all", "any", "not", "use", "can", "its", "into", "based", "their", "your", "you", "of", "to", "in", "on",
+    "an", "be", "is", "as", "by", "or", "it", "at", "system", "document", "section",
+}
+SKIP_ARTIFACTS = {"run_report"}
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def _terms(text):
+    return [word for word in WORD_RE.findall((text or "").lower()) if word not in STOPWORDS]
+
+
+def split_sections(text):
+    """[(title, body)] at markdown or bold-line headings; text before the first heading has the title ''."""
+    sections, title, lines, in_code = [], "", [], False
+    for line in strip_outer_fence(text or "").splitlines():
+        if FENCE_RE.match(line):
+            in_code = not in_code
+        heading = None if in_code else (HEADING_RE.match(line) or BOLD_HEADING_RE.match(line))
+        if heading:
+            if "".join(lines).strip():
+                sections.append((title, "\n".join(lines).strip()))
+            title, lines = heading.groups()[-1].strip(" *:"), []
+        else:
+            lines.append(line)
+    if "".join(lines).strip():
+        sections.append((title, "\n".join(lines).strip()))
+    return sections
+
+
+class ArtifactIndex:
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS artifacts (topic TEXT, task TEXT, text TEXT, created REAL, PRIMARY KEY (topic, task))"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS sections (topic TEXT, task TEXT, position INTEGER, title TEXT, body TEXT)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS sections_by_artifact ON sections (topic, task)")
+        self._db.commit()
+        self._corpus = None  # tokenized sections and document frequencies, rebuilt after an add
+
+    def add(self, topic, key, text):
+        sections = split_sections(text)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?)", (topic, key, text, time.time()))
+            self._db.execute("DELETE FROM sections WHERE topic = ? AND task = ?", (topic, key))
+            self._db.executemany("INSERT INTO sections VALUES (?, ?, ?, ?, ?)",
+                                 [(topic, key, position, title, body) for position, (title, body) in enumerate(sections)])
+            self._db.commit()
+            self._corpus = None
+        return len(sections)
+
+    def add_folder(self, folder, topic):
+        """Index every .txt artifact of an output folder under `topic`; returns the number of artifacts."""
+        count = 0
+        for name in sorted(os.listdir(folder)):
+            stem, extension = os.path.splitext(name)
+            if extension == ".txt" and stem not in SKIP_ARTIFACTS:
+                with open(os.path.join(folder, name), "r", encoding="utf-8") as f:
+                    self.add(topic, stem, f.read())
+                count += 1
+        return count
+
+    def artifact(self, topic, key):
+        with self._lock:
+            row = self._db.execute("SELECT text FROM artifacts WHERE topic = ? AND task = ?", (topic, key)).fetchone()
+        return row[0] if row else None
+
+    def topics(self, key=None):
+        with self._lock:
+            if key:
+                rows = self._db.execute("SELECT topic FROM artifacts WHERE task = ?", (key,)).fetchall()
+            else:
+                rows = self._db.execute("SELECT DISTINCT topic FROM artifacts").fetchall()
+        return [row[0] for row in rows]
+
+    def similar_topics(self, topic, key=None, exclude=None):
+        """[(similarity 0..1, topic)] of indexed topics (with an artifact for `key`), best first."""
+        candidates = [other for other in self.topics(key) if other != exclude]
+        if not candidates:
+            return []
+        documents = [_terms(other) for other in self.topics()]
+        idf = {}
+        for terms in documents:
+            for term in set(terms):
+                idf[term] = idf.get(term, 0) + 1
+        idf = {term: math.log((1 + len(documents)) / (1 + count)) + 1 for term, count in idf.items()}
+        default_idf = math.log(1 + len(documents)) + 1  # words no indexed topic uses
+
+        def vector(text):
+            counts = {}
+            for term in _terms(text):
+                counts[term] = counts.get(term, 0) + 1
+            weights = {term: count * idf.get(term, default_idf) for term, count in counts.items()}
+            norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+            return {term: weight / norm for term, weight in weights.items()}
+
+        query = vector(topic)
+        scored = []
+        for other in candidates:
+            other_vector = vector(other)
+            scored.append((sum(weight * other_vector.get(term, 0.0) for term, weight in query.items()), other))
+        return sorted(scored, key=lambda item: (-item[0], item[1]))
+
+    def _load_corpus(self):
+        with self._lock:
+            if self._corpus is None:
+                rows = self._db.execute("SELECT topic, task, position, title, body FROM sections").fetchall()
+                documents, frequencies = [], {}
+                for topic, key, position, title, body in rows:
+                    terms = _terms(f"{title}\n{body}")
+                    counts = {}
+                    for term in terms:
+                        counts[term] = counts.get(term, 0) + 1
+                    for term in counts:
+                        frequencies[term] = frequencies.get(term, 0) + 1
+                    documents.append({"topic": topic, "task": key, "position": position, "title": title,
+                                      "body": body, "counts": counts, "length": len(terms)})
+                average = sum(document["length"] for document in documents) / len(documents) if documents else 0.0
+                self._corpus = (documents, frequencies, average)
+            return self._corpus
+
+    def search(self, query, key=None, topic=None, section=None, k=5):
+        """BM25 over sections: [{"topic", "task", "position", "title", "body", "score"}], best first.
+
+        key / topic restrict the search to one task / topic; section is a regex the section title must match.
+        """
+        documents, frequencies, average = self._load_corpus()
+        query_terms = set(_terms(query))
+        section_re = re.compile(section, re.IGNORECASE) if section else None
+        total = len(documents)
+        results = []
+        for document in documents:
+            if (key and document["task"] != key) or (topic and document["topic"] != topic):
+                continue
+            if section_re and not section_re.search(document["title"]):
+                continue
+            score = 0.0
+            for term in query_terms:
+                count = document["counts"].get(term)
+                if not count:
+                    continue
+                idf = math.log(1 + (total - frequencies[term] + 0.5) / (frequencies[term] + 0.5))
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * document["length"] / (average or 1.0))
+                score += idf * count * (BM25_K1 + 1) / (count + norm)
+            if score > 0:
+                results.append({**{name: document[name] for name in ("topic", "task", "position", "title", "body")},
+                                "score": round(score, 3)})
+        results.sort(key=lambda result: -result["score"])
+        return results[:k]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class Retriever:
+    def __init__(self, index, keys, top_k=2, reuse_above=None, min_similarity=0.2, max_seed_chars=6000):
+        self.index = index
+        self.keys = set(keys)
+        self.top_k = top_k                    # 0 = only index, never seed
+        self.reuse_above = reuse_above        # None = never serve an earlier output as-is
+        self.min_similarity = min_similarity
+        self.max_seed_chars = max_seed_chars  # per seed
+        self.stats = {}                       # task key -> {"seeds", "served", "chars", "ms", "topics"}
+
+    def record(self, topic, key, text):
+        # Called for every finished task (crew.py task_done), so later runs of any topic can find it
+        if text and text.strip():
+            self.index.add(topic, key, text)
+
+    def seed_text(self, key, prior_topic, query):
+        """The earlier output, cut down to its sections that best match `query` when it is too long."""
+        text = self.index.artifact(prior_topic, key) or ""
+        if len(text) <= self.max_seed_chars:
+            return strip_outer_fence(text).strip()
+        ranked = self.index.search(query, key=key, topic=prior_topic, k=50)
+        chosen, size = set(), 0
+        for result in ranked:
+            size += len(result["title"]) + len(result["body"]) + 8
+            if size > self.max_seed_chars:
+                break
+            chosen.add(result["position"])
+        sections = split_sections(text)
+        # Keep the document's own order and headings, and its intro when nothing matched at all
+        kept = [(title, body) for position, (title, body) in enumerate(sections) if position in chosen] or sections[:1]
+        return "\n\n".join(f"## {title}\n{body}" if title else body for title, body in kept)[:self.max_seed_chars]
+
+    def wrap(self, execute, topic):
+        def seeded_execute(task, context):
+            key = task_key(task)
+            if key not in self.keys or (not self.top_k and self.reuse_above is None):
+                return execute(task, context)
+            start = time.perf_counter()
+            stat = self.stats.setdefault(key, {"seeds": 0, "served": False, "chars": 0, "ms": 0.0, "topics": []})
+            similar = [(score, other) for score, other in self.index.similar_topics(topic, key, exclude=topic)
+                       if score >= self.min_similarity]
+
+            if similar and self.reuse_above is not None and similar[0][0] >= self.reuse_above:
+                score, other = similar[0]
+                stat.update(served=True, topics=[other], ms=stat["ms"] + (time.perf_counter() - start) * 1000)
+                print(f"📚 {key}: reusing the output for '{other[:60]}' (similarity {score:.2f})")
+                cache_hit.set(True)  # no LLM call was made, report it like a cache hit
+                return self.index.artifact(other, key)
+
+            seeds = []
+            for score, other in similar[:self.top_k]:
+                seed = self.seed_text(key, other, f"{topic}\n{context or ''}")
+                if seed:
+                    seeds.append(f"[earlier topic: {other[:80]} (similarity {score:.2f})]\n{seed}")
+                    stat["topics"].append(other)
+            if seeds:
+                seed_text = ("Your output for similar earlier topics. Reuse what applies to this topic, change what "
+                             "does not, and do not repeat it verbatim:\n\n" + "\n\n".join(seeds))
+                stat["seeds"] += len(seeds)
+                stat["chars"] += len(seed_text)
+                context = CONTEXT_DIVIDER.join(part for part in (context, seed_text) if part)
+                print(f"📚 {key}: seeded with {len(seeds)} earlier output(s)")
+            stat["ms"] += (time.perf_counter() - start) * 1000
+            return execute(task, context)
+
+        return seeded_execute
+
+    def summary(self):
+        served = sum(1 for stat in self.stats.values() if stat["served"])
+        seeds = sum(stat["seeds"] for stat in self.stats.values())
+        chars = sum(stat["chars"] for stat in self.stats.values())
+        return f"{served} outputs reused, {seeds} seeds injected ({chars} chars)"
+
+
+def index_from_env():
+    # SDLC_INDEX=off stops indexing finished tasks; SDLC_INDEX_PATH moves the index file
+    if os.getenv("SDLC_INDEX", "local").lower() in ("off", "0", "false", "none"):
+        return None
+    return ArtifactIndex(os.getenv("SDLC_INDEX_PATH", DEFAULT_INDEX_PATH))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local index of earlier runs' artifacts")
+    parser.add_argument("--index", default=os.getenv("SDLC_INDEX_PATH", DEFAULT_INDEX_PATH))
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="Index the .txt artifacts of an output folder")
+    add.add_argument("folder")
+    add.add_argument("--topic", required=True, help="Topic the folder was generated for")
+    search = commands.add_parser("search", help="Best matching sections (BM25)")
+    search.add_argument("query")
+    search.add_argument("--task", help="Only artifacts of this task, e.g. 06_risk_analysis")
+    search.add_argument("--section", help="Regex the section title must match")
+    search.add_argument("-k", type=int, default=5)
+    topics = commands.add_parser("topics", help="Indexed topics, most similar to TOPIC first")
+    topics.add_argument("topic", nargs="?", default="")
+    args = parser.parse_args()
+
+    index = ArtifactIndex(args.index)
+    if args.command == "add":
+        print(f"📚 Indexed {index.add_folder(args.folder, args.topic)} artifacts for '{args.topic}'")
+    elif args.command == "search":
+        for result in index.search(args.query, key=args.task, section=args.section, k=args.k):
+            print(f"{result['score']:>7.2f}  {result['task']:<24} {result['title'][:40]:<40} {result['topic'][:50]}")
+    else:
+        for score, topic in index.similar_topics(args.topic) if args.topic else [(0.0, t) for t in index.topics()]:
+            print(f"{score:.2f}  {topic}")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import re
+
+from scheduler import task_key
+
+# Structured review verdicts (see tasks.VERDICT_INSTRUCTIONS) and the shortcut that
+# skips an update task when its review approved the draft.
+
+VERDICT_RE = re.compile(r"^[\s>*_#-]*VERDICT\s*[:\-]\s*\**\s*(APPROVED|CHANGES[\s_-]*REQUIRED)", re.IGNORECASE | re.MULTILINE)
+ISSUES_RE = re.compile(r"^[\s>*_#-]*ISSUES\s*:?\**\s*$", re.IGNORECASE | re.MULTILINE)
+NO_ISSUES = {"none", "n/a", "no issues", "-"}
+
+
+def parse_verdict(review_text):
+    """Return {"approved": bool, "issues": [...]} or None when the review has no verdict block."""
+    matches = list(VERDICT_RE.finditer(review_text or ""))
+    if not matches:
+        return None
+    verdict = matches[-1]  # the block is asked for at the very end
+    approved = verdict.group(1).upper().startswith("APPROVED")
+
+    issues = []
+    heading = ISSUES_RE.search(review_text, verdict.end())
+    if heading:
+        for line in review_text[heading.end():].splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if not line.startswith(("-", "*")):
+                break
+            issue = line.lstrip("-* ").strip().rstrip("`")
+            if issue and issue.lower().strip(".") not in NO_ISSUES:
+                issues.append(issue)
+
+    # An "approved" review that still lists issues is treated as needing the update
+    return {"approved": approved and not issues, "issues": issues}
+
+
+class ApprovalShortcut:
+    """run_dag shortcut: promote the draft unchanged when the review of a (draft, review, update) cycle approved it."""
+
+    def __init__(self, cycles):
+        self.updates = {update: (draft, review) for draft, review, update in cycles}
+        self.verdicts = {}  # review key -> parsed verdict (None when the reviewer ignored the format)
+
+    def __call__(self, task, upstream):
+        key = task_key(task)
+        if key not in self.updates:
+            return None
+        draft, review = self.updates[key]
+        if draft not in upstream or review not in upstream:
+            return None
+        verdict = parse_verdict(upstream[review])
+        self.verdicts[review] = verdict
+        if verdict and verdict["approved"]:
+            print(f"⏭️  {review} approved the draft, promoting {draft} as {key} without an update call")
+            return upstream[draft]
+        return None
@@ -0,0 +1,155 @@
+import json
+import threading
+
+from agents import AGENT_SPECS, build_llm, build_agent
+from scheduler import task_key
+
+# Tiered model routing: model_routing.json assigns every agent (and optionally single tasks) to a model tier
+# with its own model, temperature, output-length cap, timeout and fallback chain, so reviews, flowcharts and
+# summaries can run on a cheap, fast model while the document authors get a stronger one.
+#
+#   {"default": "strong",
+#    "tiers":  {"strong": {"model": "gemini-1.5-pro", "max_output_tokens": 8192, "fallbacks": ["gemini-1.5-flash"]},
+#               "fast":   {"model": "gemini-1.5-flash", "temperature": 0.1}},
+#    "agents": {"document_reviewer_agent": "fast"},
+#    "tasks":  {"07_flowchart": {"tier": "fast", "temperature": 0.0}}}
+#
+# A task uses its own entry, else its agent's, else the default tier; entries may override single settings.
+# Agents are built once per distinct profile, so tasks sharing an agent but not a profile get their own copy.
+# When a call fails (after ratelimit.RateLimiter's retries), the task is run again on the next fallback model.
+# Every decision, and which model finally answered, ends up in `decisions` for the run metadata.
+
+DEFAULT_ROUTING_PATH = "model_routing.json"
+PROFILE_KEYS = ("model", "temperature", "max_output_tokens", "timeout", "fallbacks")
+
+
+def _entry(value):
+    # "fast" is short for {"tier": "fast"}
+    return {"tier": value} if isinstance(value, str) else dict(value or {})
+
+
+def load_routing(path=DEFAULT_ROUTING_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class ModelRouter:
+    def __init__(self, config, llm_factory=build_llm):
+        self.tiers = config.get("tiers") or {}
+        self.default = config.get("default") or next(iter(self.tiers), None)
+        self.agents = {name: _entry(value) for name, value in (config.get("agents") or {}).items()}
+        self.tasks = {key: _entry(value) for key, value in (config.get("tasks") or {}).items()}
+        self.llm_factory = llm_factory
+        self.agent_config = None
+        self.decisions = {}  # task key -> profile, agent, tier, and the model that answered
+        self._llms = {}
+        self._built = {}     # (agent name, profile) -> Agent
+        self._names = {}     # task key -> agent name
+        self._lock = threading.Lock()
+
+        if self.default not in self.tiers:
+            raise ValueError(f"Unknown default tier '{self.default}' (tiers: {', '.join(self.tiers) or 'none'})")
+        unknown = set(self.agents) - set(AGENT_SPECS)
+        if unknown:
+            raise ValueError(f"Unknown agents in routing config: {', '.join(sorted(unknown))}")
+        for entry in [*self.tiers.values(), *self.agents.values(), *self.tasks.values()]:
+            bad = set(entry) - set(PROFILE_KEYS) - {"tier"}
+            if bad:
+                raise ValueError(f"Unknown routing settings: {', '.join(sorted(bad))}")
+            if entry.get("tier", self.default) not in self.tiers:
+                raise ValueError(f"Unknown tier '{entry['tier']}' in routing config")
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_ROUTING_PATH, **options):
+        return cls(load_routing(path), **options)
+
+    def profile(self, agent_name, key=None):
+        """(tier, settings) for a task of `agent_name`; without `key`, the agent's own profile."""
+        agent_entry = self.agents.get(agent_name, {})
+        task_entry = self.tasks.get(key, {}) if key else {}
+        tier = task_entry.get("tier") or agent_entry.get("tier") or self.default
+        settings = {**self.tiers[tier]}
+        for entry in (agent_entry, task_entry):
+            settings.update({name: value for name, value in entry.items() if name != "tier"})
+        settings["fallbacks"] = list(settings.get("fallbacks") or [])
+        return tier, settings
+
+    def llm(self, settings):
+        llm_config = {name: settings[name] for name in PROFILE_KEYS if name != "fallbacks" and name in settings}
+        signature = json.dumps(llm_config, sort_keys=True)
+        with self._lock:
+            if signature not in self._llms:
+                self._llms[signature] = self.llm_factory(llm_config)
+            return self._llms[signature]
+
+    def agent(self, name, settings, agent_config=None):
+        signature = (name, json.dumps({k: v for k, v in settings.items() if k != "fallbacks"}, sort_keys=True))
+        with self._lock:
+            built = self._built.get(signature)
+        if built is None:
+            built = build_agent(name, self.llm(settings), agent_config)
+            with self._lock:
+                built = self._built.setdefault(signature, built)
+        return built
+
+    def build_agents(self, agent_config=None):
+        """Like agents.build_agents, with each agent on the LLM of its routing profile."""
+        unknown = set(agent_config or {}) - set(AGENT_SPECS)
+        if unknown:
+            raise ValueError(f"Unknown agents in config: {', '.join(sorted(unknown))}")
+        self.agent_config = agent_config
+        return {name: self.agent(name, self.profile(name)[1], agent_config) for name in AGENT_SPECS}
+
+    def assign(self, tasks, agents):
+        # Call once the tasks are built: tasks with a profile of their own get an agent copy on that LLM
+        names = {id(agent): name for name, agent in agents.items()}
+        for task in tasks:
+            key = task_key(task)
+            name = names[id(task.agent)]
+            tier, settings = self.profile(name, key)
+            if settings != self.profile(name)[1]:
+                task.agent = self.agent(name, settings, self.agent_config)
+            self._names[key] = name
+            self.decisions[key] = {"agent": name, "tier": tier, **settings, "answered_by": None, "failed": []}
+
+    def wrap(self, execute):
+        # Outermost wrapper, so the tracer, cache and rate limiter see the model that actually runs
+        def routed_execute(task, context):
+            key = task_key(task)
+            decision = self.decisions.get(key)
+            if decision is None:
+                return execute(task, context)
+            primary = task.agent
+            chain = [decision["model"], *decision["fallbacks"]]
+            try:
+                for position, model in enumerate(chain):
+                    if position:
+                        settings = {name: decision[name] for name in PROFILE_KEYS if name in decision}
+                        # A fresh agent: a shared one could already be busy with another task falling back
+                        fallback = build_agent(self._names[key], self.llm({**settings, "model": model}),
+                                               self.agent_config)
+                        # A fresh agent still has the raw {topic} templates; reuse the primary's rendered texts
+                        for field in ("role", "goal", "backstory"):
+                            setattr(fallback, field, getattr(primary, field))
+                        task.agent = fallback
+                        print(f"🔀 {key}: falling back to {model}")
+                    try:
+                        text = execute(task, context)
+                    except Exception as e:
+                        decision["failed"].append(f"{model}: {type(e).__name__}: {str(e)[:200]}")
+                        if position == len(chain) - 1:
+                            raise
+                        continue
+                    decision["answered_by"] = model
+                    return text
+            finally:
+                task.agent = primary
+
+        return routed_execute
+
+    def summary(self):
+        tiers = {}
+        for decision in self.decisions.values():
+            tier = f"{decision['tier']} ({decision['model']})"
+            tiers[tier] = tiers.get(tier, 0) + 1
+        return ", ".join(f"{tier}: {count} tasks" for tier, count in sorted(tiers.items()))
@@ -0,0 +1,225 @@
+import os
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Same divider crewai uses when it joins context outputs for a task
+CONTEXT_DIVIDER = "\n\n----------\n\n"
+
+# True while a task runs speculatively on draft inputs (see speculation.py), so the tracer can tell the runs apart
+speculating = contextvars.ContextVar("sdlc_speculating", default=False)
+
+
+# === Task graph helpers ===
+
+def task_key(task):
+    # Output file stem, e.g. "04b_sdd_updated" – stable and matches the artifacts on disk
+    return os.path.splitext(os.path.basename(task.output_file))[0]
+
+
+def task_dependencies(task):
+    # crewai uses a sentinel (not a list) when no context was given
+    context = getattr(task, "context", None)
+    return list(context) if isinstance(context, (list, tuple)) else []
+
+
+def build_graph(tasks):
+    keys = {id(task): task_key(task) for task in tasks}
+    graph = {}
+    for task in tasks:
+        deps = []
+        for dep in task_dependencies(task):
+            if id(dep) not in keys:
+                raise ValueError(f"Task '{task_key(task)}' depends on a task that is not part of the pipeline")
+            deps.append(keys[id(dep)])
+        graph[task_key(task)] = deps
+
+    # Fail fast on cycles instead of deadlocking the pool later
+    topological_order(graph)
+    return graph
+
+
+def topological_order(graph):
+    order = []
+    remaining = dict(graph)
+    while remaining:
+        ready = [key for key, deps in remaining.items() if all(d in order for d in deps)]
+        if not ready:
+            raise ValueError(f"Task graph has a cycle between: {', '.join(remaining)}")
+        for key in ready:
+            order.append(key)
+            del remaining[key]
+    return order
+
+
+def interpolate(tasks, inputs):
+    agents = {}
+    for task in tasks:
+        # Newer crewai renamed interpolate_inputs
+        render = getattr(task, "interpolate_inputs_and_add_conversation_history", None) or task.interpolate_inputs
+        render(inputs)
+        if task.agent is not None:
+            agents[id(task.agent)] = task.agent
+    for agent in agents.values():
+        agent.interpolate_inputs(inputs)
+
+
+def build_context(task, upstream):
+    # upstream: {dep key: output} in the task's context=[...] order
+    return CONTEXT_DIVIDER.join(upstream.values())
+
+
+def write_output(task, text):
+    folder = os.path.dirname(task.output_file)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(task.output_file, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def execute_task(task, context):
+    output = task.execute_sync(agent=task.agent, context=context)
+    return output.raw
+
+
+# === DAG executor ===
+
+def downstream(graph, keys):
+    # keys plus every task that (transitively) takes one of them as context
+    result = set(keys)
+    changed = True
+    while changed:
+        changed = False
+        for key, deps in graph.items():
+            if key not in result and any(dep in result for dep in deps):
+                result.add(key)
+                changed = True
+    return result
+
+
+def first_shortcut(*shortcuts):
+    # Combine several shortcut hooks; the first one that returns text wins
+    def shortcut(task, upstream):
+        for candidate in shortcuts:
+            text = candidate(task, upstream)
+            if text is not None:
+                return text
+        return None
+
+    return shortcut
+
+
+def run_dag(tasks, inputs=None, max_workers=4, execute=execute_task, on_task_done=None, completed=None,
+            context_builder=build_context, shortcut=None, speculation=None):
+    """Run tasks as soon as their context tasks are done, up to max_workers at a time.
+
+    completed: task key -> output of tasks that are already done and must not run again.
+    context_builder(task, upstream) turns the finished context outputs into the context string.
+    shortcut(task, upstream) may return the task's output without running it (None = run it as usual).
+    speculation: a speculation.Speculator; its tasks may start on draft versions of their context while the
+    review/update of those drafts is still running, and the result is kept if the final version barely changed.
+    When a task fails, no new task starts; the ones already running finish (and reach on_task_done) before the
+    first error is raised.
+    Returns a dict of task key -> raw output, in completion order.
+    """
+    if inputs:
+        interpolate(tasks, inputs)
+
+    graph = build_graph(tasks)
+    by_key = {task_key(task): task for task in tasks}
+    outputs = dict(completed or {})
+    pending = {key: deps for key, deps in graph.items() if key not in outputs}
+    running = {}
+    busy_agents = set()  # crewai agents keep per-call executor state, so never run one agent twice at once
+    max_workers = max(1, max_workers)
+
+    def run_one(task, context, upstream):
+        text = shortcut(task, upstream) if shortcut else None
+        if text is None:
+            text = execute(task, context)
+        write_output(task, text)
+        return text
+
+    def run_speculative(task, context):
+        # Not written to the output file unless it is kept
+        token = speculating.set(True)
+        try:
+            return execute(task, context)
+        finally:
+            speculating.reset(token)
+
+    speculative = {}  # task key -> (future, {context key: draft key it was replaced with})
+    speculated = {}   # task key -> (output or None if the run failed, substitutes)
+    failure = None    # first task error; nothing new starts, but tasks already running are still collected
+
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sdlc-task")
+    try:
+        while running or (pending and failure is None):
+            for key, deps in list(pending.items()) if failure is None else []:
+                if len(running) >= max_workers:
+                    break
+                task = by_key[key]
+                agent_id = id(task.agent)
+                if agent_id in busy_agents:
+                    continue
+                if not all(dep in outputs for dep in deps):
+                    substitutes = None
+                    if speculation and key not in speculative and key not in speculated:
+                        substitutes = speculation.substitutes(key, deps, outputs)
+                    if substitutes:
+                        busy_agents.add(agent_id)
+                        upstream = {dep: outputs[substitutes.get(dep, dep)] for dep in deps}
+                        future = pool.submit(run_speculative, task, context_builder(task, upstream))
+                        running[future] = key
+                        speculative[key] = (future, substitutes)
+                        print(f"🔮 Started {key} speculatively on {', '.join(substitutes.values())}")
+                    continue
+                if key in speculative:
+                    continue  # the speculative run is still going, decide once it is done
+                if key in speculated:
+                    text, substitutes = speculated.pop(key)
+                    if text is not None and speculation.accept(key, substitutes, outputs):
+                        del pending[key]
+                        write_output(task, text)
+                        outputs[key] = text
+                        print(f"⚡ Kept speculative {key}")
+                        if on_task_done:
+                            on_task_done(key, text)
+                        continue
+                del pending[key]
+                busy_agents.add(agent_id)
+                upstream = {dep: outputs[dep] for dep in deps}
+                running[pool.submit(run_one, task, context_builder(task, upstream), upstream)] = key
+                print(f"▶️  Started {key}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = running.pop(future)
+                busy_agents.discard(id(by_key[key].agent))
+                if key in speculative and speculative[key][0] is future:
+                    _, substitutes = speculative.pop(key)
+                    try:
+                        speculated[key] = (future.result(), substitutes)
+                    except Exception as e:
+                        # The real run still follows, so a failed guess only costs time
+                        print(f"⚠️  Speculative {key} failed: {e}")
+                        speculated[key] = (None, substitutes)
+                    continue
+                try:
+                    text = future.result()
+                except Exception as e:
+                    if failure is None:
+                        failure = e
+                        if running:
+                            print(f"❌ {key} failed, waiting for {len(running)} running task(s) to finish")
+                    continue
+                outputs[key] = text
+                print(f"✅ Finished {key}")
+                if on_task_done:
+                    on_task_done(key, outputs[key])
+        if failure is not None:
+            # Raised only now, so the tasks that finished after it were handed to on_task_done (checkpointed)
+            raise failure
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    return outputs
@@ -0,0 +1,259 @@
+import os
+import json
+import uuid
+import time
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from agents import build_llm
+from crew import run_pipeline
+from llm_cache import ResponseCache
+from ratelimit import limiter_from_env
+
+# Small asyncio HTTP service around run_pipeline:
+#   POST /jobs               {"topic": "..."}  -> {"job_id": "...", "events": "/jobs/<id>/events"}
+#   GET  /jobs/<id>          job status and finished task keys
+#   GET  /jobs/<id>/events   Server-Sent Events, one "task" event per finished document, then "done" or "error"
+#   GET  /health
+# The LLM client (and its HTTP connection pool) and the response cache are created once and shared by every job.
+# Agents and tasks are rebuilt per job because crewai renders {topic} into them in place.
+# A job holds one copy of each document (the latest one); its event log only names the tasks. Finished jobs
+# are forgotten after JOB_TTL_SECONDS, or sooner when more than MAX_FINISHED_JOBS are kept (their files
+# stay in outputs/jobs/<id>).
+
+JOBS_DIR = os.path.join("outputs", "jobs")
+MAX_BODY_BYTES = 1024 * 1024
+JOB_TTL_SECONDS = 3600
+MAX_FINISHED_JOBS = 100
+
+
+class Job:
+    def __init__(self, topic):
+        self.id = uuid.uuid4().hex[:12]
+        self.topic = topic
+        self.status = "queued"
+        self.created = time.time()
+        self.finished = None
+        self.events = []        # every event so far, replayed to late subscribers (task events without the text)
+        self.outputs = {}       # task key -> latest document text
+        self.subscribers = []   # asyncio.Queue per open SSE stream
+
+    def publish(self, event, data):
+        if event == "task":
+            # A task published again (refinement) replaces its earlier event and text
+            key = data["task"]
+            self.outputs[key] = data["output"]
+            self.events = [item for item in self.events if item != ("task", {"task": key})]
+            self.events.append((event, {"task": key}))
+        else:
+            self.events.append((event, data))
+        for queue in self.subscribers:
+            queue.put_nowait((event, data))
+
+    def replay(self):
+        for event, data in self.events:
+            if event == "task":
+                data = {"task": data["task"], "output": self.outputs[data["task"]]}
+            yield event, data
+
+    def summary(self):
+        return {
+            "job_id": self.id,
+            "topic": self.topic,
+            "status": self.status,
+            "tasks_done": [data["task"] for event, data in self.events if event == "task"],
+            "seconds": round((self.finished or time.time()) - self.created, 1),
+        }
+
+
+class PipelineService:
+    def __init__(self, max_jobs=2, workers=4, use_cache=True, job_ttl=JOB_TTL_SECONDS, max_finished=MAX_FINISHED_JOBS):
+        self.jobs = {}
+        self.job_ttl = job_ttl
+        self.max_finished = max_finished
+        self.workers = workers
+        self.pool = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="sdlc-job")
+        self.llm = None
+        self.cache = ResponseCache() if use_cache else None
+        self.limiter = limiter_from_env()  # one AIMD controller for all jobs, so they back off together
+
+    def warm_up(self):
+        # Pay the crewai/langchain import and client setup once, not per request
+        import crewai  # noqa: F401
+        self.llm = build_llm()
+
+    def evict(self):
+        # Only finished jobs go; running ones and their subscribers are never cut off
+        finished = sorted((job for job in self.jobs.values() if job.finished), key=lambda job: job.finished)
+        expired = [job for job in finished if time.time() - job.finished > self.job_ttl]
+        over_cap = finished[:max(0, len(finished) - self.max_finished)]
+        for job in expired + over_cap:
+            self.jobs.pop(job.id, None)
+
+    def submit(self, topic, loop):
+        job = Job(topic)
+        self.jobs[job.id] = job
+
+        def on_task_done(key, text):
+            loop.call_soon_threadsafe(job.publish, "task", {"task": key, "output": text})
+
+        def run():
+            loop.call_soon_threadsafe(setattr, job, "status", "running")
+            try:
+                run_pipeline(
+                    topic,
+                    output_dir=os.path.join(JOBS_DIR, job.id),
+                    llm=self.llm,
+                    workers=self.workers,
+                    cache=self.cache,
+                    limiter=self.limiter,
+                    on_task_done=on_task_done,
+                )
+            except Exception as e:
+                loop.call_soon_threadsafe(self._finish, job, "failed", "error", {"error": str(e)})
+            else:
+                loop.call_soon_threadsafe(self._finish, job, "done", "done", {"job_id": job.id})
+
+        self.pool.submit(run)
+        return job
+
+    def _finish(self, job, status, event, data):
+        job.status = status
+        job.finished = time.time()
+        job.publish(event, data)
+        self.evict()
+
+
+# === Minimal HTTP/1.1 handling ===
+
+async def read_request(reader):
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    if not request_line:
+        return None
+    method, path, _ = request_line.split(" ", 2)
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    if length > MAX_BODY_BYTES:
+        raise ValueError("Request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method, path, headers, body
+
+
+async def send_json(writer, status, payload):
+    reasons = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    writer.write(
+        f"HTTP/1.1 {status} {reasons.get(status, '')}\r\n"
+        f"Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: close\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+
+
+async def stream_events(writer, job):
+    writer.write(
+        b"HTTP/1.1 200 OK\r\n"
+        b"Content-Type: text/event-stream; charset=utf-8\r\n"
+        b"Cache-Control: no-cache\r\n"
+        b"Connection: close\r\n\r\n"
+    )
+    queue = asyncio.Queue()
+    # Replay what already happened, then follow live events
+    for item in job.replay():
+        queue.put_nowait(item)
+    job.subscribers.append(queue)
+    try:
+        while True:
+            event, data = await queue.get()
+            payload = json.dumps(data, ensure_ascii=False)
+            writer.write(f"event: {event}\ndata: {payload}\n\n".encode("utf-8"))
+            await writer.drain()
+            if event in ("done", "error"):
+                break
+    finally:
+        job.subscribers.remove(queue)
+
+
+def make_handler(service):
+    async def handle(reader, writer):
+        try:
+            request = await read_request(reader)
+            if request is None:
+                return
+            method, path, headers, body = request
+            service.evict()
+            parts = [part for part in path.split("?")[0].split("/") if part]
+
+            if parts == ["health"]:
+                await send_json(writer, 200, {"status": "ok", "jobs": len(service.jobs)})
+            elif parts == ["jobs"] and method == "POST":
+                try:
+                    topic = json.loads(body or b"{}").get("topic", "").strip()
+                except (json.JSONDecodeError, AttributeError):
+                    topic = ""
+                if not topic:
+                    await send_json(writer, 400, {"error": "JSON body with a non-empty 'topic' is required"})
+                    return
+                job = service.submit(topic, asyncio.get_running_loop())
+                await send_json(writer, 202, {"job_id": job.id, "events": f"/jobs/{job.id}/events"})
+            elif len(parts) in (2, 3) and parts[0] == "jobs":
+                job = service.jobs.get(parts[1])
+                if job is None:
+                    await send_json(writer, 404, {"error": f"No job {parts[1]}"})
+                elif len(parts) == 2:
+                    await send_json(writer, 200, job.summary())
+                elif parts[2] == "events":
+                    await stream_events(writer, job)
+                else:
+                    await send_json(writer, 404, {"error": "Not found"})
+            elif parts == ["jobs"]:
+                await send_json(writer, 405, {"error": "Use POST /jobs"})
+            else:
+                await send_json(writer, 404, {"error": "Not found"})
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            await send_json(writer, 400, {"error": str(e)})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    return handle
+
+
+async def serve(host, port, service):
+    server = await asyncio.start_server(make_handler(service), host, port)
+    print(f"🌐 SDLC document service listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP service that streams SDLC documents as they are generated")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-jobs", type=int, default=2, help="Pipelines running at the same time")
+    parser.add_argument("--workers", type=int, default=4, help="Max parallel tasks inside one pipeline")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--job-ttl", type=float, default=JOB_TTL_SECONDS,
+                        help="Seconds a finished job (and its documents) stays queryable")
+    parser.add_argument("--max-finished-jobs", type=int, default=MAX_FINISHED_JOBS,
+                        help="Finished jobs kept at most; the oldest are forgotten first")
+    args = parser.parse_args()
+
+    service = PipelineService(max_jobs=args.max_jobs, workers=args.workers, use_cache=not args.no_cache,
+                              job_ttl=args.job_ttl, max_finished=args.max_finished_jobs)
+    print("🔥 Warming up crewai and the Gemini client...")
+    service.warm_up()
+    asyncio.run(serve(args.host, args.port, service))
+
+
+if __name__ == "__main__":
+    main()
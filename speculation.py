@@ -0,0 +1,59 @@
+import difflib
+
+from markdown_utils import strip_outer_fence
+
+# Speculative execution: a task that waits for an updated document (e.g. 05_component_mapping on
+# 03b_pdd_updated) starts on the draft (03_pdd) while the review and update are still running. When the
+# update lands, the draft and the updated version are compared line by line; if they are at least
+# `threshold` similar the speculative output is kept, otherwise it is thrown away and the task runs again
+# on the final version. Approved drafts are promoted unchanged (review.ApprovalShortcut), so those always
+# keep the speculative result. A rejected guess costs one extra LLM call, a kept one takes a whole
+# review/update round trip off the critical path.
+
+
+def _lines(text):
+    return [line.strip() for line in strip_outer_fence(text or "").splitlines() if line.strip()]
+
+
+def similarity(before, after):
+    """0..1, how much of the document survived between two versions (1.0 = identical)."""
+    if before == after:
+        return 1.0
+    a, b = _lines(before), _lines(after)
+    if not a and not b:
+        return 1.0
+    return difflib.SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+class Speculator:
+    def __init__(self, cycles, keys, threshold=0.9):
+        self.drafts = {update: draft for draft, _, update in cycles}
+        self.keys = set(keys)
+        self.threshold = threshold
+        self.results = {}  # task key -> {"kept", "similarity", "drafts"}
+
+    def substitutes(self, key, deps, outputs):
+        """{update key: draft key} to start `key` on now, or None when it cannot start yet."""
+        if key not in self.keys:
+            return None
+        substitutes = {}
+        for dep in deps:
+            if dep in outputs:
+                continue
+            draft = self.drafts.get(dep)
+            if draft is None or draft not in outputs:
+                return None
+            substitutes[dep] = draft
+        return substitutes or None
+
+    def accept(self, key, substitutes, outputs):
+        score = min(similarity(outputs[draft], outputs[update]) for update, draft in substitutes.items())
+        kept = score >= self.threshold
+        self.results[key] = {"kept": kept, "similarity": round(score, 3), "drafts": sorted(substitutes.values())}
+        if not kept:
+            print(f"🔁 {key}: drafts changed too much in review (similarity {score:.2f} < {self.threshold}), re-running")
+        return kept
+
+    def summary(self):
+        kept = sum(1 for result in self.results.values() if result["kept"])
+        return f"{kept} of {len(self.results)} speculative runs kept"
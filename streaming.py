@@ -0,0 +1,104 @@
+import os
+import threading
+import contextvars
+
+from scheduler import task_key, CONTEXT_DIVIDER
+
+# Token streaming: the LLM gets one shared callback handler, and each running task
+# registers its own TaskStream in a context variable. Tokens are appended to
+# "<output_file>.partial" as they arrive; the partial file is removed once the task
+# finishes and its real output_file is written, so a crash leaves the text so far behind.
+# A resumed run (crew.py --resume) hands that text to the task's next attempt as a hint to
+# continue from, instead of starting the answer over.
+
+PARTIAL_SUFFIX = ".partial"
+
+_current_stream = contextvars.ContextVar("sdlc_task_stream", default=None)
+
+
+def partial_path(output_file):
+    return output_file + PARTIAL_SUFFIX
+
+
+class TaskStream:
+    def __init__(self, key, path, on_token=None):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.key = key
+        self.path = path
+        self.on_token = on_token
+        self.chars = 0
+        self._lock = threading.Lock()
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, token):
+        with self._lock:
+            self._file.write(token)
+            self._file.flush()
+            self.chars += len(token)
+        if self.on_token:
+            self.on_token(self.key, token)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def current_task_key():
+    # Key of the task whose LLM call is running in this thread (None outside streaming.wrap)
+    stream = _current_stream.get()
+    return stream.key if stream is not None else None
+
+
+def feed_token(token):
+    stream = _current_stream.get()
+    if stream is not None and token:
+        stream.write(token)
+
+
+def token_callback_handler():
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class TokenStreamHandler(BaseCallbackHandler):
+        def on_llm_new_token(self, token, **kwargs):
+            feed_token(token)
+
+    return TokenStreamHandler()
+
+
+def read_partial(output_file):
+    try:
+        with open(partial_path(output_file), "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return ""
+
+
+def wrap(execute, on_token=None, resume_partials=False):
+    # on_token(task_key, token) is called for every streamed chunk, e.g. to echo progress
+    # resume_partials: give a task the partial output an interrupted earlier attempt left behind
+    def streaming_execute(task, context):
+        key = task_key(task)
+        partial = read_partial(task.output_file).strip() if resume_partials else ""
+        if partial:
+            print(f"⏯️  {key}: continuing from {len(partial)} chars of an interrupted attempt")
+            hint = ("An earlier attempt at this task was interrupted. Its output so far is below; keep what is "
+                    "correct and return the complete answer:\n\n" + partial)
+            context = CONTEXT_DIVIDER.join(part for part in (context, hint) if part)
+        stream = TaskStream(key, partial_path(task.output_file), on_token)
+        token = _current_stream.set(stream)
+        try:
+            text = execute(task, context)
+        finally:
+            _current_stream.reset(token)
+            stream.close()
+        # Only reached on success; on failure the partial file stays for the resumed run
+        os.remove(stream.path)
+        return text
+
+    return streaming_execute
+
+
+def console_echo(key, token):
+    print(token, end="", flush=True)
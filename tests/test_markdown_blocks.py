@@ -0,0 +1,37 @@
+from markdown_blocks import iter_blocks
+
+
+def blocks(text):
+    return list(iter_blocks(text.splitlines()))
+
+
+def test_nested_lists_keep_their_depth_and_kind():
+    items = [block for block in blocks(
+        "- Backend\n"
+        "  - API\n"
+        "    1. Auth\n"
+        "    2. Rate limits\n"
+        "  - Storage\n"
+        "- Frontend\n"
+    ) if block["type"] == "list_item"]
+    assert [(item["depth"], item["ordered"], item["number"], item["text"]) for item in items] == [
+        (1, False, None, "Backend"),
+        (2, False, None, "API"),
+        (3, True, "1", "Auth"),
+        (3, True, "2", "Rate limits"),
+        (2, False, None, "Storage"),
+        (1, False, None, "Frontend"),
+    ]
+
+
+def test_nested_list_continuation_line_joins_its_item():
+    items = [block for block in blocks("1. Step one\n   - detail\n     continued\n2. Step two\n")
+             if block["type"] == "list_item"]
+    assert [(item["depth"], item["text"]) for item in items] == [
+        (1, "Step one"), (2, "detail continued"), (1, "Step two")]
+
+
+def test_markdown_wrapper_is_rendered_and_other_fences_stay_code():
+    result = blocks("```markdown\n# Title\n```mermaid\ngraph TD\nA --> B\n```\n```\n")
+    assert result[0] == {"type": "heading", "level": 1, "text": "Title"}
+    assert result[1] == {"type": "code", "language": "mermaid", "lines": ["graph TD", "A --> B"]}
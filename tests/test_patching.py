@@ -0,0 +1,67 @@
+import pytest
+
+from patching import PatchError, apply_patches, parse_patches
+
+DRAFT = """# Design Document
+
+## Overview
+The chatbot answers questions.
+
+## Architecture
+Three services.
+
+### API
+REST endpoints.
+
+### Storage
+PostgreSQL.
+
+## Risks
+Latency.
+"""
+
+
+def test_section_is_replaced_and_the_rest_kept():
+    merged = apply_patches(DRAFT, parse_patches(
+        "<<<SECTION: Risks>>>\n## Risks\nLatency and cost.\n<<<END>>>"))
+    assert "Latency and cost." in merged
+    assert "Three services." in merged and "### Storage" in merged
+
+
+def test_after_inserts_a_new_section():
+    merged = apply_patches(DRAFT, [("AFTER", "Overview", "## Goals\nBe helpful.")])
+    assert merged.index("## Overview") < merged.index("## Goals") < merged.index("## Architecture")
+
+
+def test_unknown_heading_is_rejected():
+    with pytest.raises(PatchError, match="no section titled"):
+        apply_patches(DRAFT, [("SECTION", "Deployment", "## Deployment\nKubernetes.")])
+
+
+def test_patch_that_drops_subsections_is_rejected():
+    with pytest.raises(PatchError, match="drops its subsections"):
+        apply_patches(DRAFT, [("SECTION", "Architecture", "## Architecture\nOne monolith.")])
+
+
+def test_patching_the_title_section_is_rejected():
+    with pytest.raises(PatchError, match="document title section"):
+        apply_patches(DRAFT, [("SECTION", "Design Document", "# Design Document\nRewritten.")])
+
+
+def test_ambiguous_heading_is_rejected():
+    draft = "# Doc\n\n## Client\n### Notes\nA.\n\n## Server\n### Notes\nB.\n"
+    with pytest.raises(PatchError, match="ambiguous"):
+        apply_patches(draft, [("SECTION", "### Notes", "### Notes\nC.")])
+
+
+def test_overlapping_patches_are_rejected():
+    with pytest.raises(PatchError, match="overlap"):
+        apply_patches(DRAFT, [
+            ("SECTION", "Architecture", "## Architecture\nTwo services.\n\n### API\nGraphQL.\n\n### Storage\nS3."),
+            ("SECTION", "API", "### API\ngRPC."),
+        ])
+
+
+def test_text_outside_the_blocks_is_rejected():
+    with pytest.raises(PatchError, match="outside the patch blocks"):
+        parse_patches("Here is the full document:\n<<<SECTION: Risks>>>\n## Risks\nNone.\n<<<END>>>")
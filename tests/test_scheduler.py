@@ -0,0 +1,68 @@
+import time
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from scheduler import build_graph, run_dag
+
+
+def make_task(tmp_path, key, context=()):
+    # Just what the scheduler reads from a crewai Task: output_file, context and agent
+    return SimpleNamespace(output_file=str(tmp_path / f"{key}.txt"), context=list(context), agent=object())
+
+
+def test_build_graph_rejects_a_cycle(tmp_path):
+    first = make_task(tmp_path, "01_first")
+    second = make_task(tmp_path, "02_second", [first])
+    first.context = [second]
+    with pytest.raises(ValueError, match="cycle"):
+        build_graph([first, second])
+
+
+def test_build_graph_rejects_a_dependency_outside_the_pipeline(tmp_path):
+    outside = make_task(tmp_path, "00_outside")
+    with pytest.raises(ValueError, match="not part of the pipeline"):
+        build_graph([make_task(tmp_path, "01_first", [outside])])
+
+
+def test_failure_waits_for_running_tasks_and_starts_nothing_new(tmp_path):
+    root = make_task(tmp_path, "01_root")
+    failing = make_task(tmp_path, "02_failing", [root])
+    slow = make_task(tmp_path, "03_slow", [root])
+    after_failing = make_task(tmp_path, "04_after_failing", [failing])
+    after_slow = make_task(tmp_path, "05_after_slow", [slow])
+    failed = threading.Event()
+
+    def execute(task, context):
+        name = task.output_file
+        if name == failing.output_file:
+            failed.set()
+            raise RuntimeError("LLM call failed")
+        if name == slow.output_file:
+            failed.wait(5)
+            time.sleep(0.2)  # still running when the scheduler sees the failure
+        return f"output of {name}"
+
+    done = []
+    with pytest.raises(RuntimeError, match="LLM call failed"):
+        run_dag([root, failing, slow, after_failing, after_slow], max_workers=4, execute=execute,
+                on_task_done=lambda key, text: done.append(key))
+
+    assert done == ["01_root", "03_slow"]
+    assert (tmp_path / "03_slow.txt").read_text(encoding="utf-8") == f"output of {slow.output_file}"
+    assert not (tmp_path / "05_after_slow.txt").exists()
+
+
+def test_completed_tasks_are_not_run_again(tmp_path):
+    root = make_task(tmp_path, "01_root")
+    child = make_task(tmp_path, "02_child", [root])
+    calls = []
+
+    def execute(task, context):
+        calls.append((task.output_file, context))
+        return "child"
+
+    outputs = run_dag([root, child], execute=execute, completed={"01_root": "restored"})
+    assert outputs == {"01_root": "restored", "02_child": "child"}
+    assert calls == [(child.output_file, "restored")]
@@ -0,0 +1,258 @@
+import os
+import json
+import time
+import threading
+import contextvars
+
+from scheduler import task_key, task_dependencies, speculating
+from llm_cache import llm_settings, cache_hit
+from ratelimit import estimate_tokens
+
+# Per-task tracing: wall time, queue wait, LLM calls, prompt/completion tokens, retries,
+# context size and cost. Token usage comes from the LLM's own usage metadata through a
+# callback handler; when the provider does not report it, it is estimated from text length.
+
+# USD per 1M tokens (input, output)
+PRICES = {
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-pro": (1.25, 10.00),
+}
+
+_current_span = contextvars.ContextVar("sdlc_trace_span", default=None)
+
+
+def price_for(model):
+    name = (model or "").split("/")[-1]
+    for prefix, price in PRICES.items():
+        if name.startswith(prefix):
+            return price
+    return None
+
+
+class TaskSpan:
+    def __init__(self, key, model, context, task=None):
+        self.key = key
+        self.task = task or key  # plain task key; `key` may carry a #round / ~speculative suffix
+        self.counters_start = {}  # limiter and memory counters of the task when the span started
+        self.counters = {}        # ... and how far they moved until it finished
+        self.model = model
+        self.context_chars = len(context or "")
+        self.context_tokens = estimate_tokens(context) if context else 0
+        self.ready = None
+        self.started = None
+        self.finished = None
+        self.llm_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.usage_reported = False
+        self.cached = False
+        self.status = "running"
+        self._lock = threading.Lock()
+
+    def add_usage(self, prompt_tokens, completion_tokens):
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.usage_reported = True
+
+    def record_call(self):
+        with self._lock:
+            self.llm_calls += 1
+
+
+def _usage_from_result(response):
+    # langchain LLMResult: usage_metadata on the message (newer) or token_usage in llm_output (older)
+    for generations in getattr(response, "generations", None) or []:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+    if usage:
+        return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+    return None
+
+
+def usage_callback_handler():
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class UsageHandler(BaseCallbackHandler):
+        def on_chat_model_start(self, serialized, messages, **kwargs):
+            span = _current_span.get()
+            if span is not None:
+                span.record_call()
+
+        def on_llm_start(self, serialized, prompts, **kwargs):
+            span = _current_span.get()
+            if span is not None:
+                span.record_call()
+
+        def on_llm_end(self, response, **kwargs):
+            span = _current_span.get()
+            usage = _usage_from_result(response)
+            if span is not None and usage:
+                span.add_usage(*usage)
+
+    return UsageHandler()
+
+
+class Tracer:
+    def __init__(self, limiter=None, memory=None):
+        self.limiter = limiter
+        self.memory = memory
+        self.spans = {}
+        self.run_started = time.time()
+        self.run_finished = None
+        self.round = None  # set by refinement.Refiner, so re-runs get their own rows instead of replacing the first
+        self._finish_times = {}
+        self._speculative_finish_times = {}  # only used for tasks whose speculative result was kept (no re-run)
+        self._lock = threading.Lock()
+
+    def wrap(self, execute):
+        # Outermost wrapper: the span covers cache lookups, rate limiting and the LLM call itself
+        def traced_execute(task, context):
+            key = task_key(task)
+            name = f"{key}#{self.round}" if self.round else key
+            if speculating.get():
+                name += "~speculative"
+            span = TaskSpan(name, llm_settings(getattr(task.agent, "llm", None))[0], context, task=key)
+            with self._lock:
+                deps = [task_key(dep) for dep in task_dependencies(task)]
+                span.ready = max([self._finish_times.get(dep, self._speculative_finish_times.get(dep, self.run_started))
+                                  for dep in deps] or [self.run_started])
+                self.spans[name] = span
+            span.started = time.time()
+            span.counters_start = self._counters(key)
+            token = _current_span.set(span)
+            cache_hit.set(False)
+            try:
+                text = execute(task, context)
+            except BaseException:
+                span.status = "failed"
+                raise
+            finally:
+                _current_span.reset(token)
+                span.finished = time.time()
+                after = self._counters(key)
+                span.counters = {name: after[name] - span.counters_start[name] for name in after}
+                with self._lock:
+                    # A discarded guess must not move the ready time of the tasks waiting on the real run
+                    finish_times = self._speculative_finish_times if speculating.get() else self._finish_times
+                    finish_times[key] = span.finished
+
+            span.cached = cache_hit.get()
+            span.status = "cached" if span.cached else "ok"
+            if not span.cached:
+                # Providers that bypass the langchain callbacks still made at least one call
+                span.llm_calls = max(span.llm_calls, 1)
+            if not span.cached and not span.usage_reported:
+                span.prompt_tokens = estimate_tokens(task.description) + estimate_tokens(task.expected_output) + estimate_tokens(context)
+                span.completion_tokens = estimate_tokens(text)
+            return text
+
+        return traced_execute
+
+    def _counters(self, key):
+        # Limiter and memory stats are per plain task key and cumulative; spans keep what moved while they ran,
+        # so refinement rounds and speculative runs get their own share and the totals still add up
+        counters = {
+            "rate_limit_wait_seconds": self.limiter.wait_time.get(key, 0.0) if self.limiter else 0.0,
+            "retries": self.limiter.retries.get(key, 0) if self.limiter else 0,
+        }
+        stat = self.memory.stats.get(key, {}) if self.memory else {}
+        for name in ("retrievals", "hits", "embeddings", "chars", "ms"):
+            counters[f"memory_{name}"] = stat.get(name, 0)
+        return counters
+
+    def task_rows(self):
+        rows = []
+        for key, span in self.spans.items():
+            price = price_for(span.model)
+            cost = None
+            if price:
+                cost = (span.prompt_tokens * price[0] + span.completion_tokens * price[1]) / 1_000_000
+            rows.append({
+                "task": key,
+                "status": span.status,
+                "model": span.model,
+                "wall_seconds": round((span.finished or time.time()) - span.started, 3),
+                "queue_wait_seconds": round(max(0.0, span.started - span.ready), 3),
+                "rate_limit_wait_seconds": round(self._counter(span, "rate_limit_wait_seconds"), 3),
+                "llm_calls": span.llm_calls,
+                "retries": self._counter(span, "retries"),
+                "context_chars": span.context_chars,
+                "context_tokens": span.context_tokens,
+                "prompt_tokens": span.prompt_tokens,
+                "completion_tokens": span.completion_tokens,
+                "tokens_estimated": not span.usage_reported,
+                "cost_usd": round(cost, 6) if cost is not None else None,
+                **self._memory_fields(span),
+            })
+        rows.sort(key=lambda row: row["cost_usd"] or 0.0, reverse=True)
+        return rows
+
+    def _counter(self, span, name):
+        if span.finished is None:  # still running: everything since it started
+            return self._counters(span.task)[name] - span.counters_start.get(name, 0)
+        return span.counters.get(name, 0)
+
+    def _memory_fields(self, span):
+        return {
+            "memory_retrievals": self._counter(span, "memory_retrievals"),
+            "memory_hits": self._counter(span, "memory_hits"),
+            "memory_embeddings": self._counter(span, "memory_embeddings"),
+            "memory_chars": self._counter(span, "memory_chars"),
+            "memory_ms": round(self._counter(span, "memory_ms"), 1),
+        }
+
+    def report(self):
+        rows = self.task_rows()
+        finished = self.run_finished or time.time()
+        return {
+            "wall_seconds": round(finished - self.run_started, 3),
+            "task_seconds": round(sum(row["wall_seconds"] for row in rows), 3),
+            "prompt_tokens": sum(row["prompt_tokens"] for row in rows),
+            "completion_tokens": sum(row["completion_tokens"] for row in rows),
+            "cost_usd": round(sum(row["cost_usd"] or 0.0 for row in rows), 6),
+            "tasks": rows,
+        }
+
+    def format_table(self, report=None):
+        report = report or self.report()
+        header = f"{'Task':<28} {'Status':<7} {'Wall s':>8} {'Queue s':>8} {'Calls':>5} {'Retry':>5} {'Ctx tok':>8} {'In tok':>8} {'Out tok':>8} {'Cost $':>9}"
+        lines = [header, "-" * len(header)]
+        for row in report["tasks"]:
+            cost = f"{row['cost_usd']:.4f}" if row["cost_usd"] is not None else "n/a"
+            estimated = "~" if row["tokens_estimated"] and row["status"] == "ok" else " "
+            lines.append(
+                f"{row['task']:<28} {row['status']:<7} {row['wall_seconds']:>8.1f} {row['queue_wait_seconds']:>8.1f} "
+                f"{row['llm_calls']:>5} {row['retries']:>5} {row['context_tokens']:>8} "
+                f"{estimated}{row['prompt_tokens']:>7} {estimated}{row['completion_tokens']:>7} {cost:>9}"
+            )
+        lines.append("-" * len(header))
+        lines.append(
+            f"Run wall time {report['wall_seconds']:.1f}s, task time {report['task_seconds']:.1f}s, "
+            f"{report['prompt_tokens']} in / {report['completion_tokens']} out tokens, ${report['cost_usd']:.4f}"
+            "  (~ = estimated from text length)"
+        )
+        if self.memory:
+            rows = report["tasks"]
+            lines.append(
+                f"Agent memory: {sum(r['memory_retrievals'] for r in rows)} lookups, "
+                f"{sum(r['memory_hits'] for r in rows)} notes injected ({sum(r['memory_chars'] for r in rows)} chars), "
+                f"{sum(r['memory_embeddings'] for r in rows)} embedding calls, {sum(r['memory_ms'] for r in rows):.0f} ms"
+            )
+        return "\n".join(lines)
+
+    def write_report(self, output_dir):
+        self.run_finished = self.run_finished or time.time()
+        report = self.report()
+        os.makedirs(output_dir, exist_ok=True)
+        with open(os.path.join(output_dir, "run_report.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        table = self.format_table(report)
+        with open(os.path.join(output_dir, "run_report.txt"), "w", encoding="utf-8") as f:
+            f.write(table + "\n")
+        return table
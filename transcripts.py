@@ -0,0 +1,124 @@
+import os
+import sys
+import json
+import gzip
+import time
+import threading
+
+from scheduler import task_key
+from llm_cache import cache_key, cache_hit, llm_settings
+
+# Record / replay of LLM responses. A recorded run appends one JSON line per task response to a gzip
+# transcript (each line its own gzip member, so a crash never corrupts what is already written). A replayed
+# run answers every task whose request fingerprint (llm_cache.cache_key: prompt, agent, model, context)
+# is in the transcript, and handles the rest according to the miss policy:
+#   fail         raise ReplayMiss
+#   passthrough  call the real LLM
+#   fake         answer offline with fake_llm (no delay)
+# This lets prompt, assembly and export changes be re-run against yesterday's answers at no API cost.
+
+MISS_POLICIES = ("fail", "passthrough", "fake")
+DEFAULT_TRANSCRIPT_NAME = "transcript.jsonl.gz"
+
+
+class ReplayMiss(KeyError):
+    pass
+
+
+def read_transcript(path):
+    """Yield the recorded entries in order."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class TranscriptRecorder:
+    def __init__(self, path):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.path = path
+        self.entries = 0
+        self._lock = threading.Lock()
+
+    def record(self, task, context, response, seconds):
+        entry = {
+            "fingerprint": cache_key(task, context),
+            "task": task_key(task),
+            "model": llm_settings(getattr(task.agent, "llm", None))[0],
+            "context_chars": len(context or ""),
+            "response": response,
+            "seconds": round(seconds, 3),
+            "recorded": time.time(),
+        }
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(line)
+            self.entries += 1
+
+    def wrap(self, execute):
+        def recording_execute(task, context):
+            started = time.time()
+            response = execute(task, context)
+            self.record(task, context, response, time.time() - started)
+            return response
+
+        return recording_execute
+
+
+class TranscriptReplayer:
+    def __init__(self, path, on_miss="fail"):
+        if on_miss not in MISS_POLICIES:
+            raise ValueError(f"Unknown miss policy '{on_miss}' (choose from {', '.join(MISS_POLICIES)})")
+        self.path = path
+        self.on_miss = on_miss
+        # Loaded up front, so the transcript may live in an output folder that the run is about to clean
+        self.responses = {entry["fingerprint"]: entry["response"] for entry in read_transcript(path)}
+        self.hits = []
+        self.misses = []
+        self._fake = None
+
+    def _fake_response(self, task, context):
+        if self._fake is None:
+            from fake_llm import FakeLLMBackend
+            self._fake = FakeLLMBackend(time_scale=0, answer_prefix="")
+        return self._fake.complete(f"{task.description}\n\n{context or ''}", key=task_key(task))
+
+    def wrap(self, execute):
+        def replaying_execute(task, context):
+            key = task_key(task)
+            response = self.responses.get(cache_key(task, context))
+            if response is not None:
+                self.hits.append(key)
+                cache_hit.set(True)  # no LLM call was made, report it like a cache hit
+                print(f"⏪ Replayed {key}")
+                return response
+            self.misses.append(key)
+            if self.on_miss == "fail":
+                raise ReplayMiss(f"{key}: request not in transcript {self.path} (prompt or upstream changed?)")
+            if self.on_miss == "fake":
+                print(f"🎭 {key}: not in transcript, using a fake answer")
+                cache_hit.set(True)
+                return self._fake_response(task, context)
+            print(f"📡 {key}: not in transcript, calling the LLM")
+            return execute(task, context)
+
+        return replaying_execute
+
+
+def main():
+    # python transcripts.py outputs/transcript.jsonl.gz  -> one line per recorded response
+    for path in sys.argv[1:]:
+        total_chars = 0
+        for entry in read_transcript(path):
+            total_chars += len(entry["response"])
+            print(f"{entry['task']:<28} {entry['model']:<20} {len(entry['response']):>8} chars {entry['seconds']:>8.1f}s "
+                  f"{entry['fingerprint'][:12]}")
+        size = os.path.getsize(path)
+        print(f"{path}: {total_chars:,} chars of responses in {size:,} bytes")
+
+
+if __name__ == "__main__":
+    main()
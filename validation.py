@@ -0,0 +1,287 @@
+import re
+import json
+import time
+
+from scheduler import task_key, CONTEXT_DIVIDER
+from markdown_blocks import iter_blocks, plain_text
+from markdown_utils import strip_outer_fence, FENCE_RE, BOLD_HEADING_RE
+from mermaid import parse_flowchart, extract_mermaid, MermaidError
+
+# Local structural checks for the documents the reviewers would otherwise check by hand: required sections
+# present and not empty, well-formed tables, the Features Overview table, at least 3 database tables, APIs
+# with example payloads and status codes, valid JSON examples and Mermaid syntax for the flowchart. They run
+# in milliseconds on the parsed markdown. StructuralReview feeds the findings into the review task's context
+# ("hints"), or in "strict" mode writes the review itself when a draft fails a structural check, so no LLM
+# review is paid for a draft that has to be fixed anyway. Every result is kept for the run metadata.
+#
+# A validator returns [{"check", "ok", "severity": "error" | "warning", "detail"}].
+
+MIN_SECTION_WORDS = 25
+MIN_DB_TABLES = 3
+MIN_APIS = 3
+FLOWCHART_NODES = (10, 15)
+MAX_LABEL_CHARS = 40
+
+PDD_SECTIONS = [
+    ("Executive Summary", r"executive summary|overview of the project"),
+    ("Problem Statement", r"problem"),
+    ("Objectives & Success Metrics", r"objective|success metric|goals"),
+    ("Features Overview", r"feature"),
+    ("Technical Architecture Overview", r"architecture"),
+]
+SDD_SECTIONS = [
+    ("Technical Architecture", r"architecture"),
+    ("Data Flow", r"data flow"),
+    ("Database Schema", r"database|schema|data model"),
+    ("API Specifications", r"\bapis?\b|endpoint"),
+]
+PLACEHOLDER_RE = re.compile(r"\b(TBD|TODO|lorem ipsum)\b|\[(insert|add|your)[^\]]*\]", re.IGNORECASE)
+ENDPOINT_RE = re.compile(r"\b(GET|POST|PUT|PATCH|DELETE)\s+`?(/[^\s`|)]*)")
+STATUS_CODE_RE = re.compile(r"\b[1-5]\d\d\b(?!\s*(?:ms|px|kb|mb|chars|characters|words))", re.IGNORECASE)
+CREATE_TABLE_RE = re.compile(r"\bCREATE\s+TABLE\b", re.IGNORECASE)
+NUMBERING_RE = re.compile(r"^[\dA-Za-z]{0,3}(\.\d+)*[.)]?\s+(?=\S)")
+
+
+def _finding(check, ok, detail="", severity="error"):
+    return {"check": check, "ok": ok, "severity": severity, "detail": detail}
+
+
+def _title(text):
+    text = plain_text(text).strip().rstrip(":").strip()
+    return NUMBERING_RE.sub("", text).lower()
+
+
+def _block_text(block):
+    if block["type"] == "table":
+        return " ".join(" ".join(row) for row in block["rows"])
+    if block["type"] == "code":
+        return "\n".join(block["lines"])
+    return block.get("text", "")
+
+
+def parse_sections(text):
+    """(blocks, [(level, title, first block, end block)]); bold-only lines count as the deepest headings."""
+    blocks = list(iter_blocks(strip_outer_fence(text or "").splitlines()))
+    headings = []
+    for index, block in enumerate(blocks):
+        if block["type"] == "heading":
+            headings.append((block["level"], _title(block["text"]), index))
+        elif block["type"] == "paragraph" and "\n" not in block["text"]:
+            bold = BOLD_HEADING_RE.match(block["text"])
+            if bold:
+                headings.append((7, _title(bold.group(1)), index))
+    sections = []
+    for position, (level, title, start) in enumerate(headings):
+        end = next((other for other_level, _, other in headings[position + 1:] if other_level <= level), len(blocks))
+        sections.append((level, title, start + 1, end))
+    return blocks, sections
+
+
+def _find_section(sections, pattern):
+    # The top-most match, so "2.2.3 Database" under the architecture does not shadow "4. Database Schema"
+    matches = [section for section in sections if re.search(pattern, section[1])]
+    return min(matches, key=lambda section: section[0]) if matches else None
+
+
+def check_sections(blocks, sections, required):
+    """One finding per required section (present, then not shallow); returns (findings, {name: blocks})."""
+    findings, found = [], {}
+    for name, pattern in required:
+        section = _find_section(sections, pattern)
+        if section is None:
+            findings.append(_finding(f"section: {name}", False, "missing"))
+            continue
+        body = blocks[section[2]:section[3]]
+        found[name] = body
+        words = sum(len(_block_text(block).split()) for block in body)
+        findings.append(_finding(f"section: {name}", words >= MIN_SECTION_WORDS,
+                                 "" if words >= MIN_SECTION_WORDS else f"only {words} words",
+                                 severity="error" if words == 0 else "warning"))
+    return findings, found
+
+
+def check_markdown(text, blocks):
+    findings = []
+    fences = sum(1 for line in strip_outer_fence(text or "").splitlines() if FENCE_RE.match(line))
+    findings.append(_finding("code fences balanced", fences % 2 == 0, "" if fences % 2 == 0 else "a ``` is never closed"))
+    ragged = []
+    for block in blocks:
+        if block["type"] == "table":
+            width = len(block["rows"][0])
+            bad = [row for row in block["rows"][1:] if len(row) != width]
+            if bad or not all(cell.strip() for cell in block["rows"][0]):
+                ragged.append(" | ".join(block["rows"][0])[:50])
+    findings.append(_finding("tables well-formed", not ragged,
+                             f"rows with the wrong number of cells or empty headers in: {'; '.join(ragged[:3])}" if ragged else ""))
+    placeholders = sorted({match.group(0) for match in PLACEHOLDER_RE.finditer(text or "")})
+    findings.append(_finding("no placeholders", not placeholders, ", ".join(placeholders[:5]), severity="warning"))
+    return findings
+
+
+def validate_pdd(text):
+    blocks, sections = parse_sections(text)
+    findings, found = check_sections(blocks, sections, PDD_SECTIONS)
+    features = found.get("Features Overview")
+    if features is not None:
+        has_table = any(block["type"] == "table" for block in features)
+        findings.append(_finding("features overview table", has_table, "" if has_table else "no markdown table"))
+    return findings + check_markdown(text, blocks)
+
+
+def _json_examples(blocks):
+    for block in blocks:
+        source = "\n".join(block["lines"]).strip() if block["type"] == "code" else ""
+        if block["type"] == "code" and (block["language"].lower() == "json" or source.startswith(("{", "["))):
+            yield source
+
+
+def _loads_example(source):
+    # Examples often carry // comments or "..." for elided parts; only reject what is broken beyond that
+    source = re.sub(r"//[^\n\"]*$", "", source, flags=re.MULTILINE)
+    source = re.sub(r",?\s*\.\.\.\s*", "", source)
+    source = re.sub(r",(\s*[}\]])", r"\1", source)
+    json.loads(source)
+
+
+def validate_sdd(text):
+    blocks, sections = parse_sections(text)
+    findings, found = check_sections(blocks, sections, SDD_SECTIONS)
+
+    schema = found.get("Database Schema")
+    if schema is not None:
+        tables = [block for block in schema if block["type"] == "table"]
+        created = sum(len(CREATE_TABLE_RE.findall(_block_text(block))) for block in schema if block["type"] == "code")
+        count = max(len(tables), created)
+        findings.append(_finding(f"at least {MIN_DB_TABLES} database tables", count >= MIN_DB_TABLES, f"{count} found"))
+        untyped = [table["rows"][0][0] for table in tables
+                   if not any("type" in cell.lower() for cell in table["rows"][0])]
+        findings.append(_finding("schema tables have a type column", not untyped,
+                                 f"{len(untyped)} table(s) without one" if untyped else "", severity="warning"))
+
+    api = found.get("API Specifications")
+    if api is not None:
+        # Split the API section at every endpoint mention, so each endpoint is checked on its own text
+        chunks = []
+        for block in api:
+            text_of = _block_text(block)
+            endpoint = ENDPOINT_RE.search(text_of) if block["type"] != "code" else None
+            if endpoint and (not chunks or chunks[-1][0] != endpoint.group(0)):
+                chunks.append((f"{endpoint.group(1)} {endpoint.group(2)}", []))
+            if chunks:
+                chunks[-1][1].append(block)
+        findings.append(_finding(f"at least {MIN_APIS} APIs", len(chunks) >= MIN_APIS, f"{len(chunks)} endpoints found"))
+        no_payload = [name for name, body in chunks if not any(block["type"] == "code" for block in body)]
+        findings.append(_finding("APIs have example payloads", not no_payload, ", ".join(no_payload[:5])))
+        no_status = [name for name, body in chunks
+                     if not any(STATUS_CODE_RE.search(_block_text(block)) for block in body if block["type"] != "code")]
+        findings.append(_finding("APIs have status codes", not no_status, ", ".join(no_status[:5])))
+        invalid = []
+        for source in _json_examples(api):
+            try:
+                _loads_example(source)
+            except ValueError as e:
+                invalid.append(f"{source.splitlines()[0][:30]}... ({e.msg} at line {e.lineno})")
+        findings.append(_finding("JSON examples parse", not invalid, "; ".join(invalid[:3]), severity="warning"))
+
+    return findings + check_markdown(text, blocks)
+
+
+def validate_flowchart(text):
+    try:
+        chart = parse_flowchart(extract_mermaid(text))
+    except MermaidError as e:
+        return [_finding("mermaid syntax", False, str(e))]
+    low, high = FLOWCHART_NODES
+    nodes = len(chart["nodes"])
+    long_labels = [label for label in [node["label"] for node in chart["nodes"].values()]
+                   + [edge["label"] for edge in chart["edges"]] if len(label) > MAX_LABEL_CHARS]
+    return [
+        _finding("mermaid syntax", True),
+        _finding(f"{low}-{high} nodes", low <= nodes <= high, f"{nodes} nodes", severity="warning"),
+        _finding("short labels", not long_labels, f"{len(long_labels)} labels over {MAX_LABEL_CHARS} chars",
+                 severity="warning"),
+    ]
+
+
+# Artifact key -> validator; drafts are checked before their review, every listed artifact once it is written
+VALIDATORS = {
+    "03_pdd": validate_pdd,
+    "03b_pdd_updated": validate_pdd,
+    "04_sdd": validate_sdd,
+    "04b_sdd_updated": validate_sdd,
+    "07_flowchart": validate_flowchart,
+}
+
+
+class StructuralReview:
+    MODES = ("hints", "strict")
+
+    def __init__(self, cycles, mode="hints", validators=None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown validation mode '{mode}' (choose from {', '.join(self.MODES)})")
+        self.validators = validators or VALIDATORS
+        self.reviews = {review: draft for draft, review, _ in cycles if draft in self.validators}
+        self.mode = mode
+        self.results = {}  # artifact key -> {"findings", "errors", "warnings", "ms"}
+        self.local_reviews = []
+
+    def check(self, key, text):
+        started = time.perf_counter()
+        findings = self.validators[key](text)
+        result = {
+            "findings": findings,
+            "errors": [f for f in findings if not f["ok"] and f["severity"] == "error"],
+            "warnings": [f for f in findings if not f["ok"] and f["severity"] == "warning"],
+            "ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+        self.results[key] = result
+        return result
+
+    def record(self, key, text):
+        # run_dag on_task_done hook: keep the findings of every validated artifact for the run metadata
+        if key in self.validators:
+            result = self.check(key, text)
+            if result["errors"] or result["warnings"]:
+                print(f"🧪 {key}: {len(result['errors'])} structural error(s), {len(result['warnings'])} warning(s)")
+
+    def _draft_result(self, task, upstream):
+        draft = self.reviews.get(task_key(task))
+        if draft is None or draft not in upstream:
+            return None
+        return self.check(draft, upstream[draft])
+
+    def shortcut(self, task, upstream):
+        if self.mode != "strict":
+            return None
+        result = self._draft_result(task, upstream)
+        if not result or not result["errors"]:
+            return None
+        key = task_key(task)
+        self.local_reviews.append(key)
+        print(f"🧪 {key}: draft fails {len(result['errors'])} structural check(s), writing the review locally")
+        lines = ["# Structural Review (automated local checks)", ""]
+        lines += [f"- {'PASSED' if f['ok'] else f['severity'].upper()}: {f['check']}"
+                  + (f" ({f['detail']})" if f["detail"] else "") for f in result["findings"]]
+        lines += ["", "VERDICT: CHANGES_REQUIRED", "ISSUES:"]
+        lines += [f"- {f['check']}: {f['detail'] or 'failed'}" for f in result["errors"] + result["warnings"]]
+        return "\n".join(lines)
+
+    def context_builder(self, base):
+        def build(task, upstream):
+            context = base(task, upstream)
+            result = self._draft_result(task, upstream)
+            if result is None:
+                return context
+            lines = ["Automated structural checks of the draft (already verified locally, do not re-check them; "
+                     "copy every FAILED item into ISSUES and spend the review on content):"]
+            for f in result["findings"]:
+                status = "PASSED" if f["ok"] else ("FAILED" if f["severity"] == "error" else "WARNING")
+                lines.append(f"- {status}: {f['check']}" + (f" ({f['detail']})" if f["detail"] and not f["ok"] else ""))
+            return CONTEXT_DIVIDER.join(part for part in (context, "\n".join(lines)) if part)
+
+        return build
+
+    def summary(self):
+        errors = sum(len(result["errors"]) for result in self.results.values())
+        return (f"{len(self.results)} artifacts checked, {errors} structural error(s), "
+                f"{len(self.local_reviews)} review(s) written locally")